@@ -61,6 +61,7 @@ class ProjectAdminSerializer(ProjectSerializer):
             'container_image',
             'container_mem_limit',
             'container_time_limit',
+            'build_queue',
             'install_project',
             'use_system_packages',
             'skip',
@@ -1,8 +1,10 @@
 """Utility functions that are used by both views and celery tasks."""
 
-import itertools
 import logging
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
 from rest_framework.pagination import PageNumberPagination
 
 from readthedocs.builds.constants import (
@@ -15,95 +17,142 @@ from readthedocs.builds.constants import (
     TAG,
 )
 from readthedocs.builds.models import Version
+from readthedocs.core.routing import invalidate_routing
+from readthedocs.core.utils import broadcast, chunked
 
 
 log = logging.getLogger(__name__)
 
 
 def sync_versions(project, versions, type):  # pylint: disable=redefined-builtin
-    """Update the database with the current versions from the repository."""
-    old_version_values = project.versions.filter(type=type).values_list(
-        'verbose_name',
-        'identifier',
+    """
+    Update the database with the current versions from the repository.
+
+    The changes are computed in memory from the versions of the project,
+    fetched once, and applied with a query for each kind of change:
+    an ``UPDATE`` for the changed identifiers and a ``bulk_create``
+    for the new versions.
+    """
+    from readthedocs.projects import tasks
+
+    project_versions = list(
+        project.versions.values_list('slug', 'verbose_name', 'identifier', 'type'),
     )
-    old_versions = dict(old_version_values)
+    old_versions = {
+        verbose_name: identifier
+        for __, verbose_name, identifier, version_type in project_versions
+        if version_type == type
+    }
+    used_slugs = {slug for slug, __, __, __ in project_versions}
+    # Reserve the slugs of the stable and latest versions defined by the user,
+    # ``set_or_create_version`` creates them before the ``bulk_create``
+    version_names = {version['verbose_name'] for version in versions}
+    if STABLE_VERBOSE_NAME in version_names:
+        used_slugs.add(STABLE)
+    if LATEST_VERBOSE_NAME in version_names:
+        used_slugs.add(LATEST)
 
-    # Add new versions
     added = set()
+    updated = {}
+    new_versions = []
     has_user_stable = False
     has_user_latest = False
-    for version in versions:
-        version_id = version['identifier']
-        version_name = version['verbose_name']
-        if version_name == STABLE_VERBOSE_NAME:
-            has_user_stable = True
-            created_version, created = set_or_create_version(
-                project=project,
-                slug=STABLE,
-                version_id=version_id,
-                verbose_name=version_name,
-                type_=type,
-            )
-            if created:
-                added.add(created_version.slug)
-        elif version_name == LATEST_VERBOSE_NAME:
-            has_user_latest = True
-            created_version, created = set_or_create_version(
-                project=project,
-                slug=LATEST,
-                version_id=version_id,
-                verbose_name=version_name,
-                type_=type,
-            )
-            if created:
-                added.add(created_version.slug)
-        elif version_name in old_versions:
-            if version_id == old_versions[version_name]:
-                # Version is correct
-                continue
-            else:
-                # Update slug with new identifier
-                Version.objects.filter(
+    slug_field = Version._meta.get_field('slug')
+    with transaction.atomic():
+        for version in versions:
+            version_id = version['identifier']
+            version_name = version['verbose_name']
+            if version_name == STABLE_VERBOSE_NAME:
+                has_user_stable = True
+                created_version, created = set_or_create_version(
                     project=project,
+                    slug=STABLE,
+                    version_id=version_id,
                     verbose_name=version_name,
-                ).update(
-                    identifier=version_id,
-                    type=type,
-                    machine=False,
-                )  # noqa
-
-                log.info(
-                    '(Sync Versions) Updated Version: [%s=%s] ',
-                    version_name,
-                    version_id,
+                    type_=type,
                 )
-        else:
-            # New Version
-            created_version = Version.objects.create(
+                if created:
+                    used_slugs.add(created_version.slug)
+                    added.add(created_version.slug)
+            elif version_name == LATEST_VERBOSE_NAME:
+                has_user_latest = True
+                created_version, created = set_or_create_version(
+                    project=project,
+                    slug=LATEST,
+                    version_id=version_id,
+                    verbose_name=version_name,
+                    type_=type,
+                )
+                if created:
+                    used_slugs.add(created_version.slug)
+                    added.add(created_version.slug)
+            elif version_name in old_versions:
+                if version_id != old_versions[version_name]:
+                    # Update slug with new identifier
+                    updated[version_name] = version_id
+            else:
+                # New Version
+                new_versions.append(
+                    Version(
+                        project=project,
+                        type=type,
+                        identifier=version_id,
+                        verbose_name=version_name,
+                        slug=slug_field.create_unique_slug(version_name, used_slugs),
+                    ),
+                )
+                # Don't create it twice if the name is repeated
+                old_versions[version_name] = version_id
+
+        for names in chunked(updated, settings.SYNC_VERSIONS_BATCH_SIZE):
+            Version.objects.filter(
                 project=project,
+                verbose_name__in=names,
+            ).update(
+                identifier=Case(
+                    *[When(verbose_name=name, then=Value(updated[name])) for name in names],
+                    output_field=CharField()
+                ),
                 type=type,
-                identifier=version_id,
-                verbose_name=version_name,
+                machine=False,
             )
-            added.add(created_version.slug)
-    if not has_user_stable:
-        stable_version = (
-            project.versions.filter(slug=STABLE, type=type).first()
-        )
-        if stable_version:
-            # Put back the RTD's stable version
-            stable_version.machine = True
-            stable_version.save()
-    if not has_user_latest:
-        latest_version = (
-            project.versions.filter(slug=LATEST, type=type).first()
+        for version_name, version_id in updated.items():
+            log.info(
+                '(Sync Versions) Updated Version: [%s=%s] ',
+                version_name,
+                version_id,
+            )
+
+        Version.objects.bulk_create(
+            new_versions,
+            batch_size=settings.SYNC_VERSIONS_BATCH_SIZE,
         )
-        if latest_version:
-            # Put back the RTD's latest version
-            latest_version.machine = True
-            latest_version.identifier = project.get_default_branch()
-            latest_version.verbose_name = LATEST_VERBOSE_NAME
-            latest_version.save()
+        added.update(version.slug for version in new_versions)
+
+        if not has_user_stable:
+            stable_version = (
+                project.versions.filter(slug=STABLE, type=type).first()
+            )
+            if stable_version:
+                # Put back the RTD's stable version
+                stable_version.machine = True
+                stable_version.save()
+        if not has_user_latest:
+            latest_version = (
+                project.versions.filter(slug=LATEST, type=type).first()
+            )
+            if latest_version:
+                # Put back the RTD's latest version
+                latest_version.machine = True
+                latest_version.identifier = project.get_default_branch()
+                latest_version.verbose_name = LATEST_VERBOSE_NAME
+                latest_version.save()
+
+    if updated or new_versions:
+        # ``update`` and ``bulk_create`` don't call ``Version.save``
+        # nor send the ``post_save`` signal
+        invalidate_routing()
+        broadcast(type='app', task=tasks.symlink_project, args=[project.pk])
     if added:
         log.info('(Sync Versions) Added Versions: [%s] ', ' '.join(added))
     return added
@@ -151,29 +200,31 @@ def delete_versions(project, version_data):
     to_delete_qs = to_delete_qs.exclude(active=True)
     to_delete_qs = to_delete_qs.exclude(slug__in=NON_REPOSITORY_VERSIONS)
 
-    if to_delete_qs.count():
-        ret_val = {obj.slug for obj in to_delete_qs}
+    ret_val = set(to_delete_qs.values_list('slug', flat=True))
+    if ret_val:
         log.info('(Sync Versions) Deleted Versions: [%s]', ' '.join(ret_val))
         to_delete_qs.delete()
-        return ret_val
-    return set()
+    return ret_val
 
 
 def run_automation_rules(project, versions_slug):
     """
     Runs the automation rules on each version.
 
-    The rules are sorted by priority.
+    The rules are sorted by priority,
+    each rule is run on all the versions of its type before the next one.
 
     .. note::
 
        Currently the versions aren't sorted in any way,
        the same order is keeped.
     """
-    versions = project.versions.filter(slug__in=versions_slug)
-    rules = project.automation_rules.all()
-    for version, rule in itertools.product(versions, rules):
-        rule.run(version)
+    versions = list(project.versions.filter(slug__in=versions_slug))
+    if not versions:
+        return
+    for rule in project.automation_rules.all():
+        for version in versions:
+            rule.run(version)
 
 
 class RemoteOrganizationPagination(PageNumberPagination):
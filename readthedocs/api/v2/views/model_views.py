@@ -10,6 +10,7 @@ from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 
+from readthedocs.builds import scheduling
 from readthedocs.builds.constants import BRANCH, TAG, INTERNAL
 from readthedocs.builds.models import Build, BuildCommandResult, Version
 from readthedocs.core.utils import trigger_build
@@ -274,7 +275,26 @@ class BuildViewSetBase(UserSelectViewSet):
     serializer_class = BuildSerializer
     admin_serializer_class = BuildAdminSerializer
     model = Build
-    filterset_fields = ('project__slug', 'commit')
+    filterset_fields = ('project__slug', 'commit', 'version', 'state', 'success')
+
+    @decorators.action(
+        detail=True,
+        permission_classes=[permissions.IsAdminUser],
+        methods=['post'],
+    )
+    def start(self, request, **kwargs):
+        """
+        Move the build out of the queue, before the builder reads its commit.
+
+        :returns: the build, and whether it was in the queue (``started``)
+        """
+        build = self.get_object()
+        started = scheduling.start_build(build)
+        build.refresh_from_db()
+        return Response({
+            'build': self.get_serializer(build).data,
+            'started': started,
+        })
 
 
 class BuildViewSet(SettingsOverrideObject):
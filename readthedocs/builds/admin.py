@@ -137,6 +137,7 @@ class VersionAdmin(admin.ModelAdmin):
             trigger_build(
                 project=version.project,
                 version=version,
+                rebuild=True,
             )
             total += 1
         messages.add_message(
@@ -0,0 +1,153 @@
+"""
+Content addressed store of the build artifacts on the local filesystem.
+
+Each file is stored once under ``ARTIFACT_STORE_ROOT``, named by its sha256,
+and the copies of the artifacts are hardlinks to the stored files:
+files identical across versions and builds (theme assets, images)
+use the disk space once and aren't copied again.
+
+The hardlinks are the references to the stored files, a stored file
+with no other link than the one in the store is removed by ``collect_garbage``,
+unless it was changed in the last ``ARTIFACT_STORE_GC_GRACE_PERIOD`` seconds:
+files just stored aren't linked yet.
+Artifacts are never modified in place, files are replaced by renaming
+a new link over them, so a change can't affect the other copies.
+
+The store must be on the same filesystem of the artifacts.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import time
+
+from django.conf import settings
+
+from readthedocs.core.utils import safe_makedirs
+
+
+log = logging.getLogger(__name__)
+
+# Size of the chunks read when hashing a file
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_file_hash(path):
+    """Return the hex sha256 digest of the file at ``path``."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _get_tmp_path(path):
+    return os.path.join(
+        os.path.dirname(path),
+        '.{}.{}.tmp'.format(os.path.basename(path), os.getpid()),
+    )
+
+
+def store_file(path):
+    """
+    Store the file at ``path``, unless a file with the same content is stored.
+
+    :returns: the path of the stored file
+    """
+    file_hash = get_file_hash(path)
+    stored_path = os.path.join(settings.ARTIFACT_STORE_ROOT, file_hash[:2], file_hash)
+    if not os.path.exists(stored_path):
+        safe_makedirs(os.path.dirname(stored_path))
+        tmp_path = _get_tmp_path(stored_path)
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, stored_path)
+    return stored_path
+
+
+def link_file(path, target):
+    """
+    Make ``target`` a hardlink to the stored copy of the file at ``path``.
+
+    :returns: whether ``target`` was changed
+    """
+    stored_path = store_file(path)
+    if os.path.exists(target) and os.path.samefile(target, stored_path):
+        return False
+
+    safe_makedirs(os.path.dirname(target))
+    tmp_path = _get_tmp_path(target)
+    if os.path.lexists(tmp_path):
+        os.unlink(tmp_path)
+    try:
+        os.link(stored_path, tmp_path)
+    except FileNotFoundError:
+        # The stored file was collected in the meantime
+        os.link(store_file(path), tmp_path)
+    os.replace(tmp_path, target)
+    return True
+
+
+def link_directory(path, target):
+    """
+    Make the files of ``target`` hardlinks to the stored copies of the files of ``path``.
+
+    Files of ``target`` missing from ``path`` are removed.
+
+    :returns: a tuple with the number of changed, unchanged and removed files
+    """
+    changed = unchanged = removed = 0
+    files = set()
+    for root, __, filenames in os.walk(path, followlinks=True):
+        relroot = os.path.relpath(root, path)
+        for filename in filenames:
+            relpath = os.path.normpath(os.path.join(relroot, filename))
+            files.add(relpath)
+            if link_file(os.path.join(root, filename), os.path.join(target, relpath)):
+                changed += 1
+            else:
+                unchanged += 1
+
+    for root, dirnames, filenames in os.walk(target, topdown=False):
+        relroot = os.path.relpath(root, target)
+        for filename in filenames:
+            if os.path.normpath(os.path.join(relroot, filename)) not in files:
+                os.unlink(os.path.join(root, filename))
+                removed += 1
+        for dirname in dirnames:
+            dirpath = os.path.join(root, dirname)
+            if os.path.islink(dirpath):
+                os.unlink(dirpath)
+            elif not os.listdir(dirpath):
+                os.rmdir(dirpath)
+    return changed, unchanged, removed
+
+
+def collect_garbage():
+    """
+    Remove the stored files not linked by any artifact.
+
+    Files (and temporary files) changed in the last ``ARTIFACT_STORE_GC_GRACE_PERIOD``
+    seconds are kept, they may be linked by a build running now.
+
+    :returns: a tuple with the number of removed files and their size in bytes
+    """
+    removed = size = 0
+    if not os.path.exists(settings.ARTIFACT_STORE_ROOT):
+        return removed, size
+
+    # Files stored or renamed after this are still being linked
+    changed_before = time.time() - settings.ARTIFACT_STORE_GC_GRACE_PERIOD
+    for root, __, filenames in os.walk(settings.ARTIFACT_STORE_ROOT):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            try:
+                stat = os.lstat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_nlink == 1 and max(stat.st_mtime, stat.st_ctime) < changed_before:
+                os.unlink(path)
+                removed += 1
+                size += stat.st_size
+    log.info('Removed %s unreferenced artifacts, %s bytes', removed, size)
+    return removed, size
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0010_add-description-field-to-automation-rule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='build',
+            name='fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of the commit, configuration and environment of the build', max_length=64, null=True, verbose_name='Fingerprint'),
+        ),
+    ]
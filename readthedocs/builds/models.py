@@ -651,6 +651,13 @@ class Build(models.Model):
         blank=True,
     )
     _config = JSONField(_('Configuration used in the build'), default=dict)
+    fingerprint = models.CharField(
+        _('Fingerprint'),
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text=_('Hash of the commit, configuration and environment of the build'),
+    )
 
     length = models.IntegerField(_('Build Length'), null=True, blank=True)
 
@@ -1138,14 +1145,20 @@ class RegexAutomationRule(VersionAutomationRule):
         VersionAutomationRule.SET_DEFAULT_VERSION_ACTION: actions.set_default_version,
     }
 
+    # Compiled ``match_arg``, reused when the rule runs on many versions
+    _regex = None
+
     class Meta:
         proxy = True
 
+    def get_regex(self, match_arg):
+        if self._regex is None or self._regex.pattern != match_arg:
+            self._regex = re.compile(match_arg)
+        return self._regex
+
     def match(self, version, match_arg):
         try:
-            match = re.search(
-                match_arg, version.verbose_name
-            )
+            match = self.get_regex(match_arg).search(version.verbose_name)
             return bool(match), match
         except Exception as e:
             log.info('Error parsing regex: %s', e)
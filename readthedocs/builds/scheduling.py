@@ -0,0 +1,160 @@
+"""
+Scheduling of the builds of the versions.
+
+Webhooks can trigger many builds of the same version in a short time.
+A build triggered while the version already has a build waiting in the queue
+is coalesced with it: the queued build gets the newest commit, instead of
+queueing another ``update_docs_task`` that would only fail to acquire the lock
+of the version. So each version has at most one queued build and one running.
+The task moves its build out of the queue before reading the commit,
+the requests arriving after that queue a new build.
+
+The number of queued builds and the time the builds waited before starting
+are reported for each build queue by ``get_queue_stats``.
+"""
+
+import datetime
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from readthedocs.builds.constants import BUILD_STATE_CLONING, BUILD_STATE_TRIGGERED
+from readthedocs.builds.models import Build
+from readthedocs.doc_builder.constants import DOCKER_LIMITS
+
+
+log = logging.getLogger(__name__)
+
+STARTED_KEY = 'build-queue:{queue}:started'
+WAIT_KEY = 'build-queue:{queue}:wait'
+COALESCED_KEY = 'build-queue:{queue}:coalesced'
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The key is missing
+        cache.set(key, delta, None)
+        return delta
+
+
+def get_build_queue(project):
+    """Return the name of the queue of the builds of ``project``."""
+    return project.build_queue or settings.CELERY_DEFAULT_QUEUE
+
+
+def get_queued_builds():
+    """
+    Return the builds triggered and not started yet.
+
+    Builds waiting for more than the time limit of a build
+    are left to ``finish_inactive_builds``.
+    """
+    delta = datetime.timedelta(seconds=int(DOCKER_LIMITS['time'] * 1.2))
+    return Build.objects.filter(
+        state=BUILD_STATE_TRIGGERED,
+        date__gt=timezone.now() - delta,
+    )
+
+
+def get_queued_build(version):
+    """Return the build of ``version`` waiting in the queue, ``None`` if there isn't one."""
+    return get_queued_builds().filter(version=version).order_by('-date').first()
+
+
+def coalesce_build(build, commit=None):
+    """
+    Merge a new build request of the version of ``build`` into it.
+
+    The latest commit wins:
+    ``build`` is updated with ``commit``, the task reads it when it starts.
+    The build is updated only while it's still queued (see :py:func:`start_build`).
+
+    :returns: whether the request was merged,
+        if it wasn't a new build has to be queued
+    """
+    updated = Build.objects.filter(
+        pk=build.pk,
+        state=BUILD_STATE_TRIGGERED,
+    ).update(commit=commit or F('commit'))
+    if not updated:
+        return False
+    if commit:
+        build.commit = commit
+    _incr(COALESCED_KEY.format(queue=get_build_queue(build.project)))
+    log.info(
+        'Build coalesced with the queued build: project=%s version=%s build=%s',
+        build.project.slug,
+        build.version.slug,
+        build.pk,
+    )
+    return True
+
+
+def start_build(build):
+    """
+    Move ``build`` out of the queue, so no other build request is merged into it.
+
+    :returns: whether the build was in the queue,
+        ``False`` when it was already started (e.g. by a retried task)
+    """
+    return bool(
+        Build.objects.filter(
+            pk=build.pk,
+            state=BUILD_STATE_TRIGGERED,
+        ).update(state=BUILD_STATE_CLONING)
+    )
+
+
+def record_build_start(project, build):
+    """Record the time ``build`` waited in the queue of ``project``."""
+    date = parse_datetime(build.get('date') or '')
+    if date is None:
+        return
+    now = timezone.now() if timezone.is_aware(date) else datetime.datetime.now()
+    wait = max(int((now - date).total_seconds()), 0)
+    queue = get_build_queue(project)
+    _incr(STARTED_KEY.format(queue=queue))
+    _incr(WAIT_KEY.format(queue=queue), wait)
+
+
+def get_queue_stats():
+    """
+    Return the stats of each build queue.
+
+    For each queue name, a dictionary with the number of builds in the queue
+    (``depth``), of the builds started and coalesced, and the average seconds
+    the started builds waited in the queue (``average_wait``).
+    """
+    from readthedocs.projects.models import Project
+
+    depths = Counter(
+        queue or settings.CELERY_DEFAULT_QUEUE
+        for queue in get_queued_builds().values_list('project__build_queue', flat=True)
+    )
+    queues = set(depths)
+    queues.add(settings.CELERY_DEFAULT_QUEUE)
+    queues.update(
+        Project.objects.exclude(build_queue=None)
+        .exclude(build_queue='')
+        .values_list('build_queue', flat=True)
+        .distinct(),
+    )
+
+    stats = {}
+    for queue in sorted(queues):
+        started = cache.get(STARTED_KEY.format(queue=queue), 0)
+        wait = cache.get(WAIT_KEY.format(queue=queue), 0)
+        stats[queue] = {
+            'depth': depths[queue],
+            'started': started,
+            'coalesced': cache.get(COALESCED_KEY.format(queue=queue), 0),
+            'average_wait': wait / started if started else 0,
+        }
+    return stats
@@ -1,14 +1,64 @@
+import hashlib
 import logging
-from pathlib import Path
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
 from django.core.exceptions import SuspiciousFileOperation
 from django.core.files.storage import FileSystemStorage
 from storages.utils import safe_join, get_available_overwrite_name
 
+from readthedocs.builds import artifacts
+
 
 log = logging.getLogger(__name__)
 
+# Size of the chunks read from storage when hashing a file
+MD5_CHUNK_SIZE = 64 * 1024
+
+
+def get_local_md5(path):
+    """Return the hex md5 digest of the local file at ``path``."""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(MD5_CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+class TransferMetrics:
+
+    """
+    Counters of the files transferred to and from storage.
+
+    An instance can be shared by the copies and deletions of a build,
+    the counters are updated from the threads doing the transfers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.copied = 0
+        self.skipped = 0
+        self.deleted = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def __str__(self):
+        return 'copied={} skipped={} deleted={} bytes={} seconds={:.2f}'.format(
+            self.copied,
+            self.skipped,
+            self.deleted,
+            self.bytes,
+            self.seconds,
+        )
+
 
 class BuildMediaStorageMixin:
 
@@ -46,7 +96,7 @@ class BuildMediaStorageMixin:
         """
         return get_available_overwrite_name(name, max_length=max_length)
 
-    def delete_directory(self, path):
+    def delete_directory(self, path, metrics=None):
         """
         Delete all files under a certain path from storage.
 
@@ -56,37 +106,142 @@ class BuildMediaStorageMixin:
         delete all files.
 
         :param path: the path to the directory to remove
+        :param metrics: ``TransferMetrics`` updated with the deleted files
         """
         if path in ('', '/'):
             raise SuspiciousFileOperation('Deleting all storage cannot be right')
 
         log.debug('Deleting directory %s from media storage', path)
-        folders, files = self.listdir(self._dirpath(path))
-        for folder_name in folders:
-            if folder_name:
-                # Recursively delete the subdirectory
-                self.delete_directory(self.join(path, folder_name))
-        for filename in files:
-            if filename:
-                self.delete(self.join(path, filename))
+        start = time.time()
+        paths = [
+            self.join(top, filename)
+            for top, __, files in self.walk(path)
+            for filename in files
+            if filename
+        ]
+        self.delete_files(paths)
+        if metrics is not None:
+            metrics.add(deleted=len(paths), seconds=time.time() - start)
+
+    def delete_files(self, paths):
+        """
+        Delete the files at ``paths`` from storage.
 
-    def copy_directory(self, source, destination):
+        The files are deleted by a pool of ``RTD_BUILD_MEDIA_STORAGE_WORKERS`` threads,
+        storages able to delete many files with one request can override this.
+
+        :param paths: the paths of the files in storage
+        """
+        with ThreadPoolExecutor(max_workers=settings.RTD_BUILD_MEDIA_STORAGE_WORKERS) as executor:
+            # Consume the results to raise the errors
+            list(executor.map(self.delete, paths))
+
+    def copy_directory(self, source, destination, metrics=None):
         """
         Copy a directory recursively to storage.
 
+        The files are copied by a pool of ``RTD_BUILD_MEDIA_STORAGE_WORKERS`` threads.
+        Files already in storage with the same size and md5 are skipped
+        (see :py:meth:`get_stored_md5`),
+        so copying again after an interruption only copies the missing files.
+
         :param source: the source path on the local disk
         :param destination: the destination path in storage
+        :param metrics: ``TransferMetrics`` updated with the copied files
         """
         log.debug('Copying source directory %s to media storage at %s', source, destination)
-        source = Path(source)
-        for filepath in source.iterdir():
-            sub_destination = self.join(destination, filepath.name)
-            if filepath.is_dir():
-                # Recursively copy the subdirectory
-                self.copy_directory(filepath, sub_destination)
-            elif filepath.is_file():
-                with filepath.open('rb') as fd:
-                    self.save(sub_destination, fd)
+        start = time.time()
+        transfers = []
+        for root, __, files in os.walk(str(source), followlinks=True):
+            relpath = os.path.relpath(root, str(source))
+            for filename in files:
+                filepath = os.path.join(root, filename)
+                if not os.path.isfile(filepath):
+                    continue
+                if relpath == '.':
+                    sub_destination = self.join(destination, filename)
+                else:
+                    sub_destination = self.join(
+                        destination,
+                        '/'.join(relpath.split(os.sep) + [filename]),
+                    )
+                transfers.append((filepath, sub_destination))
+
+        with ThreadPoolExecutor(max_workers=settings.RTD_BUILD_MEDIA_STORAGE_WORKERS) as executor:
+            copied = list(executor.map(lambda args: self._copy_file(*args), transfers))
+
+        if metrics is not None:
+            metrics.add(
+                copied=sum(1 for size in copied if size is not None),
+                skipped=sum(1 for size in copied if size is None),
+                bytes=sum(size for size in copied if size is not None),
+                seconds=time.time() - start,
+            )
+
+    def _copy_file(self, filepath, destination):
+        """
+        Copy the local file at ``filepath`` to ``destination``, unless it's unchanged.
+
+        :returns: the number of bytes copied, ``None`` if the file was skipped
+        """
+        size = os.path.getsize(filepath)
+        if self._is_unchanged(filepath, size, destination):
+            return None
+        with open(filepath, 'rb') as fd:
+            self.save(destination, fd)
+        return size
+
+    def _is_unchanged(self, filepath, size, destination):
+        """
+        Return whether ``destination`` has the same size and md5 of ``filepath``.
+
+        The md5 of ``destination`` is the one known by the storage,
+        files whose md5 is unknown are always copied.
+        """
+        try:
+            if not self.exists(destination) or self.size(destination) != size:
+                return False
+            stored_md5 = self.get_stored_md5(destination)
+        except Exception:
+            # Some storages raise different errors for missing files,
+            # in doubt the file is copied
+            return False
+        return stored_md5 is not None and stored_md5 == get_local_md5(filepath)
+
+    def get_stored_md5(self, path):
+        """
+        Return the hex md5 digest of the file at ``path``, without reading it.
+
+        S3 compatible storages (S3, MinIO) use the ETag of the object,
+        that is its md5 unless it was uploaded in multiple parts.
+
+        :param path: the path to the file in storage
+        :returns: the md5, ``None`` if the storage doesn't know it
+        """
+        bucket = getattr(self, 'bucket', None)
+        if bucket is None:
+            return None
+        etag = bucket.Object(self._normalize_name(self._clean_name(path))).e_tag
+        etag = etag.strip('"')
+        if '-' in etag:
+            # Multipart upload, the ETag isn't the md5 of the content
+            return None
+        return etag
+
+    def get_md5(self, path):
+        """
+        Return the hex md5 digest of the file at ``path``.
+
+        The file is read in chunks of ``MD5_CHUNK_SIZE`` bytes,
+        so big artifacts are never loaded fully in memory.
+
+        :param path: the path to the file in storage
+        """
+        md5 = hashlib.md5()
+        with self.open(path, 'rb') as fd:
+            for chunk in fd.chunks(chunk_size=MD5_CHUNK_SIZE):
+                md5.update(chunk)
+        return md5.hexdigest()
 
     def join(self, directory, filepath):
         return safe_join(directory, filepath)
@@ -136,6 +291,22 @@ class BuildMediaFileSystemStorage(BuildMediaStorageMixin, FileSystemStorage):
             self.delete(name)
         return name
 
+    def _copy_file(self, filepath, destination):
+        """
+        Copy the local file at ``filepath`` to ``destination``, unless it's unchanged.
+
+        With ``USE_ARTIFACT_STORE`` the file is hardlinked from the artifact store.
+        """
+        if not settings.USE_ARTIFACT_STORE:
+            return super()._copy_file(filepath, destination)
+        if artifacts.link_file(filepath, self.path(destination)):
+            return os.path.getsize(filepath)
+        return None
+
+    def get_stored_md5(self, path):
+        """Hash the file at ``path``, reading it is cheap on the local disk."""
+        return self.get_md5(path)
+
     def listdir(self, path):
         """
         Return empty lists for nonexistent directories.
@@ -5,12 +5,20 @@ Classes to copy files between build and web servers.
 local machine.
 """
 
+import datetime
+import hashlib
+import json
 import logging
 import os
+import shlex
 import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.conf import settings
 
+from readthedocs.builds import artifacts
 from readthedocs.core.utils import safe_makedirs
 from readthedocs.core.utils.extend import SettingsOverrideObject
 
@@ -40,12 +48,27 @@ class LocalSyncer(BaseSyncer):
 
     @classmethod
     def copy(cls, path, target, is_file=False, **kwargs):
-        """A copy command that works with files or directories."""
+        """
+        A copy command that works with files or directories.
+
+        With ``USE_ARTIFACT_STORE`` the files are hardlinked from the artifact store.
+        """
         log.info('Local Copy %s to %s', path, target)
+        if is_file and path == target:
+            # Don't copy the same file over itself
+            return
+        if settings.USE_ARTIFACT_STORE:
+            if is_file:
+                artifacts.link_file(path, target)
+            else:
+                changed, unchanged, removed = artifacts.link_directory(path, target)
+                log.info(
+                    'Linked %s to %s: changed=%s unchanged=%s removed=%s',
+                    path, target, changed, unchanged, removed,
+                )
+            return
+
         if is_file:
-            if path == target:
-                # Don't copy the same file over itself
-                return
             if os.path.exists(target):
                 os.remove(target)
 
@@ -60,6 +83,256 @@ class LocalSyncer(BaseSyncer):
             shutil.copytree(path, target)
 
 
+def get_manifest_entry(path):
+    """Return the size and md5 of the file at ``path``, as in a manifest."""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(64 * 1024), b''):
+            md5.update(chunk)
+    return [os.path.getsize(path), md5.hexdigest()]
+
+
+def get_manifest(path):
+    """
+    Return the manifest of the files of the directory ``path``.
+
+    The manifest maps the path of each file, relative to ``path``,
+    to a list with its size and md5.
+    """
+    manifest = {}
+    for root, __, filenames in os.walk(path, followlinks=True):
+        for filename in filenames:
+            filepath = os.path.join(root, filename)
+            manifest[os.path.relpath(filepath, path)] = get_manifest_entry(filepath)
+    return manifest
+
+
+def _get_snapshot_name(name):
+    return '.{}.{}.{}'.format(
+        name,
+        datetime.datetime.now().strftime('%Y%m%d%H%M%S%f'),
+        os.getpid(),
+    )
+
+
+def _remove_snapshot(snapshot):
+    shutil.rmtree(snapshot, ignore_errors=True)
+    if os.path.exists(snapshot + '.json'):
+        os.remove(snapshot + '.json')
+
+
+def remove_directory(path):
+    """Remove the directory ``path``, and its snapshot if it was copied by a delta syncer."""
+    if os.path.islink(path):
+        snapshot = os.path.realpath(path)
+        os.unlink(path)
+        _remove_snapshot(snapshot)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class DeltaSyncer(BaseSyncer):
+
+    """
+    Copy only the files changed since the last copy, replacing directories atomically.
+
+    A copied directory is a link to a snapshot next to it, ``.<name>.<timestamp>.<pid>``,
+    with the manifest of its files in ``.<name>.<timestamp>.<pid>.json``.
+    Each copy creates a new snapshot, hardlinking from the previous one
+    the files with the same size and md5, and then replaces the link,
+    so readers never see a partial copy.
+    """
+
+    @classmethod
+    def copy(cls, path, target, is_file=False, **kwargs):
+        log.info('Delta Copy %s to %s', path, target)
+        if is_file:
+            if path != target:
+                cls._copy_file(path, target)
+            return
+
+        start = time.time()
+        target = target.rstrip('/')
+        parent, name = os.path.split(target)
+        safe_makedirs(parent)
+
+        previous = None
+        previous_manifest = {}
+        if os.path.islink(target):
+            previous = os.path.realpath(target)
+            if os.path.exists(previous + '.json'):
+                with open(previous + '.json') as fd:
+                    previous_manifest = json.load(fd)
+
+        manifest = get_manifest(path)
+        snapshot = os.path.join(parent, _get_snapshot_name(name))
+        tmp_link = snapshot + '.tmp'
+        moved = None
+        linked = 0
+        try:
+            for root, __, __ in os.walk(path, followlinks=True):
+                safe_makedirs(os.path.join(snapshot, os.path.relpath(root, path)))
+            for relpath, entry in manifest.items():
+                destination = os.path.join(snapshot, relpath)
+                if previous_manifest.get(relpath) == entry:
+                    try:
+                        os.link(os.path.join(previous, relpath), destination)
+                        linked += 1
+                        continue
+                    except OSError:
+                        # Copy the file if it can't be linked
+                        pass
+                shutil.copy2(os.path.join(path, relpath), destination)
+            with open(snapshot + '.json', 'w') as fd:
+                json.dump(manifest, fd)
+
+            if os.path.isdir(target) and not os.path.islink(target):
+                # A directory copied by another syncer, it's replaced once
+                moved = os.path.join(parent, _get_snapshot_name(name))
+                os.rename(target, moved)
+                previous = moved
+            os.symlink(os.path.basename(snapshot), tmp_link)
+            os.replace(tmp_link, target)
+        except Exception:
+            # Leave the previous copy in place and don't leak the partial snapshot
+            if os.path.lexists(tmp_link):
+                os.unlink(tmp_link)
+            if moved and not os.path.lexists(target):
+                os.rename(moved, target)
+            _remove_snapshot(snapshot)
+            raise
+        if previous:
+            _remove_snapshot(previous)
+
+        log.info(
+            'Delta Copy %s to %s: copied=%s unchanged=%s in %.2fs',
+            path,
+            target,
+            len(manifest) - linked,
+            linked,
+            time.time() - start,
+        )
+
+    @classmethod
+    def _copy_file(cls, path, target):
+        if os.path.exists(target):
+            if get_manifest_entry(target) == get_manifest_entry(path):
+                return
+        safe_makedirs(os.path.dirname(target))
+        tmp_path = os.path.join(
+            os.path.dirname(target),
+            '.{}.{}.tmp'.format(os.path.basename(target), os.getpid()),
+        )
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, target)
+
+
+class RemoteDeltaSyncer(BaseSyncer):
+
+    """
+    Sync to all the ``MULTIPLE_APP_SERVERS`` in parallel, with the snapshots of ``DeltaSyncer``.
+
+    rsync compares the files by checksum with the previous snapshot,
+    hardlinking the unchanged ones instead of transferring them.
+    The time taken and the errors of each server are logged.
+    """
+
+    @classmethod
+    def copy(cls, path, target, is_file=False, **kwargs):
+        servers = settings.MULTIPLE_APP_SERVERS
+        if not servers:
+            return
+        log.info('Remote Delta Copy %s to %s on %s', path, target, servers)
+
+        with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+            futures = {
+                executor.submit(cls._sync, server, path, target, is_file): server
+                for server in servers
+            }
+            for future in as_completed(futures):
+                server = futures[future]
+                try:
+                    elapsed = future.result()
+                    log.info('Synced %s to %s:%s in %.2fs', path, server, target, elapsed)
+                except Exception as e:
+                    log.error('Error syncing %s to %s:%s: %s', path, server, target, e)
+
+    @classmethod
+    def _run(cls, cmd):
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(
+                'Command {} failed with status {}: {}'.format(
+                    ' '.join(cmd),
+                    result.returncode,
+                    result.stderr.decode(errors='replace').strip(),
+                ),
+            )
+
+    @classmethod
+    def _ssh(cls, server, command):
+        cls._run(['ssh', '{}@{}'.format(settings.SYNC_USER, server), command])
+
+    @classmethod
+    def _sync(cls, server, path, target, is_file):
+        """Sync ``path`` to ``target`` on ``server``, returning the seconds taken."""
+        start = time.time()
+        remote = '{}@{}'.format(settings.SYNC_USER, server)
+        target = target.rstrip('/')
+        parent, name = os.path.split(target)
+        cls._ssh(server, 'mkdir -p {}'.format(shlex.quote(parent)))
+
+        if is_file:
+            cls._run([
+                'rsync', '-e', 'ssh -T', '-a', '--checksum',
+                path, '{}:{}'.format(remote, target),
+            ])
+            return time.time() - start
+
+        snapshot = os.path.join(parent, _get_snapshot_name(name))
+        # Unique to the snapshot, concurrent syncs don't share it
+        tmp_link = snapshot + '.tmp'
+        try:
+            cls._run([
+                'rsync', '-e', 'ssh -T', '-a', '--delete', '--checksum',
+                '--link-dest={}/'.format(target),
+                path.rstrip('/') + '/',
+                '{}:{}/'.format(remote, snapshot),
+            ])
+
+            # Point the link to the new snapshot and remove the previous one
+            swap = (
+                'previous=; '
+                'if [ -L {target} ]; then previous=$(readlink -f {target}); '
+                'elif [ -d {target} ]; then previous={old}; mv {target} {old}; fi; '
+                'ln -sfn {snapshot_name} {tmp_link} && mv -Tf {tmp_link} {target} && '
+                'if [ -n "$previous" ]; then rm -rf "$previous" "$previous.json"; fi'
+            ).format(
+                target=shlex.quote(target),
+                old=shlex.quote(os.path.join(parent, _get_snapshot_name(name))),
+                snapshot_name=shlex.quote(os.path.basename(snapshot)),
+                tmp_link=shlex.quote(tmp_link),
+            )
+            cls._ssh(server, swap)
+        except Exception:
+            # Remove the partial snapshot, unless the link already points to it
+            cleanup = (
+                'if [ "$(readlink {target})" != {snapshot_name} ]; then '
+                'rm -rf {snapshot} {tmp_link}; fi'
+            ).format(
+                target=shlex.quote(target),
+                snapshot_name=shlex.quote(os.path.basename(snapshot)),
+                snapshot=shlex.quote(snapshot),
+                tmp_link=shlex.quote(tmp_link),
+            )
+            try:
+                cls._ssh(server, cleanup)
+            except Exception:
+                log.warning('Unable to remove %s from %s', snapshot, server, exc_info=True)
+            raise
+        return time.time() - start
+
+
 class RemoteSyncer(BaseSyncer):
 
     @classmethod
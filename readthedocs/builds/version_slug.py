@@ -19,6 +19,7 @@ slug. This is used since using numbers in tags is too common and appending
 another number would be confusing.
 """
 
+import itertools
 import math
 import re
 import string
@@ -153,22 +154,44 @@ class VersionSlugField(models.CharField):
             current = current % length ** exp
         return '_{suffix}'.format(suffix=suffix)
 
-    def create_slug(self, model_instance):
-        """Generate a unique slug for a model instance."""
-        # pylint: disable=protected-access
-
-        # get fields to populate from and slug field to set
-        slug_field = model_instance._meta.get_field(self.attname)
+    def get_slug_candidates(self, content):
+        """
+        Generate the slugs that can be used for ``content``, in order.
 
-        slug = self.slugify(getattr(model_instance, self._populate_from))
-        count = 0
+        The first one is the slugified ``content``, the others have an
+        increasing suffix appended, see ``uniquifying_suffix``.
+        """
+        slug = self.slugify(content)
 
         # strip slug depending on max_length attribute of the slug field
         # and clean-up
-        slug_len = slug_field.max_length
+        slug_len = self.max_length
         if slug_len:
             slug = slug[:slug_len]
         original_slug = slug
+        if slug:
+            yield slug
+
+        for count in itertools.count():
+            slug = original_slug
+            end = self.uniquifying_suffix(count)
+            end_len = len(end)
+            if slug_len and len(slug) + end_len > slug_len:
+                slug = slug[:slug_len - end_len]
+            yield slug + end
+
+    def _check_slug(self, slug):
+        is_slug_valid = self.test_pattern.match(slug)
+        if not is_slug_valid:
+            raise Exception('Invalid generated slug: {slug}'.format(slug=slug))
+        return slug
+
+    def create_slug(self, model_instance):
+        """Generate a unique slug for a model instance."""
+        # pylint: disable=protected-access
+
+        # get fields to populate from and slug field to set
+        slug_field = model_instance._meta.get_field(self.attname)
 
         # exclude the current model instance from the queryset used in finding
         # the next valid slug
@@ -182,24 +205,28 @@ class VersionSlugField(models.CharField):
             if self.attname in params:
                 for param in params:
                     kwargs[param] = getattr(model_instance, param, None)
-        kwargs[self.attname] = slug
 
-        # increases the number while searching for the next valid slug
-        # depending on the given slug, clean-up
-        while not slug or queryset.filter(**kwargs).exists():
-            slug = original_slug
-            end = self.uniquifying_suffix(count)
-            end_len = len(end)
-            if slug_len and len(slug) + end_len > slug_len:
-                slug = slug[:slug_len - end_len]
-            slug = slug + end
+        # search the next valid slug
+        for slug in self.get_slug_candidates(getattr(model_instance, self._populate_from)):
             kwargs[self.attname] = slug
-            count += 1
+            if not queryset.filter(**kwargs).exists():
+                break
+        return self._check_slug(slug)
 
-        is_slug_valid = self.test_pattern.match(slug)
-        if not is_slug_valid:
-            raise Exception('Invalid generated slug: {slug}'.format(slug=slug))
-        return slug
+    def create_unique_slug(self, content, used_slugs):
+        """
+        Generate a slug for ``content`` not in ``used_slugs``.
+
+        Like ``create_slug``, but the slugs are checked against a set in memory
+        instead of the database, to generate the slugs of many instances
+        before creating them with ``bulk_create``.
+        The generated slug is added to ``used_slugs``.
+        """
+        for slug in self.get_slug_candidates(content):
+            if slug not in used_slugs:
+                break
+        used_slugs.add(slug)
+        return self._check_slug(slug)
 
     def pre_save(self, model_instance, add):
         value = getattr(model_instance, self.attname)
@@ -62,6 +62,7 @@ class BuildTriggerMixin:
         update_docs_task, build = trigger_build(
             project=project,
             version=version,
+            rebuild=True,
         )
         if (update_docs_task, build) == (None, None):
             # Build was skipped
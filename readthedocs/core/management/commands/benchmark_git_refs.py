@@ -0,0 +1,119 @@
+"""
+Measure the time to list the branches and tags of a git repository.
+
+A repository with ``--tags`` tags, half of them annotated, is created in a
+temporary directory and cloned.
+The tags of the clone are listed with GitPython, the way the git backend did
+before, with a single ``git for-each-ref`` and, without the clone,
+fetching only the last commit of the refs into a temporary repository.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import git
+from django.core.management.base import BaseCommand
+
+from readthedocs.projects.models import Project
+from readthedocs.vcs_support.backends.git import Backend
+
+
+GIT = ['git', '-c', 'user.name=Benchmark', '-c', 'user.email=benchmark@example.com']
+
+
+def make_repository(path, count):
+    """Create a repository at ``path`` with a commit and ``count`` tags."""
+    subprocess.check_call(GIT + ['init', '--quiet', path])
+    commands = [
+        'commit refs/heads/master',
+        'mark :1',
+        'committer Benchmark <benchmark@example.com> 0 +0000',
+        'data 7',
+        'Initial',
+    ]
+    for number in range(count):
+        name = 'v{}'.format(number)
+        if number % 2:
+            commands.extend([
+                'tag {}'.format(name),
+                'from :1',
+                'tagger Benchmark <benchmark@example.com> 0 +0000',
+                'data {}'.format(len(name)),
+                name,
+            ])
+        else:
+            commands.extend([
+                'reset refs/tags/{}'.format(name),
+                'from :1',
+                '',
+            ])
+    subprocess.run(
+        GIT + ['fast-import', '--quiet'],
+        cwd=path,
+        input='\n'.join(commands + ['']).encode(),
+        check=True,
+    )
+
+
+class Command(BaseCommand):
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tags',
+            dest='tags',
+            type=int,
+            default=5000,
+            help='Number of tags of the repository',
+        )
+
+    @staticmethod
+    def _get_time(func):
+        start = time.time()
+        result = func()
+        return time.time() - start, result
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            remote = os.path.join(root, 'remote')
+            checkout = os.path.join(root, 'checkout')
+            make_repository(remote, options['tags'])
+            subprocess.check_call(GIT + ['clone', '--quiet', remote, checkout])
+
+            project = Project(slug='benchmark', repo=remote, repo_type='git')
+            backend = Backend(project, 'latest')
+            backend.working_dir = checkout
+
+            def gitpython():
+                repo = git.Repo(checkout)
+                return [(str(tag.commit), str(tag)) for tag in repo.tags]
+
+            def for_each_ref():
+                return [(tag.identifier, tag.verbose_name) for tag in backend.tags]
+
+            def remote_refs():
+                __, tags = backend.get_remote_refs()
+                return [(tag.identifier, tag.verbose_name) for tag in tags]
+
+            results = [
+                ('GitPython', self._get_time(gitpython)),
+                ('git for-each-ref', self._get_time(for_each_ref)),
+                ('remote refs', self._get_time(remote_refs)),
+            ]
+            expected = set(results[0][1][1])
+            for name, (elapsed, tags) in results:
+                self.stdout.write(
+                    '{}: {:.3f}s, {} tags{}'.format(
+                        name,
+                        elapsed,
+                        len(tags),
+                        '' if set(tags) == expected else ' (different tags)',
+                    ),
+                )
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,92 @@
+"""
+Measure the requests per second of ``serve_docs`` for a documentation page.
+
+The page is served with the routing cache invalidated before each request,
+and then with the routing cache.
+The root of the symlinks is also computed the way the requests did before,
+instantiating ``PublicSymlink``, and with ``PublicSymlink.get_project_root``.
+"""
+
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from readthedocs.core.routing import invalidate_routing
+from readthedocs.core.symlink import PublicSymlink
+from readthedocs.core.views.serve import serve_docs
+from readthedocs.projects.models import Project
+
+
+class Command(BaseCommand):
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', type=str, help='Slug of the project')
+        parser.add_argument('--language', dest='language', default=None)
+        parser.add_argument('--version', dest='version', default=None)
+        parser.add_argument('--filename', dest='filename', default='index.html')
+        parser.add_argument(
+            '--requests',
+            dest='requests',
+            type=int,
+            default=1000,
+            help='Number of requests of each run',
+        )
+
+    def _serve(self, options, cached):
+        factory = RequestFactory()
+        for __ in range(options['requests']):
+            if not cached:
+                invalidate_routing()
+            request = factory.get('/')
+            request.user = AnonymousUser()
+            response = serve_docs(
+                request,
+                project_slug=options['project'],
+                lang_slug=options['language'],
+                version_slug=options['version'],
+                filename=options['filename'],
+            )
+            if response.status_code != 200:
+                raise CommandError(
+                    'Unable to serve the page, status code: {}'.format(response.status_code),
+                )
+
+    @staticmethod
+    def _get_rate(func, count):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        return count / elapsed if elapsed else count
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(slug=options['project'])
+        except Project.DoesNotExist:
+            raise CommandError('Project {} does not exist'.format(options['project']))
+        options['language'] = options['language'] or project.language
+        options['version'] = options['version'] or project.get_default_version()
+        count = options['requests']
+
+        def instantiate():
+            for __ in range(count):
+                symlink = PublicSymlink(project)
+                symlink.sanity_check()
+
+        def get_project_root():
+            for __ in range(count):
+                PublicSymlink.get_project_root(project.slug)
+
+        with override_settings(PYTHON_MEDIA=False):
+            rates = [
+                ('serve_docs', self._get_rate(lambda: self._serve(options, False), count)),
+                ('serve_docs, cached', self._get_rate(lambda: self._serve(options, True), count)),
+                ('PublicSymlink(project)', self._get_rate(instantiate, count)),
+                ('PublicSymlink.get_project_root', self._get_rate(get_project_root, count)),
+            ]
+        for name, rate in rates:
+            self.stdout.write('{}: {:.1f}/s'.format(name, rate))
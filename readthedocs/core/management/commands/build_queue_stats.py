@@ -0,0 +1,17 @@
+"""Show the queued builds and the average wait of the builds of each build queue."""
+
+from django.core.management.base import BaseCommand
+
+from readthedocs.builds.scheduling import get_queue_stats
+
+
+class Command(BaseCommand):
+
+    help = __doc__
+
+    def handle(self, *args, **options):
+        for queue, stats in get_queue_stats().items():
+            self.stdout.write(
+                '{queue}: {depth} queued, {started} started, {coalesced} coalesced, '
+                'average wait {average_wait:.1f}s'.format(queue=queue, **stats),
+            )
@@ -0,0 +1,16 @@
+"""Show the locks acquired and timed out, and the average seconds waited and held."""
+
+from django.core.management.base import BaseCommand
+
+from readthedocs.vcs_support.utils import get_lock_stats
+
+
+class Command(BaseCommand):
+
+    help = __doc__
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            '{acquired} acquired, {timeouts} timed out, average wait {average_wait:.3f}s, '
+            'average hold {average_hold:.3f}s'.format(**get_lock_stats()),
+        )
@@ -6,7 +6,7 @@ import logging
 
 from django.core.management.base import BaseCommand
 
-from readthedocs.projects import tasks
+from readthedocs.core.symlink import symlink_projects
 from readthedocs.projects.models import Project
 
 
@@ -23,13 +23,8 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         projects = options['projects']
         if 'all' in projects:
-            pks = Project.objects.values_list('pk', flat=True)
+            queryset = Project.objects.all()
         else:
-            pks = Project.objects.filter(
-                slug__in=projects,
-            ).values_list('pk', flat=True)
-        for proj in pks:
-            try:
-                tasks.symlink_project(project_pk=proj)
-            except Exception:
-                log.exception('Failed symlink management command')
+            queryset = Project.objects.filter(slug__in=projects)
+        changed = symlink_projects(queryset.iterator())
+        log.info('Symlinks synced, %s changed', changed)
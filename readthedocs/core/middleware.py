@@ -3,14 +3,13 @@ import logging
 from django.conf import settings
 from django.contrib.sessions.backends.base import SessionBase
 from django.contrib.sessions.middleware import SessionMiddleware
-from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.http import Http404, HttpResponseBadRequest
 from django.urls.base import set_urlconf
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.translation import ugettext_lazy as _
 from django.shortcuts import render
 
-from readthedocs.projects.models import Domain, Project
+from readthedocs.core.routing import get_domain_project_slug, get_project_route
 
 
 log = logging.getLogger(__name__)
@@ -51,7 +50,7 @@ class SubdomainMiddleware(MiddlewareMixin):
             if not is_www and (  # Support ports during local dev
                     public_domain in host or public_domain in full_host
             ):
-                if not Project.objects.filter(slug=subdomain).exists():
+                if get_project_route(subdomain) is None:
                     raise Http404(_('Project not found'))
                 request.subdomain = True
                 request.slug = subdomain
@@ -66,21 +65,18 @@ class SubdomainMiddleware(MiddlewareMixin):
             'testserver' not in host
         ):
             request.cname = True
-            domains = Domain.objects.filter(domain=host)
-            if domains.count():
-                for domain in domains:
-                    if domain.domain == host:
-                        request.slug = domain.project.slug
-                        request.urlconf = settings.SUBDOMAIN_URLCONF
-                        request.domain_object = True
-                        log.debug(
-                            LOG_TEMPLATE,
-                            dict(
-                                {'msg': 'Domain Object Detected: %s' % 'domain'},
-                                **log_kwargs
-                            )
-                        )
-                        break
+            domain_slug = get_domain_project_slug(host)
+            if domain_slug:
+                request.slug = domain_slug
+                request.urlconf = settings.SUBDOMAIN_URLCONF
+                request.domain_object = True
+                log.debug(
+                    LOG_TEMPLATE,
+                    dict(
+                        {'msg': 'Domain Object Detected: %s' % 'domain'},
+                        **log_kwargs
+                    )
+                )
             if (
                 not hasattr(request, 'domain_object') and
                 'HTTP_X_RTD_SLUG' in request.META
@@ -164,13 +160,12 @@ class SingleVersionMiddleware(MiddlewareMixin):
     def process_request(self, request):
         slug = self._get_slug(request)
         if slug:
-            try:
-                proj = Project.objects.get(slug=slug)
-            except (ObjectDoesNotExist, MultipleObjectsReturned):
+            route = get_project_route(slug)
+            if route is None:
                 # Let 404 be handled further up stack.
                 return None
 
-            if getattr(proj, 'single_version', False):
+            if route['single_version']:
                 request.urlconf = settings.SINGLE_VERSION_URLCONF
                 # Logging
                 host = request.get_host()
@@ -0,0 +1,102 @@
+"""
+Cache of the data used to route the requests of the documentation.
+
+Each documentation request needs the project of its host, the
+``single_version`` flag of the project and, for the requested language and
+version, the privacy level and the root of the files to serve.
+They are cached for ``ROUTING_CACHE_TIMEOUT`` seconds, so a cached request
+doesn't access the database before serving the file.
+
+The cache keys contain a generation number, incremented by
+``invalidate_routing`` when a Project, Version, Domain or relationship changes.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+log = logging.getLogger(__name__)
+
+GENERATION_KEY = 'routing:generation'
+
+# Cached in place of a missing project, to tell it apart from a cache miss
+MISSING = ''
+
+
+def _get_cache_key(*parts):
+    return 'routing:{}:{}'.format(
+        cache.get(GENERATION_KEY, 0),
+        ':'.join(str(part) for part in parts),
+    )
+
+
+def get_domain_project_slug(host):
+    """Return the slug of the project using ``host`` as domain, ``None`` if there isn't one."""
+    from readthedocs.projects.models import Domain
+
+    key = _get_cache_key('domain', host)
+    slug = cache.get(key)
+    if slug is None:
+        slug = MISSING
+        for domain in Domain.objects.filter(domain=host).select_related('project'):
+            if domain.domain == host:
+                slug = domain.project.slug
+                break
+        cache.set(key, slug, settings.ROUTING_CACHE_TIMEOUT)
+    return slug or None
+
+
+def get_project_route(slug):
+    """
+    Return the routing data of the project with ``slug``, ``None`` if it doesn't exist.
+
+    The data is a dictionary with the ``slug`` and ``single_version`` of the project.
+    """
+    from readthedocs.projects.models import Project
+
+    key = _get_cache_key('project', slug)
+    route = cache.get(key)
+    if route is None:
+        project = (
+            Project.objects
+            .filter(slug=slug)
+            .values('slug', 'single_version')
+            .first()
+        )
+        route = project or MISSING
+        cache.set(key, route, settings.ROUTING_CACHE_TIMEOUT)
+    return route or None
+
+
+def get_docs_route(project_slug, subproject_slug, lang_slug, version_slug):
+    """
+    Return the cached route of a documentation request, ``None`` if it isn't cached.
+
+    The route is a dictionary with the ``privacy_level`` of the version,
+    the ``path`` of the version relative to ``basepath``, to be joined
+    with the requested filename, and the ``basepath`` to serve the files from.
+    """
+    return cache.get(
+        _get_cache_key('docs', project_slug, subproject_slug, lang_slug, version_slug),
+    )
+
+
+def set_docs_route(project_slug, subproject_slug, lang_slug, version_slug, route):
+    cache.set(
+        _get_cache_key('docs', project_slug, subproject_slug, lang_slug, version_slug),
+        route,
+        settings.ROUTING_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_routing():
+    """Invalidate all the cached routes."""
+    try:
+        generation = cache.incr(GENERATION_KEY)
+    except ValueError:
+        # The key is missing
+        generation = 1
+        cache.set(GENERATION_KEY, generation, None)
+    log.debug('Routing cache invalidated, generation: %s', generation)
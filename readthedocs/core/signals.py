@@ -8,12 +8,14 @@ from urllib.parse import urlparse
 from corsheaders import signals
 from django.conf import settings
 from django.db.models import Count, Q
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import Signal, receiver
 from rest_framework.permissions import SAFE_METHODS
 
+from readthedocs.builds.models import Version
+from readthedocs.core.routing import invalidate_routing
 from readthedocs.oauth.models import RemoteOrganization
-from readthedocs.projects.models import Domain, Project
+from readthedocs.projects.models import Domain, Project, ProjectRelationship
 
 
 log = logging.getLogger(__name__)
@@ -107,4 +109,17 @@ def delete_projects_and_organizations(sender, instance, *args, **kwargs):
     oauth_organizations.delete()
 
 
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+@receiver(post_save, sender=ProjectRelationship)
+@receiver(post_delete, sender=ProjectRelationship)
+def invalidate_routing_cache(sender, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate the cached routes of the documentation requests."""
+    invalidate_routing()
+
+
 signals.check_request_enabled.connect(decide_if_cors)
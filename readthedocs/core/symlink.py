@@ -64,7 +64,6 @@ from django.conf import settings
 from readthedocs.builds.models import Version
 from readthedocs.core.utils import safe_makedirs, safe_unlink
 from readthedocs.core.utils.extend import SettingsOverrideObject
-from readthedocs.doc_builder.environments import LocalEnvironment
 from readthedocs.projects import constants
 from readthedocs.projects.models import Domain
 
@@ -78,22 +77,29 @@ class Symlink:
 
     def __init__(self, project):
         self.project = project
-        self.project_root = os.path.join(
-            self.WEB_ROOT,
-            project.slug,
-        )
+        self.project_root = self.get_project_root(project.slug)
         self.subproject_root = os.path.join(
             self.project_root,
             'projects',
         )
-        self.environment = LocalEnvironment(project)
-        self.sanity_check()
+        # Number of links created, replaced or removed
+        self.changed = 0
+
+    @classmethod
+    def get_project_root(cls, project_slug):
+        """
+        Return the path of the symlinks of a project.
+
+        This doesn't access the filesystem, so it can be used to serve the files.
+        """
+        return os.path.join(cls.WEB_ROOT, project_slug)
 
     def sanity_check(self):
         """
         Make sure the project_root is the proper structure before continuing.
 
-        This will leave it in the proper state for the single_project setting.
+        This will leave it in the proper state for the single_project setting,
+        it's called by the symlink tasks before changing the symlinks.
         """
         if os.path.islink(self.project_root) and not self.project.single_version:
             log.info(
@@ -119,6 +125,62 @@ class Symlink:
         if not os.path.lexists(self.PROJECT_CNAME_ROOT):
             safe_makedirs(self.PROJECT_CNAME_ROOT)
 
+    def _symlink(self, target, link):
+        """
+        Point ``link`` to ``target``, replacing the current ``link`` atomically.
+
+        The link is created with a temporary name and renamed over ``link``,
+        nothing is done if ``link`` already points to ``target``.
+
+        :returns: whether the link was changed
+        """
+        if os.path.islink(link):
+            if os.readlink(link) == target:
+                return False
+        elif os.path.isdir(link):
+            # A directory can't be replaced by a link
+            shutil.rmtree(link)
+
+        tmp_link = os.path.join(
+            os.path.dirname(link),
+            '.{}.{}.tmp'.format(os.path.basename(link), os.getpid()),
+        )
+        try:
+            if os.path.lexists(tmp_link):
+                os.unlink(tmp_link)
+            os.symlink(target, tmp_link)
+            os.replace(tmp_link, link)
+        except OSError:
+            log.exception('Could not symlink path: %s -> %s', link, target)
+            return False
+        self.changed += 1
+        return True
+
+    def _remove(self, path):
+        """Remove the link or the directory ``path``."""
+        if os.path.islink(path) or not os.path.isdir(path):
+            safe_unlink(path)
+        else:
+            shutil.rmtree(path)
+        self.changed += 1
+
+    def _sync_links(self, directory, links, keep=()):
+        """
+        Make the links of ``directory`` match ``links``.
+
+        Only the links missing or pointing to a different target are written,
+        the entries of ``directory`` not in ``links`` or ``keep`` are removed.
+
+        :param links: mapping of link names to their targets
+        """
+        for name, target in links.items():
+            self._symlink(target, os.path.join(directory, name))
+
+        if os.path.exists(directory):
+            for name in os.listdir(directory):
+                if name not in links and name not in keep:
+                    self._remove(os.path.join(directory, name))
+
     def run(self):
         """
         Create proper symlinks in the right order.
@@ -126,6 +188,8 @@ class Symlink:
         Since we have a small nest of directories and symlinks, the ordering of
         these calls matter, so we provide this helper to make life easier.
         """
+        self.sanity_check()
+
         # Outside of the web root
         self.symlink_cnames()
 
@@ -138,6 +202,15 @@ class Symlink:
             self.symlink_subprojects()
             self.symlink_versions()
 
+        log.debug(
+            constants.LOG_TEMPLATE,
+            {
+                'project': self.project.slug,
+                'version': '',
+                'msg': 'Symlinks synced, {} changed'.format(self.changed),
+            }
+        )
+
     def symlink_cnames(self, domain=None):
         """
         Symlink project CNAME domains.
@@ -169,19 +242,14 @@ class Symlink:
             )
             # CNAME to doc root
             symlink = os.path.join(self.CNAME_ROOT, dom)
-            self.environment.run('ln', '-nsf', self.project_root, symlink)
+            self._symlink(self.project_root, symlink)
 
             # Project symlink
             project_cname_symlink = os.path.join(
                 self.PROJECT_CNAME_ROOT,
                 dom,
             )
-            self.environment.run(
-                'ln',
-                '-nsf',
-                self.project.doc_path,
-                project_cname_symlink,
-            )
+            self._symlink(self.project.doc_path, project_cname_symlink)
 
     def remove_symlink_cname(self, domain):
         """
@@ -208,9 +276,9 @@ class Symlink:
 
         Link from $WEB_ROOT/projects/<project> ->           $WEB_ROOT/<project>
         """
-        subprojects = set()
-        rels = self.get_subprojects()
-        if rels.count():
+        subprojects = {}
+        rels = list(self.get_subprojects().select_related('child'))
+        if rels:
             # Don't create the `projects/` directory unless subprojects exist.
             if not os.path.exists(self.subproject_root):
                 safe_makedirs(self.subproject_root)
@@ -218,10 +286,8 @@ class Symlink:
             # A mapping of slugs for the subproject URL to the actual built
             # documentation
             from_to = OrderedDict({rel.child.slug: rel.child.slug})
-            subprojects.add(rel.child.slug)
             if rel.alias:
                 from_to[rel.alias] = rel.child.slug
-                subprojects.add(rel.alias)
             for from_slug, to_slug in list(from_to.items()):
                 log_msg = 'Symlinking subproject: {} -> {}'.format(
                     from_slug,
@@ -235,30 +301,10 @@ class Symlink:
                         'msg': log_msg,
                     }
                 )
-                symlink = os.path.join(self.subproject_root, from_slug)
-                docs_dir = os.path.join(
-                    self.WEB_ROOT,
-                    to_slug,
-                )
-                symlink_dir = os.sep.join(symlink.split(os.path.sep)[:-1])
-                if not os.path.lexists(symlink_dir):
-                    safe_makedirs(symlink_dir)
-                # TODO this should use os.symlink, not a call to shell. For now,
-                # this passes command as a list to be explicit about escaping
-                # characters like spaces.
-                result = self.environment.run('ln', '-nsf', docs_dir, symlink)
-                if result.exit_code > 0:
-                    log.error(
-                        'Could not symlink path: status=%d error=%s',
-                        result.exit_code,
-                        result.error,
-                    )
-
-        # Remove old symlinks
-        if os.path.exists(self.subproject_root):
-            for subproj in os.listdir(self.subproject_root):
-                if subproj not in subprojects:
-                    safe_unlink(os.path.join(self.subproject_root, subproj))
+                subprojects[from_slug] = os.path.join(self.WEB_ROOT, to_slug)
+
+        # Link the subprojects and remove the old ones
+        self._sync_links(self.subproject_root, subprojects)
 
     def symlink_translations(self):
         """
@@ -279,7 +325,11 @@ class Symlink:
         if not os.path.lexists(language_dir):
             safe_makedirs(language_dir)
 
+        links = {}
         for (language, slug) in list(translations.items()):
+            if language == self.project.language:
+                # The language directory is kept for the versions
+                continue
 
             log_msg = 'Symlinking translation: {}->{}'.format(language, slug)
             log.debug(
@@ -290,19 +340,14 @@ class Symlink:
                     'msg': log_msg,
                 }
             )
-            symlink = os.path.join(self.project_root, language)
-            docs_dir = os.path.join(self.WEB_ROOT, slug, language)
-            self.environment.run('ln', '-nsf', docs_dir, symlink)
-
-        # Remove old symlinks
-        for lang in os.listdir(self.project_root):
-            if (lang not in translations and
-                    lang not in ['projects', self.project.language]):
-                to_delete = os.path.join(self.project_root, lang)
-                if os.path.islink(to_delete):
-                    safe_unlink(to_delete)
-                else:
-                    shutil.rmtree(to_delete)
+            links[language] = os.path.join(self.WEB_ROOT, slug, language)
+
+        # Link the translations and remove the old ones
+        self._sync_links(
+            self.project_root,
+            links,
+            keep=['projects', self.project.language],
+        )
 
     def symlink_single_version(self):
         """
@@ -314,14 +359,7 @@ class Symlink:
         """
         version = self.get_default_version()
 
-        # Clean up symlinks
         symlink = self.project_root
-        if os.path.islink(symlink):
-            safe_unlink(symlink)
-        elif os.path.exists(symlink):
-            shutil.rmtree(symlink)
-
-        # Create symlink
         if version is not None:
             docs_dir = os.path.join(
                 settings.DOCROOT,
@@ -329,7 +367,9 @@ class Symlink:
                 'rtd-builds',
                 version.slug,
             )
-            self.environment.run('ln', '-nsf', docs_dir, symlink)
+            self._symlink(docs_dir, symlink)
+        elif os.path.lexists(symlink):
+            self._remove(symlink)
 
     def symlink_versions(self):
         """
@@ -338,7 +378,7 @@ class Symlink:
         Link from $WEB_ROOT/<project>/<language>/<version>/ ->
         HOME/user_builds/<project>/rtd-builds/<version>
         """
-        versions = set()
+        versions = {}
         version_dir = os.path.join(
             self.WEB_ROOT,
             self.project.slug,
@@ -346,8 +386,8 @@ class Symlink:
         )
         # Include active public versions,
         # as well as public versions that are built but not active, for archived versions
-        version_queryset = self.get_version_queryset()
-        if version_queryset.count():
+        version_queryset = list(self.get_version_queryset())
+        if version_queryset:
             if not os.path.exists(version_dir):
                 safe_makedirs(version_dir)
         for version in version_queryset:
@@ -360,21 +400,15 @@ class Symlink:
                     'msg': log_msg,
                 }
             )
-            symlink = os.path.join(version_dir, version.slug)
-            docs_dir = os.path.join(
+            versions[version.slug] = os.path.join(
                 settings.DOCROOT,
                 self.project.slug,
                 'rtd-builds',
                 version.slug,
             )
-            self.environment.run('ln', '-nsf', docs_dir, symlink)
-            versions.add(version.slug)
 
-        # Remove old symlinks
-        if os.path.exists(version_dir):
-            for old_ver in os.listdir(version_dir):
-                if old_ver not in versions:
-                    safe_unlink(os.path.join(version_dir, old_ver))
+        # Link the versions and remove the old ones
+        self._sync_links(version_dir, versions)
 
     def get_default_version(self):
         """Look up project default version, return None if not found."""
@@ -439,3 +473,24 @@ class PublicSymlink(SettingsOverrideObject):
 class PrivateSymlink(SettingsOverrideObject):
 
     _default_class = PrivateSymlinkBase
+
+
+def symlink_projects(projects):
+    """
+    Sync the public and private symlinks of ``projects`` in one pass.
+
+    Used to resync many projects in this process, instead of running
+    a ``symlink_project`` task for each one.
+
+    :returns: the number of links created, replaced or removed
+    """
+    changed = 0
+    for project in projects:
+        for symlink_class in [PublicSymlink, PrivateSymlink]:
+            symlink = symlink_class(project)
+            try:
+                symlink.run()
+            except Exception:
+                log.exception('Unable to symlink project: %s', project.slug)
+            changed += symlink.changed
+    return changed
@@ -7,6 +7,7 @@ import re
 
 from celery import chord, group
 from django.conf import settings
+from django.db import transaction
 from django.utils.functional import keep_lazy
 from django.utils.safestring import SafeText, mark_safe
 from django.utils.text import slugify as slugify_base
@@ -64,6 +65,8 @@ def prepare_build(
         record=True,
         force=False,
         immutable=True,
+        rebuild=False,
+        coalesce=False,
 ):
     """
     Prepare a build in a Celery task for project and version.
@@ -71,17 +74,23 @@ def prepare_build(
     If project has a ``build_queue``, execute the task on this build queue. If
     project has ``skip=True``, the build is not triggered.
 
+    With ``coalesce``, if the version has a build waiting in the queue,
+    it's updated with ``commit`` and returned without a new task.
+
     :param project: project's documentation to be built
     :param version: version of the project to be built. Default: ``project.get_default_version()``
     :param commit: commit sha of the version required for sending build status reports
     :param record: whether or not record the build in a new Build object
     :param force: build the HTML documentation even if the files haven't changed
     :param immutable: whether or not create an immutable Celery signature
+    :param rebuild: build the version even if nothing changed since its last successful build
+    :param coalesce: whether or not merge the build with the queued build of the version
     :returns: Celery signature of update_docs_task and Build instance
     :rtype: tuple
     """
     # Avoid circular import
-    from readthedocs.builds.models import Build
+    from readthedocs.builds import scheduling
+    from readthedocs.builds.models import Build, Version
     from readthedocs.projects.models import Project
     from readthedocs.projects.tasks import (
         update_docs_task,
@@ -105,8 +114,21 @@ def prepare_build(
         'record': record,
         'force': force,
         'commit': commit,
+        'rebuild': rebuild,
     }
 
+    if record and coalesce:
+        # Lock the version, so the builds triggered together are serialized
+        list(Version.objects.select_for_update().filter(pk=version.pk).values_list('pk'))
+        queued_build = scheduling.get_queued_build(version)
+        if queued_build is not None and scheduling.coalesce_build(queued_build, commit):
+            if commit:
+                send_external_build_status(
+                    version_type=version.type, build_pk=queued_build.pk,
+                    commit=commit, status=BUILD_STATUS_PENDING
+                )
+            return (None, queued_build)
+
     if record:
         build = Build.objects.create(
             project=project,
@@ -153,33 +175,47 @@ def prepare_build(
     )
 
 
-def trigger_build(project, version=None, commit=None, record=True, force=False):
+def trigger_build(
+        project,
+        version=None,
+        commit=None,
+        record=True,
+        force=False,
+        rebuild=False,
+):
     """
     Trigger a Build.
 
     Helper that calls ``prepare_build`` and just effectively trigger the Celery
     task to be executed by a worker.
+    The build is coalesced with the build of the version waiting in the queue,
+    if there is one, unless ``rebuild`` is requested.
 
     :param project: project's documentation to be built
     :param version: version of the project to be built. Default: ``latest``
     :param commit: commit sha of the version required for sending build status reports
     :param record: whether or not record the build in a new Build object
     :param force: build the HTML documentation even if the files haven't changed
-    :returns: Celery AsyncResult promise and Build instance
+    :param rebuild: build the version even if nothing changed since its last successful build
+    :returns: Celery AsyncResult promise and Build instance,
+        the promise is ``None`` if the build was coalesced
     :rtype: tuple
     """
-    update_docs_task, build = prepare_build(
-        project,
-        version,
-        commit,
-        record,
-        force,
-        immutable=True,
-    )
+    with transaction.atomic():
+        update_docs_task, build = prepare_build(
+            project,
+            version,
+            commit,
+            record,
+            force,
+            immutable=True,
+            rebuild=rebuild,
+            coalesce=not rebuild,
+        )
 
-    if (update_docs_task, build) == (None, None):
-        # Build was skipped
-        return (None, None)
+    if update_docs_task is None:
+        # Build was skipped or coalesced
+        return (None, build)
 
     return (update_docs_task.apply_async(), build)
 
@@ -255,3 +291,24 @@ def safe_unlink(path):
         os.unlink(path)
     except FileNotFoundError:
         log.warning('Unlink failed. Path %s does not exists', path)
+
+
+def chunked(iterable, size):
+    """
+    Split ``iterable`` into lists of at most ``size`` elements.
+
+    Used to keep bulk queries (``bulk_create``, ``pk__in`` filters, etc)
+    bounded in size when working with a large number of objects.
+
+    :param iterable: any iterable, it's consumed lazily
+    :param size: maximum length of each chunk
+    :rtype: generator of lists
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
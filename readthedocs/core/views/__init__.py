@@ -165,10 +165,10 @@ def server_error_404_subdomain(request, template_name='404.html'):
             not version and project.privacy_level == PRIVATE,
         ])
         if private:
-            symlink = PrivateSymlink(project)
+            symlink = PrivateSymlink
         else:
-            symlink = PublicSymlink(project)
-        basepath = symlink.project_root
+            symlink = PublicSymlink
+        basepath = symlink.get_project_root(project.slug)
         fullpath = os.path.join(basepath, filename)
         return (basepath, filename, fullpath)
 
@@ -42,6 +42,7 @@ from readthedocs.builds.constants import LATEST, STABLE
 from readthedocs.builds.models import Version
 from readthedocs.core.permissions import AdminPermission
 from readthedocs.core.resolver import resolve, resolve_path
+from readthedocs.core.routing import get_docs_route, set_docs_route
 from readthedocs.core.symlink import PrivateSymlink, PublicSymlink
 from readthedocs.docsitalia.utils import get_real_version_slug
 from readthedocs.projects import constants
@@ -206,17 +207,69 @@ def _serve_file(request, filename, basepath):
     return response
 
 
+def serve_docs(
+        request,
+        project_slug=None,
+        subproject_slug=None,
+        lang_slug=None,
+        version_slug=None,
+        filename='',
+        **kwargs
+):
+    """
+    Map existing proj, lang, version, filename views to the file format.
+
+    Public versions are served from their cached route when there is one,
+    without accessing the database.
+    """
+    route_key = None
+    if 'project' not in kwargs and 'subproject' not in kwargs:
+        route_key = (
+            project_slug or getattr(request, 'slug', None),
+            subproject_slug,
+            lang_slug,
+            version_slug,
+        )
+        route = get_docs_route(*route_key)
+        if route is not None:
+            filename = _get_index_filename(route['path'] + filename.lstrip('/'))
+            log.info('Serving %s for %s', filename, route_key[0])
+            if os.path.exists(os.path.join(route['basepath'], filename)):
+                return _serve_file(request, filename, route['basepath'])
+            raise Http404(
+                'File not found. Tried these files: {}'.format(
+                    os.path.join(route['basepath'], filename),
+                ),
+            )
+
+    return _serve_docs(
+        request,
+        project_slug=project_slug,
+        subproject_slug=subproject_slug,
+        lang_slug=lang_slug,
+        version_slug=version_slug,
+        filename=filename,
+        route_key=route_key,
+        **kwargs
+    )
+
+
 @map_project_slug
 @map_subproject_slug
-def serve_docs(
+def _serve_docs(
         request,
         project,
         subproject,
         lang_slug=None,
         version_slug=None,
         filename='',
+        route_key=None,
 ):
-    """Map existing proj, lang, version, filename views to the file format."""
+    """
+    Serve the documentation, looking up the version and the path of the file.
+
+    :param route_key: when given, the route of a public version is cached with this key
+    """
     if not version_slug:
         version_slug = project.get_default_version()
     else:
@@ -235,27 +288,32 @@ def serve_docs(
         if project.versions.filter(slug=version_slug, active=True).exists():
             return _serve_401(request, project)
         raise Http404('Version does not exist.')
-    filename = resolve_path(
+    path = resolve_path(
         subproject or project,  # Resolve the subproject if it exists
         version_slug=version_slug,
         language=lang_slug,
-        filename=filename,
         subdomain=True,  # subdomain will make it a "full" path without a URL prefix
     )
     if (version.privacy_level == constants.PRIVATE and
             not AdminPermission.is_member(user=request.user, obj=project)):
         return _serve_401(request, project)
+    if (route_key and version.privacy_level == constants.PUBLIC and
+            (settings.DEBUG or constants.PUBLIC in settings.SERVE_DOCS)):
+        set_docs_route(*route_key, route={
+            'privacy_level': version.privacy_level,
+            'path': path,
+            'basepath': PublicSymlink.get_project_root(project.slug),
+        })
     return _serve_symlink_docs(
         request,
-        filename=filename,
+        filename=path + filename.lstrip('/'),
         project=project,
         privacy_level=version.privacy_level,
     )
 
 
-@map_project_slug
-def _serve_symlink_docs(request, project, privacy_level, filename=''):
-    """Serve a file by symlink, or a 404 if not found."""
+def _get_index_filename(filename):
+    """Return the path of ``filename`` relative to the root, with the index of directories."""
     # Handle indexes
     if filename == '' or filename[-1] == '/':
         filename += 'index.html'
@@ -263,14 +321,20 @@ def _serve_symlink_docs(request, project, privacy_level, filename=''):
     # This breaks path joining, by ignoring the root when given an "absolute" path
     if filename[0] == '/':
         filename = filename[1:]
+    return filename
+
+
+@map_project_slug
+def _serve_symlink_docs(request, project, privacy_level, filename=''):
+    """Serve a file by symlink, or a 404 if not found."""
+    filename = _get_index_filename(filename)
 
     log.info('Serving %s for %s', filename, project)
 
     files_tried = []
 
     if (settings.DEBUG or constants.PUBLIC in settings.SERVE_DOCS) and privacy_level != constants.PRIVATE:  # yapf: disable  # noqa
-        public_symlink = PublicSymlink(project)
-        basepath = public_symlink.project_root
+        basepath = PublicSymlink.get_project_root(project.slug)
         if os.path.exists(os.path.join(basepath, filename)):
             return _serve_file(request, filename, basepath)
 
@@ -278,8 +342,7 @@ def _serve_symlink_docs(request, project, privacy_level, filename=''):
 
     if (settings.DEBUG or constants.PRIVATE in settings.SERVE_DOCS) and privacy_level == constants.PRIVATE:  # yapf: disable  # noqa
         # Handle private
-        private_symlink = PrivateSymlink(project)
-        basepath = private_symlink.project_root
+        basepath = PrivateSymlink.get_project_root(project.slug)
 
         if os.path.exists(os.path.join(basepath, filename)):
             return _serve_file(request, filename, basepath)
@@ -328,7 +391,7 @@ def robots_txt(request, project):
     if filename[0] == '/':
         filename = filename[1:]
 
-    basepath = PublicSymlink(project).project_root
+    basepath = PublicSymlink.get_project_root(project.slug)
     fullpath = os.path.join(basepath, filename)
 
     if os.path.exists(fullpath):
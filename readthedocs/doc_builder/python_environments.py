@@ -25,6 +25,20 @@ from readthedocs.projects.models import Feature
 log = logging.getLogger(__name__)
 
 
+def get_env_vars_hash(project):
+    """
+    Returns the sha256 hash of all the environment variables and their values.
+
+    If there are no environment variables configured for ``project``,
+    it returns sha256 hash of empty string.
+    """
+    m = hashlib.sha256()
+    for variable, value in project.environment_variables.items():
+        hash_str = f'_{variable}_{value}_'
+        m.update(hash_str.encode('utf-8'))
+    return m.hexdigest()
+
+
 class PythonEnvironment:
 
     """An isolated environment into which Python packages can be installed."""
@@ -227,18 +241,7 @@ class PythonEnvironment:
         ])
 
     def _get_env_vars_hash(self):
-        """
-        Returns the sha256 hash of all the environment variables and their values.
-
-        If there are no environment variables configured for the associated project,
-        it returns sha256 hash of empty string.
-        """
-        m = hashlib.sha256()
-        env_vars = self.version.project.environment_variables
-        for variable, value in env_vars.items():
-            hash_str = f'_{variable}_{value}_'
-            m.update(hash_str.encode('utf-8'))
-        return m.hexdigest()
+        return get_env_vars_hash(self.version.project)
 
     def save_environment_json(self):
         """
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_published_documents(apps, schema_editor):
+    Build = apps.get_model('builds', 'Build')
+    ProjectOrder = apps.get_model('docsitalia', 'ProjectOrder')
+    PublishedDocument = apps.get_model('docsitalia', 'PublishedDocument')
+    PublisherProject = apps.get_model('docsitalia', 'PublisherProject')
+
+    projects_with_builds = Build.objects.filter(
+        success=True,
+        state='finished',
+        version__active=True,
+        version__privacy_level='public',
+    ).values_list('project', flat=True)
+    published = PublisherProject.projects.through.objects.filter(
+        publisherproject__active=True,
+        publisherproject__publisher__active=True,
+        project__in=projects_with_builds,
+    ).values_list('project', 'publisherproject').distinct()
+    priorities = dict(ProjectOrder.objects.values_list('project', 'priority'))
+    PublishedDocument.objects.bulk_create([
+        PublishedDocument(
+            project_id=project_pk,
+            publisher_project_id=publisher_project_pk,
+            priority=priorities.get(project_pk, 0),
+        )
+        for project_pk, publisher_project_pk in published
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0010_add-description-field-to-automation-rule'),
+        ('projects', '0044_auto_20190703_1300'),
+        ('docsitalia', '0020_auto_20191205_1302'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublishedDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.PositiveIntegerField(db_index=True, default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='published_documents', to='projects.Project')),
+                ('publisher_project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='published_documents', to='docsitalia.PublisherProject')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='publisheddocument',
+            unique_together=set([('project', 'publisher_project')]),
+        ),
+        migrations.RunPython(create_published_documents, migrations.RunPython.noop),
+    ]
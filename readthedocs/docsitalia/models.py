@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 """Models for the docsitalia app."""
 
-from django.db import models
+import logging
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
 from django.contrib.postgres.fields import JSONField
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
@@ -19,6 +23,11 @@ from .utils import get_projects_with_builds
 from .monkeypatch import monkey_patch_project_model  # NOQA
 
 
+log = logging.getLogger(__name__)
+
+PUBLISHED_DOCUMENTS_VERSION_KEY = 'docsitalia:published_documents:version'
+
+
 def update_project_from_metadata(project, metadata):
     """Update a project instance with the validated  project metadata."""
     document = metadata['document']
@@ -343,3 +352,135 @@ class ProjectOrder(models.Model):
 
     def __str__(self):
         return self.project.name
+
+
+class PublishedDocument(models.Model):
+
+    """
+    A document (Project) shown in the portal, with one of its publisher projects.
+
+    Documents are published when they have a successful public build and
+    their publisher project and publisher are active.
+    The rows are kept updated by :py:func:`refresh_published_documents`,
+    so the portal pages don't need to compute them from the builds.
+    """
+
+    project = models.ForeignKey(
+        Project,
+        related_name='published_documents',
+        on_delete=models.CASCADE,
+    )
+    publisher_project = models.ForeignKey(
+        PublisherProject,
+        related_name='published_documents',
+        on_delete=models.CASCADE,
+    )
+    # priority of the project in its ProjectOrder, used by the homepage
+    priority = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        unique_together = [('project', 'publisher_project')]
+
+    def __str__(self):
+        return '{} ({})'.format(self.project, self.publisher_project)
+
+
+def get_published_documents_version():
+    """Version of the published documents, used in the keys of the cached fragments."""
+    return cache.get(PUBLISHED_DOCUMENTS_VERSION_KEY, 0)
+
+
+def invalidate_published_documents():
+    """Invalidate the cached fragments showing the published documents."""
+    try:
+        cache.incr(PUBLISHED_DOCUMENTS_VERSION_KEY)
+    except ValueError:
+        # The key is missing
+        cache.set(PUBLISHED_DOCUMENTS_VERSION_KEY, 1, None)
+
+
+def _get_priorities(projects=None):
+    """Return the priority of the projects with a ProjectOrder."""
+    orders = ProjectOrder.objects.all()
+    if projects is not None:
+        orders = orders.filter(project__in=projects)
+    return dict(orders.values_list('project', 'priority'))
+
+
+def refresh_published_documents(projects=None):
+    """
+    Update the published documents and invalidate the fragments showing them.
+
+    :param projects: pks of the projects whose documents are updated,
+        all of them if None
+    """
+    active_pub_projects = PublisherProject.objects.filter(
+        active=True,
+        publisher__active=True
+    )
+    projects_with_builds = get_projects_with_builds()
+    documents = PublishedDocument.objects.all()
+    if projects is not None:
+        projects = list(projects)
+        if not projects:
+            return
+        projects_with_builds = projects_with_builds.filter(pk__in=projects)
+        documents = documents.filter(project__in=projects)
+    published = set(
+        PublisherProject.projects.through.objects.filter(
+            publisherproject__in=active_pub_projects,
+            project__in=projects_with_builds,
+        ).values_list('project', 'publisherproject')
+    )
+    priorities = _get_priorities(projects)
+    existing = {
+        (project_pk, publisher_project_pk): (pk, priority)
+        for pk, project_pk, publisher_project_pk, priority in (
+            documents.values_list(
+                'pk', 'project', 'publisher_project', 'priority',
+            )
+        )
+    }
+    # pks of the documents to update, by their new priority
+    changed = defaultdict(list)
+    for (project_pk, publisher_project_pk), (pk, priority) in existing.items():
+        if (project_pk, publisher_project_pk) in published and \
+                priority != priorities.get(project_pk, 0):
+            changed[priorities.get(project_pk, 0)].append(pk)
+
+    try:
+        with transaction.atomic():
+            PublishedDocument.objects.filter(pk__in=[
+                pk for key, (pk, __) in existing.items() if key not in published
+            ]).delete()
+            PublishedDocument.objects.bulk_create([
+                PublishedDocument(
+                    project_id=project_pk,
+                    publisher_project_id=publisher_project_pk,
+                    priority=priorities.get(project_pk, 0),
+                )
+                for project_pk, publisher_project_pk in published
+                if (project_pk, publisher_project_pk) not in existing
+            ])
+            for priority, pks in changed.items():
+                PublishedDocument.objects.filter(pk__in=pks).update(priority=priority)
+    except IntegrityError:
+        # Another process refreshed them at the same time
+        log.warning('Unable to refresh the published documents', exc_info=True)
+
+    invalidate_published_documents()
+
+
+def refresh_published_documents_priority(project_pk, priority=0):
+    """
+    Update the priority of the published documents of a project after its ProjectOrder changes.
+
+    Unlike :py:func:`refresh_published_documents`, the builds aren't checked.
+    """
+    updated = PublishedDocument.objects.filter(
+        project=project_pk,
+    ).exclude(
+        priority=priority,
+    ).update(priority=priority)
+    if updated:
+        invalidate_published_documents()
@@ -1,8 +1,282 @@
 """Override RTD URL resolver."""
 
+import time
+from urllib.parse import urlunparse
+
 from django.conf import settings
+from django.core.cache import cache
 
+from readthedocs.builds.constants import LATEST
 from readthedocs.core.resolver import ResolverBase
+from readthedocs.projects.constants import PRIVATE
+
+
+GENERATION_KEY = 'docsitalia:resolver:generation'
+
+# Data of the projects used to resolve the URLs, by slug.
+# Each process keeps it for ``RESOLVER_LOCAL_CACHE_TIMEOUT`` seconds,
+# with the generation of the Django cache it was read from,
+# so it's not used anymore once another process invalidated it.
+_local_cache = {}
+
+
+def _get_generation():
+    return cache.get(GENERATION_KEY, 0)
+
+
+def _get_cache_key(generation, project_slug):
+    return 'docsitalia:resolver:{}:{}'.format(generation, project_slug)
+
+
+def _get_local_info(project_slug, generation, now):
+    info, expires, info_generation = _local_cache.get(project_slug, (None, 0, None))
+    if expires > now and info_generation == generation:
+        return info
+    return None
+
+
+def _get_parents(projects):
+    """
+    Return the parent of each project, and of their parents, by pk.
+
+    The parent is the main language project, or the parent of the first
+    ``ProjectRelationship`` (``get_parent_relationship``) with its alias,
+    as a tuple ``(pk, slug, alias)``: the alias is ``None`` for translations.
+    The parents are fetched level by level, instead of once for each project.
+    """
+    from readthedocs.projects.models import Project, ProjectRelationship
+
+    parents = {}
+    pending = {project.pk for project in projects}
+    while pending:
+        main_language_projects = {
+            pk: (main_language_pk, slug)
+            for pk, main_language_pk, slug in (
+                Project.objects
+                .filter(pk__in=pending, main_language_project__isnull=False)
+                .values_list('pk', 'main_language_project', 'main_language_project__slug')
+            )
+        }
+        relations = {}
+        queryset = (
+            ProjectRelationship.objects
+            .filter(child__in=pending)
+            .order_by('pk')
+            .values_list('child', 'parent', 'parent__slug', 'alias')
+        )
+        for child_pk, parent_pk, parent_slug, alias in queryset:
+            relations.setdefault(child_pk, (parent_pk, parent_slug, alias))
+        for pk in pending:
+            if pk in main_language_projects:
+                parents[pk] = main_language_projects[pk] + (None,)
+            else:
+                parents[pk] = relations.get(pk)
+        pending = {
+            parent[0] for parent in parents.values()
+            if parent and parent[0] not in parents
+        }
+    return parents
+
+
+def _get_canonical_project(project, parents):
+    """
+    Return the pk and slug of the canonical project of ``project``.
+
+    The result is the same of ``ResolverBase._get_canonical_project``.
+    """
+    # Track the projects already traversed, as ``_get_canonical_project``
+    traversed = [project.pk]
+    pk, slug = project.pk, project.slug
+    while parents.get(pk) and parents[pk][0] not in traversed:
+        pk, slug, __ = parents[pk]
+        traversed.append(pk)
+    return pk, slug
+
+
+def _get_path_info(project, parents, domains):
+    """
+    Return the data of the path of ``project``, as ``ResolverBase.resolve_path`` does.
+
+    ``path_cname`` is whether the parent of the last relation has a canonical
+    domain, ``None`` if the path doesn't go through a relation.
+    """
+    path_project_slug = project.slug
+    subproject_slug = None
+    translation = False
+    path_cname = None
+    pk = project.pk
+    # As ``resolve_path``, only loop twice
+    for __ in range(0, 2):
+        if not parents.get(pk):
+            break
+        pk, path_project_slug, alias = parents[pk]
+        if alias is None:
+            translation = True
+            subproject_slug = None
+        else:
+            subproject_slug = alias
+            path_cname = pk in domains
+    return {
+        'path_project_slug': path_project_slug,
+        'subproject_slug': subproject_slug,
+        'translation': translation,
+        'path_cname': path_cname,
+    }
+
+
+def _get_default_version(project, versions):
+    """Return the default version of ``project``, as ``Project.get_default_version``."""
+    if project.default_version == LATEST:
+        return project.default_version
+    if versions.get(project.default_version, (False, False))[0]:
+        return project.default_version
+    return LATEST
+
+
+def _get_projects_info(projects):
+    """Query the data used to resolve the URLs of ``projects``."""
+    from readthedocs.builds.models import Version
+    from readthedocs.docsitalia.models import PublisherProject
+    from readthedocs.projects.models import Domain
+
+    publisher_projects = {}
+    queryset = (
+        PublisherProject.projects.through.objects
+        .filter(project__in=projects)
+        .order_by('publisherproject')
+        .values_list(
+            'project', 'publisherproject__slug', 'publisherproject__publisher__slug',
+        )
+    )
+    for project_pk, publisher_project_slug, publisher_slug in queryset:
+        publisher_projects.setdefault(project_pk, (publisher_slug, publisher_project_slug))
+
+    # ``(active, private)`` of the versions of each project, by slug
+    versions = {}
+    queryset = (
+        Version.objects
+        .filter(project__in=projects)
+        .values_list('project', 'slug', 'active', 'privacy_level')
+    )
+    for project_pk, slug, active, privacy_level in queryset:
+        versions.setdefault(project_pk, {})[slug] = (active, privacy_level == PRIVATE)
+
+    parents = _get_parents(projects)
+    canonical_projects = {
+        project.pk: _get_canonical_project(project, parents)
+        for project in projects
+    }
+    domains = {}
+    queryset = (
+        Domain.objects
+        # The projects and all their parents
+        .filter(project__in=set(parents), canonical=True)
+        .order_by('pk')
+        .values_list('project', 'domain', 'https')
+    )
+    for project_pk, domain, https in queryset:
+        domains.setdefault(project_pk, (domain, https))
+
+    infos = {}
+    for project in projects:
+        canonical_pk, canonical_slug = canonical_projects[project.pk]
+        project_versions = versions.get(project.pk, {})
+        info = {
+            'publisher_slug': publisher_projects.get(project.pk, (None, None))[0],
+            'publisher_project_slug': publisher_projects.get(project.pk, (None, None))[1],
+            'canonical_project_slug': canonical_slug,
+            'canonical_domain': domains.get(canonical_pk, (None, None))[0],
+            'canonical_domain_https': domains.get(canonical_pk, (None, False))[1],
+            'cname': project.pk in domains,
+            'language': project.language,
+            'single_version': project.single_version,
+            'default_version': _get_default_version(project, project_versions),
+            'private_versions': [
+                slug for slug, (__, private) in project_versions.items() if private
+            ],
+            'public_versions': [
+                slug for slug, (__, private) in project_versions.items() if not private
+            ],
+        }
+        info.update(_get_path_info(project, parents, domains))
+        infos[project.slug] = info
+    return infos
+
+
+def get_projects_info(projects):
+    """
+    Return the data used to resolve the URLs of ``projects``, by slug.
+
+    The data missing from the caches is fetched with the same queries
+    for all the projects.
+    """
+    now = time.time()
+    generation = _get_generation()
+    infos = {}
+    for project in projects:
+        info = _get_local_info(project.slug, generation, now)
+        if info is not None:
+            infos[project.slug] = info
+
+    keys = {
+        project.slug: _get_cache_key(generation, project.slug)
+        for project in projects
+        if project.slug not in infos
+    }
+    cached = cache.get_many(keys.values())
+    missing = []
+    for project in projects:
+        if project.slug not in keys:
+            continue
+        if keys[project.slug] in cached:
+            infos[project.slug] = cached[keys[project.slug]]
+        else:
+            missing.append(project)
+
+    if missing:
+        queried = _get_projects_info(missing)
+        cache.set_many(
+            {keys[slug]: info for slug, info in queried.items()},
+            settings.RESOLVER_CACHE_TIMEOUT,
+        )
+        infos.update(queried)
+
+    expires = now + settings.RESOLVER_LOCAL_CACHE_TIMEOUT
+    for slug, info in infos.items():
+        _local_cache[slug] = (info, expires, generation)
+    return infos
+
+
+def get_project_info(project_slug):
+    """Return the data used to resolve the URLs of the project ``project_slug``."""
+    from readthedocs.projects.models import Project
+
+    now = time.time()
+    generation = _get_generation()
+    info = _get_local_info(project_slug, generation, now)
+    if info is not None:
+        return info
+
+    info = cache.get(_get_cache_key(generation, project_slug))
+    if info is None:
+        return get_projects_info([Project.objects.get(slug=project_slug)])[project_slug]
+
+    _local_cache[project_slug] = (
+        info,
+        now + settings.RESOLVER_LOCAL_CACHE_TIMEOUT,
+        generation,
+    )
+    return info
+
+
+def invalidate_projects_info():
+    """Invalidate the data of all the projects, in the caches of all the processes."""
+    _local_cache.clear()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # The key is missing
+        cache.set(GENERATION_KEY, 1, None)
 
 
 class ItaliaResolver(ResolverBase):
@@ -31,12 +305,9 @@ class ItaliaResolver(ResolverBase):
         :param cname: optional subdomain
         :return: string
         """
-        from readthedocs.projects.models import Project
+        info = get_project_info(project_slug)
 
-        project = Project.objects.get(slug=project_slug)
-        base_project = project.publisherproject_set.all().first()
-
-        if not base_project or private:
+        if not info['publisher_project_slug'] or private:
             return super(ItaliaResolver, self).base_resolve_path(
                 project_slug, filename, version_slug,
                 language, private, single_version,
@@ -55,11 +326,62 @@ class ItaliaResolver(ResolverBase):
 
         return url.format(
             project_slug=project_slug, filename=filename,
-            base_project_slug=base_project.slug, publisher_slug=base_project.publisher.slug,
+            base_project_slug=info['publisher_project_slug'],
+            publisher_slug=info['publisher_slug'],
             version_slug=version_slug, language=language,
             single_version=single_version, subproject_slug=subproject_slug,
         )
 
+    @staticmethod
+    def _get_info_private(info, version_slug):
+        """Return whether the version is private, as ``ResolverBase._get_private``."""
+        if version_slug in info['private_versions']:
+            return True
+        if version_slug in info['public_versions']:
+            return False
+        return settings.DEFAULT_PRIVACY_LEVEL == PRIVATE
+
+    def resolve_path(self, project, filename='', version_slug=None, language=None,
+                     single_version=None, subdomain=None, cname=None, private=None):
+        """
+        Resolve the path of the provided project (document), from its cached data.
+
+        The path is the same of ``ResolverBase.resolve_path``.
+
+        :param project: project (document) instance
+        :param filename: path to the document file
+        :param version_slug: version slug
+        :param language: language
+        :param single_version: if document has single version
+        :param subdomain: optional subdomain
+        :param cname: optional subdomain
+        :param private: if document is private
+        :return: string
+        """
+        info = get_project_info(project.slug)
+        version_slug = version_slug or info['default_version']
+        language = language or info['language']
+        if private is None:
+            private = self._get_info_private(info, version_slug)
+        if info['translation']:
+            language = info['language']
+        if info['path_cname'] is not None:
+            cname = info['path_cname']
+        else:
+            cname = cname or info['cname']
+
+        return self.base_resolve_path(
+            project_slug=info['path_project_slug'],
+            filename=self._fix_filename(project, filename),
+            version_slug=version_slug,
+            language=language,
+            single_version=bool(info['single_version'] or single_version),
+            subproject_slug=info['subproject_slug'],
+            cname=cname,
+            private=private,
+            subdomain=subdomain,
+        )
+
     def resolve_domain(self, project, private=None):
         """
         Resolve the public domain for the given project.
@@ -68,33 +390,80 @@ class ItaliaResolver(ResolverBase):
         :param private: if document is private
         :return: string
         """
-        canonical_project = self._get_canonical_project(project)
-        domain = canonical_project.domains.filter(canonical=True).first()
+        domain = get_project_info(project.slug)['canonical_domain']
         if domain:
-            return domain.domain
+            return domain
         return getattr(settings, 'PUBLIC_DOMAIN')
 
     # pylint: disable=arguments-differ
-    def resolve(self, project, require_https=False, filename='', private=None, **kwargs):
+    def resolve(self, project, require_https=False, filename='', query_params='',
+                private=None, **kwargs):
         """
-        Resolve the complete URL to the provided project (document).
+        Resolve the complete URL to the provided project (document), from its cached data.
 
         :param project: project (document) instance
         :param require_https: use https protocol
         :param filename: path to the document file
+        :param query_params: query string of the URL
         :param private: if document is private
         :param kwargs: other kwargs
         :return: string
         """
+        info = get_project_info(project.slug)
         require_https = getattr(settings, 'PUBLIC_DOMAIN_USES_HTTPS', False)
         # get readable international slug name if language is not italian
         from readthedocs.docsitalia.utils import get_international_version_slug
         kwargs['version_slug'] = get_international_version_slug(
-            project, kwargs.get('language', None), kwargs.get('version_slug', None)
-        )
-        return super(ItaliaResolver, self).resolve(
-            project, require_https=require_https, filename=filename, private=private, **kwargs
+            project,
+            kwargs.get('language', None),
+            kwargs.get('version_slug', None) or info['default_version'],
         )
+        if private is None:
+            private = self._get_info_private(info, kwargs['version_slug'])
+
+        use_custom_domain = bool(info['canonical_domain'])
+        if use_custom_domain:
+            domain = info['canonical_domain']
+        elif self._use_subdomain():
+            domain = '{}.{}'.format(
+                info['canonical_project_slug'].replace('_', '-'),
+                settings.PUBLIC_DOMAIN,
+            )
+        else:
+            domain = settings.PRODUCTION_DOMAIN
+
+        use_https_protocol = any([
+            use_custom_domain and info['canonical_domain_https'],
+            require_https,
+            settings.PUBLIC_DOMAIN_USES_HTTPS and
+            settings.PUBLIC_DOMAIN and
+            settings.PUBLIC_DOMAIN in domain,
+        ])
+        protocol = 'https' if use_https_protocol else 'http'
+
+        path = self.resolve_path(project, filename=filename, private=private, **kwargs)
+        return urlunparse((protocol, domain, path, '', query_params, ''))
+
+    def resolve_many(self, projects, **kwargs):
+        """
+        Resolve the complete URLs of many projects (documents).
+
+        The data needed to resolve them, and the projects of their paths,
+        is fetched at once, instead of once for each project.
+
+        :param projects: project (document) instances
+        :param kwargs: kwargs passed to :py:meth:`resolve`
+        :return: list of strings
+        """
+        from readthedocs.projects.models import Project
+
+        infos = get_projects_info(projects)
+        path_project_slugs = {
+            info['path_project_slug'] for info in infos.values()
+        }.difference(infos)
+        if path_project_slugs:
+            get_projects_info(list(Project.objects.filter(slug__in=path_project_slugs)))
+        return [self.resolve(project, **kwargs) for project in projects]
 
     @staticmethod
     def resolve_docsitalia(publisher_slug, pb_project_slug=None, protocol='http'):
@@ -0,0 +1,69 @@
+"""
+Cache of the quick search results.
+
+Autocomplete requests repeat the same queries many times,
+their results are cached for ``QUICKSEARCH_CACHE_TIMEOUT`` seconds.
+The cache keys contain a generation number: incrementing it on
+``invalidate_cache`` makes all the previous results unreachable.
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+log = logging.getLogger(__name__)
+
+GENERATION_KEY = 'quicksearch:generation'
+HITS_KEY = 'quicksearch:hits'
+MISSES_KEY = 'quicksearch:misses'
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key is missing
+        cache.set(key, 1, None)
+        return 1
+
+
+def get_cache_key(query, model, version):
+    """Return the cache key of a search, normalizing its parameters."""
+    params = json.dumps([' '.join(query.lower().split()), model or '', version])
+    return 'quicksearch:{}:{}'.format(
+        cache.get(GENERATION_KEY, 0),
+        hashlib.md5(params.encode()).hexdigest(),
+    )
+
+
+def get_cached_results(query, model, version):
+    """Return the cached results of a search, ``None`` if they aren't cached."""
+    results = cache.get(get_cache_key(query, model, version))
+    _incr(MISSES_KEY if results is None else HITS_KEY)
+    return results
+
+
+def set_cached_results(query, model, version, results):
+    cache.set(
+        get_cache_key(query, model, version),
+        results,
+        settings.QUICKSEARCH_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_cache():
+    """Invalidate all the cached results."""
+    generation = _incr(GENERATION_KEY)
+    log.info('Quick search cache invalidated, generation: %s', generation)
+
+
+def get_cache_stats():
+    """Return the number of cache hits and misses."""
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
@@ -33,6 +33,8 @@ class PageQuickSearchDocument(RTDDocTypeMixin, DocType):
     text = fields.TextField(attr='processed_json.title', analyzer=trigram_analyzer)
     version = fields.KeywordField(attr='version.slug')
 
+    partial_update_fields = ('link',)
+
     class Meta:
         model = HTMLFile
         ignore_signals = True
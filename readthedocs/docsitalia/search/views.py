@@ -1,12 +1,13 @@
 """Api for the docsitalia app."""
 
-from django.conf import settings
-from elasticsearch import Elasticsearch
 from elasticsearch_dsl import Q, Search
 from rest_framework import generics, serializers
+from rest_framework.response import Response
 
 from readthedocs.builds.constants import LATEST
+from readthedocs.search.client import get_client
 
+from .cache import get_cached_results, set_cached_results
 from .documents import quicksearch_index
 
 
@@ -30,6 +31,19 @@ class QuickSearchAPIView(generics.ListAPIView):
     pagination_class = None
     serializer_class = SearchSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Return the cached results of the search, if any."""
+        params = (
+            request.query_params.get('q', ''),
+            request.query_params.get('model'),
+            request.query_params.get('version', LATEST),
+        )
+        results = get_cached_results(*params)
+        if results is None:
+            results = list(super().list(request, *args, **kwargs).data)
+            set_cached_results(*params, results)
+        return Response(results)
+
     def get_queryset(self):
         """
         Return Elasticsearch DSL Search object instead of Django Queryset.
@@ -42,10 +56,9 @@ class QuickSearchAPIView(generics.ListAPIView):
         query = self.request.query_params.get('q', '')
         model = self.request.query_params.get('model')
         version = self.request.query_params.get('version', LATEST)
-        using = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
         search = Search(
             index=f'{quicksearch_index}',
-            using=using,
+            using=get_client(),
         ).filter(
             Q(
                 'terms', model=['progetto', 'amministrazione']
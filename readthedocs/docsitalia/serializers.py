@@ -79,6 +79,7 @@ class DocsItaliaProjectAdminSerializer(DocsItaliaProjectSerializer):
             'container_image',
             'container_mem_limit',
             'container_time_limit',
+            'build_queue',
             'install_project',
             'use_system_packages',
             # 'suffix', TODO merge
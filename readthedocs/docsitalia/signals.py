@@ -4,16 +4,26 @@
 import logging
 
 from django.dispatch import receiver
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django_elasticsearch_dsl.apps import DEDConfig
 
+from readthedocs.builds.constants import BUILD_STATE_FINISHED
+from readthedocs.builds.models import Build, Version
+from readthedocs.builds.signals import build_complete
 from readthedocs.core.signals import webhook_github
 from readthedocs.doc_builder.signals import finalize_sphinx_context_data
-from readthedocs.projects.models import Project, HTMLFile
+from readthedocs.projects.models import Domain, Project, ProjectRelationship, HTMLFile
+from readthedocs.projects.signals import files_changed
 from readthedocs.search.tasks import index_objects_to_es
 
 from .github import get_metadata_for_document
-from .models import ProjectOrder, PublisherProject, update_project_from_metadata
+from .models import (
+    Publisher, ProjectOrder, PublishedDocument, PublisherProject,
+    invalidate_published_documents, refresh_published_documents,
+    refresh_published_documents_priority, update_project_from_metadata,
+)
+from .resolver import invalidate_projects_info
+from .search.cache import invalidate_cache
 
 
 log = logging.getLogger(__name__) # noqa
@@ -129,3 +139,108 @@ def on_project_create(sender, instance, created, **kwargs):  # noqa
     if not created:
         return
     ProjectOrder.objects.create(project=instance)
+
+
+@receiver(build_complete)
+@receiver(files_changed)
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=PublisherProject)
+def invalidate_quicksearch_cache(sender, **kwargs):  # noqa
+    """
+    Invalidate the cached quick search results.
+
+    ``files_changed`` is sent once the search index of a version is updated,
+    after ``build_complete``.
+    """
+    invalidate_cache()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Publisher)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_save, sender=PublisherProject)
+@receiver(post_delete, sender=PublisherProject)
+@receiver(m2m_changed, sender=PublisherProject.projects.through)
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+@receiver(post_save, sender=ProjectRelationship)
+@receiver(post_delete, sender=ProjectRelationship)
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+def invalidate_resolver_cache(sender, **kwargs):  # noqa
+    """Invalidate the cached data used to resolve the URLs of the documents."""
+    invalidate_projects_info()
+
+
+@receiver(post_save, sender=Build)
+def on_build_save(sender, instance, **kwargs):  # noqa
+    """Refresh the published documents of the project when a build finishes."""
+    if instance.state == BUILD_STATE_FINISHED:
+        refresh_published_documents([instance.project_id])
+
+
+@receiver(post_save, sender=Version)
+@receiver(post_delete, sender=Version)
+def on_version_change(sender, instance, **kwargs):  # noqa
+    """Refresh the published documents of the project of the version."""
+    refresh_published_documents([instance.project_id])
+
+
+@receiver(post_save, sender=Publisher)
+def on_publisher_save(sender, instance, **kwargs):  # noqa
+    """Refresh the published documents of the projects of the publisher."""
+    refresh_published_documents(
+        PublisherProject.projects.through.objects.filter(
+            publisherproject__publisher=instance,
+        ).values_list('project', flat=True)
+    )
+
+
+@receiver(post_save, sender=PublisherProject)
+def on_publisher_project_save(sender, instance, **kwargs):  # noqa
+    """Refresh the published documents of the projects of the publisher project."""
+    refresh_published_documents(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=ProjectOrder)
+def on_project_order_save(sender, instance, **kwargs):  # noqa
+    """Update the priority of the published documents of the project."""
+    refresh_published_documents_priority(instance.project_id, instance.priority)
+
+
+@receiver(post_delete, sender=ProjectOrder)
+def on_project_order_delete(sender, instance, **kwargs):  # noqa
+    """Reset the priority of the published documents of the project."""
+    refresh_published_documents_priority(instance.project_id)
+
+
+@receiver(m2m_changed, sender=PublisherProject.projects.through)
+def on_publisher_project_documents_change(  # noqa
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh the published documents when documents are added or removed."""
+    if action in ('post_add', 'post_remove'):
+        refresh_published_documents([instance.pk] if reverse else pk_set)
+    elif action == 'post_clear':
+        # The removed documents aren't known anymore
+        if reverse:
+            refresh_published_documents([instance.pk])
+        else:
+            refresh_published_documents(
+                PublishedDocument.objects.filter(
+                    publisher_project=instance,
+                ).values_list('project', flat=True)
+            )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=PublisherProject)
+def on_published_document_change(sender, **kwargs):  # noqa
+    """
+    Invalidate the cached fragments showing the published documents.
+
+    The published documents of deleted objects are deleted in cascade.
+    """
+    invalidate_published_documents()
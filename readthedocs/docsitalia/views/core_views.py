@@ -3,7 +3,7 @@
 
 import logging
 
-from django.db.models import Case, When
+from django.conf import settings
 from django.http import HttpResponseRedirect, Http404
 from django.shortcuts import render, redirect
 from django.utils.translation import ugettext_lazy as _
@@ -18,13 +18,27 @@ from readthedocs.projects.views.private import ImportView
 
 from ..github import get_metadata_for_document
 from ..metadata import InvalidMetadata
-from ..models import PublisherProject, Publisher, ProjectOrder, update_project_from_metadata
-from ..utils import get_projects_with_builds
+from ..models import (
+    PublisherProject, Publisher, PublishedDocument, get_published_documents_version,
+    update_project_from_metadata,
+)
 
 log = logging.getLogger(__name__)  # noqa
 
 
-class DocsItaliaHomePage(ListView):  # pylint: disable=too-many-ancestors
+class PublishedDocumentsCacheMixin:
+
+    """Add to the context the arguments of the cached fragments showing published documents."""
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['published_documents_version'] = get_published_documents_version()
+        context['published_documents_cache_timeout'] = settings.PUBLISHED_DOCUMENTS_CACHE_TIMEOUT
+        return context
+
+
+class DocsItaliaHomePage(  # pylint: disable=too-many-ancestors
+        PublishedDocumentsCacheMixin, ListView):
 
     """Docs italia Home Page."""
 
@@ -35,38 +49,26 @@ class DocsItaliaHomePage(ListView):  # pylint: disable=too-many-ancestors
         """
         Filter projects to show in homepage.
 
-        We show in homepage projects that matches the following requirements:
+        We show in homepage the published documents, see :py:class:`PublishedDocument`:
         - Publisher is active
         - PublisherProject is active
         - document (Project) has a public build
         - Build is success and finished
 
         Ordering by:
-        - ProjectOrder model values
+        - ProjectOrder priority descending
         - modified_date descending
         - pub_date descending
         """
-        active_pub_projects = PublisherProject.objects.filter(
-            active=True,
-            publisher__active=True
-        )
-        qs = get_projects_with_builds()
-
-        order_by_list = ['-modified_date', '-pub_date']
+        return Project.objects.filter(
+            published_documents__isnull=False
+        ).order_by(
+            '-published_documents__priority', '-modified_date', '-pub_date'
+        )[:24]
 
-        projects_priority_list = ProjectOrder.objects.all().values_list('project', flat=True)
-        if projects_priority_list:
-            project_priority_order = Case(
-                *[When(id=pk, then=pos) for pos, pk in enumerate(projects_priority_list)]
-            )
-            order_by_list.insert(0, project_priority_order)
-
-        return qs.filter(
-            publisherproject__in=active_pub_projects
-        ).order_by(*order_by_list)[:24]
 
-
-class PublisherList(ListView):  # pylint: disable=too-many-ancestors
+class PublisherList(  # pylint: disable=too-many-ancestors
+        PublishedDocumentsCacheMixin, ListView):
 
     """List view of :py:class:`Publisher` instances."""
 
@@ -78,25 +80,15 @@ class PublisherList(ListView):  # pylint: disable=too-many-ancestors
 
         We show publishers that matches the following requirements:
         - are active
-        - have documents with successful public build
+        - have published documents
         """
-        active_pub_projects = PublisherProject.objects.filter(
-            active=True,
-            publisher__active=True
-        )
-        publishers_with_projects = get_projects_with_builds().filter(
-            publisherproject__in=active_pub_projects
-        ).values_list(
-            'publisherproject__publisher',
-            flat=True
-        )
-
         return Publisher.objects.filter(
-            pk__in=publishers_with_projects
+            pk__in=PublishedDocument.objects.values('publisher_project__publisher')
         )
 
 
-class PublisherIndex(DetailView):  # pylint: disable=too-many-ancestors
+class PublisherIndex(  # pylint: disable=too-many-ancestors
+        PublishedDocumentsCacheMixin, DetailView):
 
     """Detail view of :py:class:`Publisher` instances."""
 
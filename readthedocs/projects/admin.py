@@ -224,7 +224,7 @@ class ProjectAdmin(admin.ModelAdmin):
         """Trigger a build for the project version."""
         total = 0
         for project in queryset:
-            trigger_build(project=project)
+            trigger_build(project=project, rebuild=True)
             total += 1
         messages.add_message(
             request,
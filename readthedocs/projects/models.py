@@ -1295,7 +1295,7 @@ class HTMLFile(ImportedFile):
             for fjson_path in fjson_paths:
                 file_path = storage.join(storage_path, fjson_path)
                 if storage.exists(file_path):
-                    return process_file(file_path)
+                    return process_file(file_path, html_file=self)
         except Exception:
             log.warning(
                 'Unhandled exception during search processing file: %s',
@@ -10,9 +10,11 @@ import hashlib
 import json
 import logging
 import os
-import shutil
+import posixpath
 import socket
+import time
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from celery.exceptions import SoftTimeLimitExceeded
@@ -23,9 +25,11 @@ from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from slumber.exceptions import HttpClientError
-from sphinx.ext import intersphinx
+from sphinx.util.inventory import InventoryFile
 
+from readthedocs import __version__
 from readthedocs.api.v2.client import api as api_v2
+from readthedocs.builds import artifacts, scheduling
 from readthedocs.builds.constants import (
     BUILD_STATE_BUILDING,
     BUILD_STATE_CLONING,
@@ -40,11 +44,17 @@ from readthedocs.builds.constants import (
 )
 from readthedocs.builds.models import APIVersion, Build, Version
 from readthedocs.builds.signals import build_complete
-from readthedocs.builds.syncers import Syncer
+from readthedocs.builds.storage import TransferMetrics
+from readthedocs.builds.syncers import Syncer, remove_directory
 from readthedocs.config import ConfigError
 from readthedocs.core.resolver import resolve_path
 from readthedocs.core.symlink import PrivateSymlink, PublicSymlink
-from readthedocs.core.utils import broadcast, safe_unlink, send_email
+from readthedocs.core.utils import (
+    broadcast,
+    chunked,
+    safe_unlink,
+    send_email,
+)
 from readthedocs.doc_builder.config import load_yaml_config
 from readthedocs.doc_builder.constants import DOCKER_LIMITS
 from readthedocs.doc_builder.environments import (
@@ -61,12 +71,20 @@ from readthedocs.doc_builder.exceptions import (
     YAMLParseError,
 )
 from readthedocs.doc_builder.loader import get_builder_class
-from readthedocs.doc_builder.python_environments import Conda, Virtualenv
+from readthedocs.doc_builder.python_environments import (
+    Conda,
+    Virtualenv,
+    get_env_vars_hash,
+)
 from readthedocs.oauth.models import RemoteRepository
 from readthedocs.oauth.notifications import GitBuildStatusFailureNotification
 from readthedocs.projects.constants import GITHUB_BRAND, GITLAB_BRAND
 from readthedocs.projects.models import APIProject, Feature
-from readthedocs.search.utils import index_new_files, remove_indexed_files
+from readthedocs.search.utils import (
+    index_changed_files,
+    index_new_files,
+    remove_indexed_files,
+)
 from readthedocs.sphinx_domains.models import SphinxDomain
 from readthedocs.vcs_support import utils as vcs_support_utils
 from readthedocs.worker import app
@@ -86,6 +104,9 @@ from .signals import (
 
 log = logging.getLogger(__name__)
 
+# Fields of the builds returned by the API not kept by the tasks
+BUILD_PRIVATE_KEYS = ['project', 'version', 'resource_uri', 'absolute_uri']
+
 
 class SyncRepositoryMixin:
 
@@ -149,26 +170,33 @@ class SyncRepositoryMixin:
         identifier = getattr(self, 'commit', None) or self.version.identifier
         version_repo.checkout(identifier)
 
-    def sync_versions(self, version_repo):
+    def sync_versions(self, version_repo, branches=None, tags=None):
         """
         Update tags/branches hitting the API.
 
         It may trigger a new build to the stable version when hittig the
         ``sync_versions`` endpoint.
+
+        :param branches: branches to sync instead of the ones of ``version_repo``
+        :param tags: tags to sync instead of the ones of ``version_repo``
         """
         version_post_data = {'repo': version_repo.repo_url}
 
         if version_repo.supports_tags:
+            if tags is None:
+                tags = version_repo.tags
             version_post_data['tags'] = [{
                 'identifier': v.identifier,
                 'verbose_name': v.verbose_name,
-            } for v in version_repo.tags]
+            } for v in tags]
 
         if version_repo.supports_branches:
+            if branches is None:
+                branches = version_repo.branches
             version_post_data['branches'] = [{
                 'identifier': v.identifier,
                 'verbose_name': v.verbose_name,
-            } for v in version_repo.branches]
+            } for v in branches]
 
         self.validate_duplicate_reserved_versions(version_post_data)
 
@@ -226,6 +254,33 @@ class SyncRepositoryTaskStep(SyncRepositoryMixin):
         was that this instance shared state between workers.
     """
 
+    def sync_repo(self):
+        """
+        Sync the versions of the project's repository.
+
+        Without a checkout of the version, the branches and tags are listed
+        from the remote repository, instead of cloning it.
+        """
+        version_repo = self.get_vcs_repo()
+        if not version_repo or not version_repo.supports_remote_refs:
+            return super().sync_repo()
+
+        version_repo.check_working_dir()
+        if version_repo.repo_exists():
+            return super().sync_repo()
+
+        log.info(
+            LOG_TEMPLATE,
+            {
+                'project': self.project.slug,
+                'version': self.version.slug,
+                'msg': 'Listing the remote branches and tags',
+            }
+        )
+        branches, tags = version_repo.get_remote_refs()
+        self.sync_versions(version_repo, branches=branches, tags=tags)
+        return None
+
     def run(self, version_pk):  # pylint: disable=arguments-differ
         """
         Run the VCS synchronization.
@@ -326,10 +381,12 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
             version=None,
             commit=None,
             task=None,
+            rebuild=False,
     ):
         self.build_env = build_env
         self.python_env = python_env
         self.build_force = force
+        self.rebuild = rebuild
         self.build = {}
         if build is not None:
             self.build = build
@@ -348,7 +405,7 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
     # pylint: disable=arguments-differ
     def run(
             self, version_pk, build_pk=None, commit=None, record=True, docker=None,
-            force=False, **__
+            force=False, rebuild=False, **__
     ):
         """
         Run a documentation sync n' build.
@@ -373,6 +430,8 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         :param docker bool: use docker to build the project (if ``None``,
             ``settings.DOCKER_ENABLE`` is used)
         :param force bool: force Sphinx build
+        :param rebuild bool: build even if the commit, configuration and
+            environment are the same of the last successful build
 
         :returns: whether build was successful or not
 
@@ -385,7 +444,13 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
             self.project = self.version.project
             self.build = self.get_build(build_pk)
             self.build_force = force
-            self.commit = commit
+            self.rebuild = rebuild
+            if record and self.build:
+                # The commit of a coalesced build is updated while it's queued
+                self.build, started = self.start_build(build_pk)
+                if started:
+                    scheduling.record_build_start(self.project, self.build)
+            self.commit = self.build.get('commit') or commit
             self.config = None
 
             # Build process starts here
@@ -533,63 +598,85 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
             environment=env_vars,
         )
 
-        # Environment used for building code, usually with Docker
-        with self.build_env:
-            python_env_cls = Virtualenv
-            if self.config.conda is not None:
-                log.info(
-                    LOG_TEMPLATE,
-                    {
-                        'project': self.project.slug,
-                        'version': self.version.slug,
-                        'msg': 'Using conda',
-                    }
-                )
-                python_env_cls = Conda
-            self.python_env = python_env_cls(
+        self.build['fingerprint'] = self.get_build_fingerprint()
+        if record and self.is_build_unchanged():
+            log.info(
+                LOG_TEMPLATE,
+                {
+                    'project': self.project.slug,
+                    'version': self.version.slug,
+                    'msg': 'Skipping build, nothing changed since the last successful build',
+                }
+            )
+            # Finish the build without starting the Docker container
+            self.build_env = LocalBuildEnvironment(
+                project=self.project,
                 version=self.version,
-                build_env=self.build_env,
                 config=self.config,
+                build=self.build,
+                record=record,
+                environment=env_vars,
             )
-
-            try:
-                with self.project.repo_nonblockinglock(version=self.version):
-                    self.setup_python_environment()
-
-                    # TODO the build object should have an idea of these states,
-                    # extend the model to include an idea of these outcomes
-                    outcomes = self.build_docs()
-            except vcs_support_utils.LockTimeout as e:
-                self.task.retry(exc=e, throw=False)
-                raise VersionLockedError
-            except SoftTimeLimitExceeded:
-                raise BuildTimeoutError
-            else:
-                build_id = self.build.get('id')
-                if build_id:
-                    # Store build artifacts to storage (local or cloud storage)
-                    self.store_build_artifacts(
-                        html=bool(outcomes['html']),
-                        search=bool(outcomes['search']),
-                        localmedia=bool(outcomes['localmedia']),
-                        pdf=bool(outcomes['pdf']),
-                        epub=bool(outcomes['epub']),
+            with self.build_env:
+                pass
+        else:
+            # Environment used for building code, usually with Docker
+            with self.build_env:
+                python_env_cls = Virtualenv
+                if self.config.conda is not None:
+                    log.info(
+                        LOG_TEMPLATE,
+                        {
+                            'project': self.project.slug,
+                            'version': self.version.slug,
+                            'msg': 'Using conda',
+                        }
                     )
+                    python_env_cls = Conda
+                self.python_env = python_env_cls(
+                    version=self.version,
+                    build_env=self.build_env,
+                    config=self.config,
+                )
+
+                try:
+                    with self.project.repo_nonblockinglock(version=self.version):
+                        self.setup_python_environment()
 
-                    # Finalize build and update web servers
-                    # We upload EXTERNAL version media files to blob storage
-                    # We should have this check here to make sure
-                    # the files don't get re-uploaded on web.
-                    if self.version.type != EXTERNAL:
-                        self.update_app_instances(
+                        # TODO the build object should have an idea of these states,
+                        # extend the model to include an idea of these outcomes
+                        outcomes = self.build_docs()
+                except vcs_support_utils.LockTimeout as e:
+                    self.task.retry(exc=e, throw=False)
+                    raise VersionLockedError
+                except SoftTimeLimitExceeded:
+                    raise BuildTimeoutError
+                else:
+                    build_id = self.build.get('id')
+                    if build_id:
+                        # Store build artifacts to storage (local or cloud storage)
+                        self.store_build_artifacts(
                             html=bool(outcomes['html']),
                             search=bool(outcomes['search']),
                             localmedia=bool(outcomes['localmedia']),
                             pdf=bool(outcomes['pdf']),
                             epub=bool(outcomes['epub']),
                         )
-                else:
-                    log.warning('No build ID, not syncing files')
+
+                        # Finalize build and update web servers
+                        # We upload EXTERNAL version media files to blob storage
+                        # We should have this check here to make sure
+                        # the files don't get re-uploaded on web.
+                        if self.version.type != EXTERNAL:
+                            self.update_app_instances(
+                                html=bool(outcomes['html']),
+                                search=bool(outcomes['search']),
+                                localmedia=bool(outcomes['localmedia']),
+                                pdf=bool(outcomes['pdf']),
+                                epub=bool(outcomes['epub']),
+                            )
+                    else:
+                        log.warning('No build ID, not syncing files')
 
         if self.build_env.failed:
             # TODO: Send RTD Webhook notification for build failure.
@@ -631,6 +718,65 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
 
         build_complete.send(sender=Build, build=self.build_env.build)
 
+    def get_build_fingerprint(self):
+        """
+        Return the fingerprint of the build, ``None`` if it can't be computed.
+
+        It's the hash of everything the output of the build depends on:
+        the commit, the configuration, the Docker image,
+        the environment variables and the version of Read the Docs.
+        """
+        commit = self.build.get('commit')
+        if not commit:
+            return None
+
+        image_hash = None
+        if isinstance(self.build_env, DockerBuildEnvironment):
+            try:
+                image_hash = self.build_env.image_hash
+            except Exception:
+                log.warning('Unable to get the hash of the Docker image', exc_info=True)
+                return None
+
+        data = json.dumps(
+            [
+                commit,
+                self.config.as_dict(),
+                image_hash,
+                get_env_vars_hash(self.project),
+                __version__,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def is_build_unchanged(self):
+        """
+        Whether the last successful build of the version has the same fingerprint.
+
+        Building it again would give the same output,
+        unless a rebuild is requested or ``RTD_SKIP_UNCHANGED_BUILDS`` is disabled.
+        """
+        fingerprint = self.build.get('fingerprint')
+        if (
+            not settings.RTD_SKIP_UNCHANGED_BUILDS or
+            self.rebuild or
+            not fingerprint or
+            not self.version.built
+        ):
+            return False
+        try:
+            builds = api_v2.build.get(
+                version=self.version.pk,
+                state=BUILD_STATE_FINISHED,
+                success=True,
+                limit=1,
+            )['results']
+        except HttpClientError:
+            log.exception('Unable to get the last successful build')
+            return False
+        return bool(builds) and builds[0].get('fingerprint') == fingerprint
+
     @staticmethod
     def get_project(project_pk):
         """Get project from API."""
@@ -647,17 +793,27 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
         build = {}
         if build_pk:
             build = api_v2.build(build_pk).get()
-        private_keys = [
-            'project',
-            'version',
-            'resource_uri',
-            'absolute_uri',
-        ]
         return {
             key: val
-            for key, val in build.items() if key not in private_keys
+            for key, val in build.items() if key not in BUILD_PRIVATE_KEYS
         }
 
+    @staticmethod
+    def start_build(build_pk):
+        """
+        Move the build out of the queue, so its commit is no longer updated.
+
+        :param build_pk: Build primary key
+        :returns: a tuple with the build and whether it was started now,
+                  it was already started if the task is retried
+        """
+        response = api_v2.build(build_pk).start.post()
+        build = {
+            key: val
+            for key, val in response['build'].items() if key not in BUILD_PRIVATE_KEYS
+        }
+        return build, response['started']
+
     def setup_vcs(self):
         """
         Update the checkout of the repo to make sure it's the latest.
@@ -792,6 +948,7 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
             return
 
         storage = get_storage_class(settings.RTD_BUILD_MEDIA_STORAGE)()
+        metrics = TransferMetrics()
         log.info(
             LOG_TEMPLATE,
             {
@@ -847,7 +1004,7 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
                 },
             )
             try:
-                storage.copy_directory(from_path, to_path)
+                storage.copy_directory(from_path, to_path, metrics=metrics)
             except Exception:
                 # Ideally this should just be an IOError
                 # but some storage backends unfortunately throw other errors
@@ -876,7 +1033,7 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
                 },
             )
             try:
-                storage.delete_directory(media_path)
+                storage.delete_directory(media_path, metrics=metrics)
             except Exception:
                 # Ideally this should just be an IOError
                 # but some storage backends unfortunately throw other errors
@@ -889,6 +1046,15 @@ class UpdateDocsTaskStep(SyncRepositoryMixin):
                     },
                 )
 
+        log.info(
+            LOG_TEMPLATE,
+            {
+                'project': self.version.project.slug,
+                'version': self.version.slug,
+                'msg': f'Build artifacts written to media storage: {metrics}',
+            },
+        )
+
     def update_app_instances(
             self,
             html=False,
@@ -1280,6 +1446,7 @@ def symlink_domain(project_pk, domain, delete=False):
     project = Project.objects.get(pk=project_pk)
     for symlink in [PublicSymlink, PrivateSymlink]:
         sym = symlink(project=project)
+        sym.sanity_check()
         if delete:
             sym.remove_symlink_cname(domain)
         else:
@@ -1294,11 +1461,11 @@ def remove_orphan_symlinks():
     List CNAME_ROOT for Public and Private symlinks, check that all the listed
     cname exist in the database and if doesn't exist, they are un-linked.
     """
+    valid_cnames = set(
+        Domain.objects.all().values_list('domain', flat=True),
+    )
     for symlink in [PublicSymlink, PrivateSymlink]:
         for domain_path in [symlink.PROJECT_CNAME_ROOT, symlink.CNAME_ROOT]:
-            valid_cnames = set(
-                Domain.objects.all().values_list('domain', flat=True),
-            )
             orphan_cnames = set(os.listdir(domain_path)) - valid_cnames
             for cname in orphan_cnames:
                 orphan_domain_path = os.path.join(domain_path, cname)
@@ -1316,11 +1483,29 @@ def broadcast_remove_orphan_symlinks():
     broadcast(type='web', task=remove_orphan_symlinks, args=[])
 
 
+@app.task(queue='web')
+def remove_unreferenced_artifacts():
+    """Remove the files of the artifact store not used by any build artifact."""
+    if settings.USE_ARTIFACT_STORE:
+        artifacts.collect_garbage()
+
+
+@app.task(queue='web')
+def broadcast_remove_unreferenced_artifacts():
+    """
+    Broadcast the task ``remove_unreferenced_artifacts`` to all our web servers.
+
+    This task is executed by CELERY BEAT.
+    """
+    broadcast(type='web', task=remove_unreferenced_artifacts, args=[])
+
+
 @app.task(queue='web')
 def symlink_subproject(project_pk):
     project = Project.objects.get(pk=project_pk)
     for symlink in [PublicSymlink, PrivateSymlink]:
         sym = symlink(project=project)
+        sym.sanity_check()
         sym.symlink_subprojects()
 
 
@@ -1358,9 +1543,9 @@ def fileify(version_pk, commit, build):
         }
     )
     try:
-        changed_files = _create_imported_files(version, commit, build)
+        changed_files, unchanged_pks = _create_imported_files(version, commit, build)
     except Exception:
-        changed_files = set()
+        changed_files, unchanged_pks = set(), []
         log.exception('Failed during ImportedFile creation')
 
     try:
@@ -1369,7 +1554,7 @@ def fileify(version_pk, commit, build):
         log.exception('Failed during SphinxDomain creation')
 
     try:
-        _sync_imported_files(version, build, changed_files)
+        _sync_imported_files(version, build, changed_files, unchanged_pks)
     except Exception:
         log.exception('Failed during ImportedFile syncing')
 
@@ -1407,27 +1592,21 @@ def _create_intersphinx_data(version, commit, build):
         except Exception:
             log.exception('Exception parsing readthedocs-sphinx-domain-names.json')
 
-    # These classes are copied from Sphinx
-    # https://git.io/fhFbI
-    class MockConfig:
-        intersphinx_timeout = None
-        tls_verify = False
-
-    class MockApp:
-        srcdir = ''
-        config = MockConfig()
-
-        def warn(self, msg):
-            log.warning('Sphinx MockApp: %s', msg)
-
-    # Re-create all objects from the new build of the version
-    object_file_url = storage.url(object_file)
-    if object_file_url.startswith('/'):
-        # Filesystem backed storage simply prepends MEDIA_URL to the path to get the URL
-        # This can cause an issue if MEDIA_URL is not fully qualified
-        object_file_url = 'http://' + settings.PRODUCTION_DOMAIN + object_file_url
+    # Read the inventory straight from storage instead of fetching it
+    # over HTTP from our own servers. Sphinx decompresses it incrementally.
+    with storage.open(object_file, 'rb') as fd:
+        invdata = InventoryFile.load(fd, '', posixpath.join)
+
+    # Map of ``path -> pk`` of the HTMLFiles from this build,
+    # so we don't need to query them for each inventory entry.
+    html_files = dict(
+        HTMLFile.objects
+        .filter(project=version.project, version=version, build=build)
+        .values_list('path', 'pk')
+    )
 
-    invdata = intersphinx.fetch_inventory(MockApp(), '', object_file_url)
+    start = time.time()
+    domains = []
     for key, value in sorted(invdata.items() or {}):
         domain, _type = key.split(':')
         for name, einfo in sorted(value.items()):
@@ -1463,12 +1642,9 @@ def _create_intersphinx_data(version, commit, build):
             if doc_name.endswith('/'):
                 doc_name += 'index.html'
 
-            html_file = HTMLFile.objects.filter(
-                project=version.project, version=version,
-                path=doc_name, build=build,
-            ).first()
+            html_file_id = html_files.get(doc_name)
 
-            if not html_file:
+            if not html_file_id:
                 log.debug('[%s] [%s] [Build: %s] HTMLFile object not found. File: %s' % (
                     version.project,
                     version,
@@ -1480,10 +1656,10 @@ def _create_intersphinx_data(version, commit, build):
                 # if the HTMLFile object is not found.
                 continue
 
-            SphinxDomain.objects.create(
+            domains.append(SphinxDomain(
                 project=version.project,
                 version=version,
-                html_file=html_file,
+                html_file_id=html_file_id,
                 domain=domain,
                 name=name,
                 display_name=display_name,
@@ -1494,7 +1670,26 @@ def _create_intersphinx_data(version, commit, build):
                 anchor=anchor,
                 commit=commit,
                 build=build,
-            )
+            ))
+
+    SphinxDomain.objects.bulk_create(
+        domains,
+        batch_size=settings.RTD_FILEIFY_BATCH_SIZE,
+    )
+
+    elapsed = time.time() - start
+    log.info(
+        LOG_TEMPLATE,
+        {
+            'project': version.project.slug,
+            'version': version.slug,
+            'msg': 'Created {} SphinxDomains in {:.2f}s ({:.0f} entries/s)'.format(
+                len(domains),
+                elapsed,
+                len(domains) / elapsed if elapsed else len(domains),
+            ),
+        }
+    )
 
 
 def clean_build(version_pk):
@@ -1533,63 +1728,75 @@ def _create_imported_files(version, commit, build):
     """
     Create imported files for version.
 
+    The files tracked by the previous build are loaded in one query and
+    compared against the files in storage, so only the new and changed files
+    are inserted. Unchanged files are kept and moved to the new build; files
+    that were removed or changed are left with their old build id and deleted
+    by ``_sync_imported_files``.
+
     :param version: Version instance
     :param commit: Commit that updated path
     :param build: Build id
-    :returns: paths of changed files
-    :rtype: set
+    :returns: paths of changed files, and pks of the unchanged files
+    :rtype: tuple
     """
     storage = get_storage_class(settings.RTD_BUILD_MEDIA_STORAGE)()
 
     changed_files = set()
 
+    # Map of ``path -> (pk, md5)`` of the files from the previous builds.
+    # When a path is duplicated, the most recent object wins.
+    previous_files = {}
+    queryset = (
+        ImportedFile.objects
+        .filter(project=version.project, version=version)
+        .order_by('modified_date', 'pk')
+        .values_list('pk', 'path', 'md5')
+    )
+    for pk, path, md5 in queryset.iterator():
+        previous_files[path] = (pk, md5)
+
     # Re-create all objects from the new build of the version
     storage_path = version.project.get_storage_path(
         type_='html', version_slug=version.slug, include_file=False
     )
+    files = []
     for root, __, filenames in storage.walk(storage_path):
         for filename in filenames:
-            if filename.endswith('.html'):
-                model_class = HTMLFile
-            elif version.project.cdn_enabled:
-                # We need to track all files for CDN enabled projects so the files can be purged
-                model_class = ImportedFile
-            else:
-                # For projects not behind a CDN, we don't care about non-HTML
+            # We need to track all files for CDN enabled projects so the files can be purged.
+            # For projects not behind a CDN, we don't care about non-HTML
+            if not filename.endswith('.html') and not version.project.cdn_enabled:
                 continue
 
             full_path = storage.join(root, filename)
 
             # Generate a relative path for storage similar to os.path.relpath
             relpath = full_path.replace(storage_path, '', 1).lstrip('/')
+            files.append((full_path, relpath, filename))
 
-            try:
-                md5 = hashlib.md5(storage.open(full_path, 'rb').read()).hexdigest()
-            except Exception:
-                log.exception(
-                    'Error while generating md5 for %s:%s:%s. Don\'t stop.',
-                    version.project.slug,
-                    version.slug,
-                    relpath,
-                )
-                md5 = ''
-            # Keep track of changed files to be purged in the CDN
-            obj = (
-                model_class.objects
-                .filter(project=version.project, version=version, path=relpath)
-                .order_by('-modified_date')
-                .first()
+    md5s = _get_files_md5(version, storage, [full_path for full_path, __, __ in files])
+
+    unchanged_pks = []
+    new_files = []
+
+    for (__, relpath, filename), md5 in zip(files, md5s):
+        previous_pk, previous_md5 = previous_files.get(relpath, (None, None))
+        if previous_pk and md5 and previous_md5 == md5:
+            unchanged_pks.append(previous_pk)
+            continue
+
+        # Keep track of changed files to be purged in the CDN
+        if previous_pk and md5:
+            changed_files.add(
+                resolve_path(
+                    version.project,
+                    filename=relpath,
+                    version_slug=version.slug,
+                ),
             )
-            if obj and md5 and obj.md5 != md5:
-                changed_files.add(
-                    resolve_path(
-                        version.project,
-                        filename=relpath,
-                        version_slug=version.slug,
-                    ),
-                )
-            # Create imported files from new build
-            model_class.objects.create(
+        # HTMLFile is a proxy model, so all the objects share the same table
+        new_files.append(
+            ImportedFile(
                 project=version.project,
                 version=version,
                 path=relpath,
@@ -1597,29 +1804,107 @@ def _create_imported_files(version, commit, build):
                 md5=md5,
                 commit=commit,
                 build=build,
+            ),
+        )
+
+    batch_size = settings.RTD_FILEIFY_BATCH_SIZE
+
+    # Move unchanged files to the new build
+    for pks in chunked(unchanged_pks, batch_size):
+        (
+            ImportedFile.objects
+            .filter(pk__in=pks)
+            .update(commit=commit, build=build)
+        )
+
+    # Create imported files from new build
+    ImportedFile.objects.bulk_create(new_files, batch_size=batch_size)
+
+    log.info(
+        LOG_TEMPLATE,
+        {
+            'project': version.project.slug,
+            'version': version.slug,
+            'msg': 'ImportedFiles synced. new={} changed={} unchanged={}'.format(
+                len(new_files) - len(changed_files),
+                len(changed_files),
+                len(unchanged_pks),
+            ),
+        }
+    )
+
+    return changed_files, unchanged_pks
+
+
+def _get_files_md5(version, storage, paths):
+    """
+    Hash the files from storage using a pool of threads.
+
+    :param version: Version instance
+    :param storage: storage where the files live
+    :param paths: paths of the files to hash
+    :returns: the md5 of each file, in the same order of ``paths``.
+              An empty string is returned for files that can't be hashed.
+    :rtype: list
+    """
+
+    def get_md5(path):
+        try:
+            return storage.get_md5(path)
+        except Exception:
+            log.exception(
+                'Error while generating md5 for %s:%s:%s. Don\'t stop.',
+                version.project.slug,
+                version.slug,
+                path,
             )
+            return ''
 
-    return changed_files
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=settings.RTD_FILEIFY_HASH_WORKERS) as executor:
+        md5s = list(executor.map(get_md5, paths))
+
+    log.info(
+        LOG_TEMPLATE,
+        {
+            'project': version.project.slug,
+            'version': version.slug,
+            'msg': 'Hashed {} files in {:.2f}s'.format(len(md5s), time.time() - start),
+        }
+    )
+    return md5s
 
 
-def _sync_imported_files(version, build, changed_files):
+def _sync_imported_files(version, build, changed_files, unchanged_pks=()):
     """
     Sync/Update/Delete ImportedFiles objects of this version.
 
     :param version: Version instance
     :param build: Build id
     :param changed_files: path of changed files
+    :param unchanged_pks: pks of the files moved unchanged to the build
     """
 
-    # Index new HTMLFiles to ElasticSearch
-    index_new_files(model=HTMLFile, version=version, build=build)
-
-    # Remove old HTMLFiles from ElasticSearch
-    remove_indexed_files(
-        model=HTMLFile,
-        version=version,
-        build=build,
-    )
+    if settings.ES_INCREMENTAL_INDEXING:
+        # Index only new and changed HTMLFiles to ElasticSearch,
+        # update the version and project fields of the unchanged ones,
+        # and remove the old ones by id
+        index_changed_files(
+            model=HTMLFile,
+            version=version,
+            build=build,
+            unchanged_ids=unchanged_pks,
+        )
+    else:
+        # Index new HTMLFiles to ElasticSearch
+        index_new_files(model=HTMLFile, version=version, build=build)
+
+        # Remove old HTMLFiles from ElasticSearch
+        remove_indexed_files(
+            model=HTMLFile,
+            version=version,
+            build=build,
+        )
 
     # Delete SphinxDomain objects from previous versions
     # This has to be done before deleting ImportedFiles and not with a cascade,
@@ -1632,13 +1917,15 @@ def _sync_imported_files(version, build, changed_files):
     )
 
     # Delete ImportedFiles objects (including HTMLFiles)
-    # from the previous build of the version.
-    (
+    # from the previous build of the version, in batches.
+    stale_pks = list(
         ImportedFile.objects
         .filter(project=version.project, version=version)
         .exclude(build=build)
-        .delete()
+        .values_list('pk', flat=True)
     )
+    for pks in chunked(stale_pks, settings.RTD_FILEIFY_BATCH_SIZE):
+        ImportedFile.objects.filter(pk__in=pks).delete()
 
     # Send signal with changed files
     files_changed.send(
@@ -1817,14 +2104,14 @@ def remove_dirs(paths):
     """
     Remove artifacts from servers.
 
-    This is mainly a wrapper around shutil.rmtree so that we can remove things across
+    This is mainly a wrapper around remove_directory so that we can remove things across
     every instance of a type of server (eg. all builds or all webs).
 
     :param paths: list containing PATHs where file is on disk
     """
     for path in paths:
         log.info('Removing %s', path)
-        shutil.rmtree(path, ignore_errors=True)
+        remove_directory(path)
 
 
 @app.task(queue='web')
@@ -79,7 +79,13 @@ class MockApi:
         return ProjectData()
 
     def build(self, _):
-        return mock.Mock(**{'get.return_value': {'id': 123, 'state': 'triggered'}})
+        return mock.Mock(**{
+            'get.return_value': {'id': 123, 'state': 'triggered'},
+            'start.post.return_value': {
+                'build': {'id': 123, 'state': 'cloning'},
+                'started': True,
+            },
+        })
 
     def command(self, _):
         return mock.Mock(**{'get.return_value': {}})
@@ -37,7 +37,12 @@ from readthedocs.api.v2.views.integrations import (
     GitLabWebhookView,
 )
 from readthedocs.api.v2.views.task_views import get_status_data
-from readthedocs.builds.constants import LATEST, EXTERNAL
+from readthedocs.builds.constants import (
+    BUILD_STATE_CLONING,
+    BUILD_STATE_TRIGGERED,
+    EXTERNAL,
+    LATEST,
+)
 from readthedocs.builds.models import Build, BuildCommandResult, Version
 from readthedocs.integrations.models import Integration
 from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
@@ -572,6 +577,32 @@ class APIBuildTests(TestCase):
         build = resp.data
         self.assertEqual(len(build['results']), 1)
 
+    def test_start_build(self):
+        """The build is moved out of the queue only once."""
+        build = get(
+            Build, project_id=1, version_id=1, commit='a1b2',
+            state=BUILD_STATE_TRIGGERED,
+        )
+        client = APIClient()
+        client.login(username='super', password='test')
+        resp = client.post('/api/v2/build/{}/start/'.format(build.pk), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.data['started'])
+        self.assertEqual(resp.data['build']['state'], BUILD_STATE_CLONING)
+        self.assertEqual(resp.data['build']['commit'], 'a1b2')
+
+        resp = client.post('/api/v2/build/{}/start/'.format(build.pk), format='json')
+        self.assertFalse(resp.data['started'])
+
+    def test_start_build_without_permission(self):
+        build = get(Build, project_id=1, version_id=1, state=BUILD_STATE_TRIGGERED)
+        client = APIClient()
+        client.force_authenticate(user=get(User, is_staff=False))
+        resp = client.post('/api/v2/build/{}/start/'.format(build.pk), format='json')
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        build.refresh_from_db()
+        self.assertEqual(build.state, BUILD_STATE_TRIGGERED)
+
 
 class APITests(TestCase):
     fixtures = ['eric.json', 'test_data.json']
@@ -2149,6 +2180,7 @@ class APIVersionTests(TransactionTestCase):
                 'container_image': None,
                 'container_mem_limit': None,
                 'container_time_limit': None,
+                'build_queue': None,
                 'default_branch': None,
                 'default_version': 'latest',
                 'description': '',
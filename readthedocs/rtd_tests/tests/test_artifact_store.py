@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+
+import mock
+from django.test import TestCase, override_settings
+
+from readthedocs.builds import artifacts
+from readthedocs.builds.syncers import LocalSyncer
+
+
+files_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
+
+
+class TestArtifactStore(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store_root = os.path.join(self.root, 'store')
+        override = override_settings(
+            USE_ARTIFACT_STORE=True,
+            ARTIFACT_STORE_ROOT=self.store_root,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_versions_share_the_stored_files(self):
+        latest = os.path.join(self.root, 'latest')
+        stable = os.path.join(self.root, 'stable')
+        LocalSyncer.copy(files_dir, latest)
+        LocalSyncer.copy(files_dir, stable)
+
+        for path in ['conf.py', 'test.html', 'api.fjson', 'api/index.html']:
+            self.assertTrue(
+                os.path.samefile(os.path.join(latest, path), os.path.join(stable, path)),
+            )
+        self.assertEqual(
+            sum(len(files) for __, __, files in os.walk(self.store_root)),
+            4,
+        )
+
+    def test_link_directory_applies_changes(self):
+        source = os.path.join(self.root, 'source')
+        target = os.path.join(self.root, 'target')
+        shutil.copytree(files_dir, source)
+
+        self.assertEqual(artifacts.link_directory(source, target), (4, 0, 0))
+        self.assertEqual(artifacts.link_directory(source, target), (0, 4, 0))
+
+        with open(os.path.join(source, 'conf.py'), 'w') as fd:
+            fd.write('changed')
+        os.remove(os.path.join(source, 'api', 'index.html'))
+        self.assertEqual(artifacts.link_directory(source, target), (1, 2, 1))
+
+        with open(os.path.join(target, 'conf.py')) as fd:
+            self.assertEqual(fd.read(), 'changed')
+        self.assertFalse(os.path.exists(os.path.join(target, 'api')))
+
+    @override_settings(ARTIFACT_STORE_GC_GRACE_PERIOD=-1)
+    def test_collect_garbage(self):
+        target = os.path.join(self.root, 'target')
+        artifacts.link_directory(files_dir, target)
+        self.assertEqual(artifacts.collect_garbage(), (0, 0))
+
+        os.remove(os.path.join(target, 'conf.py'))
+        removed, size = artifacts.collect_garbage()
+        self.assertEqual(removed, 1)
+        self.assertEqual(size, os.path.getsize(os.path.join(files_dir, 'conf.py')))
+        self.assertTrue(os.path.exists(os.path.join(target, 'test.html')))
+
+    def test_collect_garbage_keeps_new_files(self):
+        stored_path = artifacts.store_file(os.path.join(files_dir, 'conf.py'))
+        tmp_path = os.path.join(os.path.dirname(stored_path), '.conf.1.tmp')
+        open(tmp_path, 'w').close()
+        self.assertEqual(artifacts.collect_garbage(), (0, 0))
+        self.assertTrue(os.path.exists(stored_path))
+
+        with override_settings(ARTIFACT_STORE_GC_GRACE_PERIOD=-1):
+            self.assertEqual(artifacts.collect_garbage()[0], 2)
+        self.assertFalse(os.path.exists(stored_path))
+        self.assertFalse(os.path.exists(tmp_path))
+
+    def test_link_file_stores_collected_file(self):
+        source = os.path.join(files_dir, 'conf.py')
+        target = os.path.join(self.root, 'target', 'conf.py')
+        store_file = artifacts.store_file
+        stored_path = store_file(source)
+
+        def collected(path):
+            # The stored file is collected before being linked
+            os.remove(stored_path)
+            mocked.side_effect = store_file
+            return stored_path
+
+        with mock.patch.object(artifacts, 'store_file', side_effect=collected) as mocked:
+            self.assertTrue(artifacts.link_file(source, target))
+        self.assertTrue(os.path.samefile(target, stored_path))
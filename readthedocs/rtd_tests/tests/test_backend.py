@@ -6,7 +6,9 @@ from tempfile import mkdtemp
 import textwrap
 
 import django_dynamic_fixture as fixture
+import git
 from django.contrib.auth.models import User
+from django.test import override_settings
 from mock import Mock, patch
 
 from readthedocs.builds.constants import EXTERNAL
@@ -23,6 +25,7 @@ from readthedocs.rtd_tests.utils import (
     make_test_git,
     make_test_hg,
 )
+from readthedocs.vcs_support.backends.git import get_mirror_stats
 
 
 class TestGitBackend(RTDTestCase):
@@ -111,6 +114,29 @@ class TestGitBackend(RTDTestCase):
         self.assertEqual(code, 0)
         self.assertTrue(exists(repo.working_dir))
 
+    @override_settings(RTD_GIT_MIRROR=True)
+    def test_git_update_with_mirror(self):
+        repo = self.project.vcs_repo()
+        code, _, _ = repo.update()
+        self.assertEqual(code, 0)
+        self.assertTrue(exists(repo.mirror_path))
+        alternates_path = os.path.join(repo.working_dir, '.git', 'objects', 'info', 'alternates')
+        with open(alternates_path) as fd:
+            self.assertEqual(fd.read().strip(), os.path.join(repo.mirror_path, 'objects'))
+
+        # Other versions use the same mirror
+        other_repo = self.project.vcs_repo(version='other')
+        code, _, _ = other_repo.update()
+        self.assertEqual(code, 0)
+        self.assertEqual(other_repo.mirror_path, repo.mirror_path)
+        code, _, _ = other_repo.checkout()
+        self.assertEqual(code, 0)
+
+        # Updating the existing checkouts fetches the mirror again
+        code, _, _ = repo.update()
+        self.assertEqual(code, 0)
+        self.assertGreater(get_mirror_stats()['saved'], 0)
+
     @patch('readthedocs.vcs_support.backends.git.Backend.fetch')
     def test_git_update_with_external_version(self, fetch):
         version = fixture.get(
@@ -166,6 +192,33 @@ class TestGitBackend(RTDTestCase):
             {vcs.verbose_name for vcs in repo.tags},
         )
 
+    def test_git_remote_refs(self):
+        repo_path = self.project.repo
+        create_git_branch(repo_path, 'develop')
+        create_git_tag(repo_path, 'v01')
+        create_git_tag(repo_path, 'v02', annotated=True)
+        create_git_tag(repo_path, 'release-ünîø∂é')
+        # A tag pointing to a blob is skipped
+        remote = git.Repo(repo_path)
+        blob = remote.git.hash_object('-w', os.path.join(repo_path, 'README'))
+        remote.git.tag('blob', blob)
+
+        repo = self.project.vcs_repo()
+        branches, tags = repo.get_remote_refs()
+        self.assertFalse(exists(repo.working_dir))
+        self.assertNotIn('blob', {vcs.verbose_name for vcs in tags})
+
+        repo.update()
+        self.assertEqual(
+            {(vcs.identifier, vcs.verbose_name) for vcs in branches},
+            {(vcs.identifier, vcs.verbose_name) for vcs in repo.branches},
+        )
+        self.assertIn('develop', {vcs.verbose_name for vcs in branches})
+        self.assertEqual(
+            {(vcs.identifier, vcs.verbose_name) for vcs in tags},
+            {(vcs.identifier, vcs.verbose_name) for vcs in repo.tags},
+        )
+
     def test_check_for_submodules(self):
         repo = self.project.vcs_repo()
 
@@ -1,10 +1,19 @@
+import hashlib
 import os
 import shutil
 import tempfile
 
+import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.test import TestCase
 
-from readthedocs.builds.storage import BuildMediaFileSystemStorage
+from readthedocs.builds.storage import (
+    MD5_CHUNK_SIZE,
+    BuildMediaFileSystemStorage,
+    BuildMediaStorageMixin,
+    TransferMetrics,
+)
 
 
 files_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
@@ -44,6 +53,35 @@ class TestBuildMediaStorage(TestCase):
         self.assertEqual(dirs, [])
         self.assertEqual(files, [])
 
+    def test_copy_directory_skips_unchanged_files(self):
+        metrics = TransferMetrics()
+        self.storage.copy_directory(files_dir, 'files', metrics=metrics)
+        self.assertEqual(metrics.copied, 4)
+        self.assertEqual(metrics.skipped, 0)
+
+        self.storage.save('files/conf.py', ContentFile(b'changed'))
+        self.storage.delete('files/api/index.html')
+
+        metrics = TransferMetrics()
+        self.storage.copy_directory(files_dir, 'files', metrics=metrics)
+        self.assertEqual(metrics.copied, 2)
+        self.assertEqual(metrics.skipped, 2)
+        self.assertEqual(
+            metrics.bytes,
+            os.path.getsize(os.path.join(files_dir, 'conf.py')) +
+            os.path.getsize(os.path.join(files_dir, 'api', 'index.html')),
+        )
+        with open(os.path.join(files_dir, 'conf.py'), 'rb') as fd:
+            self.assertEqual(self.storage.open('files/conf.py').read(), fd.read())
+
+    def test_delete_directory_metrics(self):
+        self.storage.copy_directory(files_dir, 'files')
+
+        metrics = TransferMetrics()
+        self.storage.delete_directory('files', metrics=metrics)
+        self.assertEqual(metrics.deleted, 4)
+        self.assertFalse(self.storage.exists('files/api/index.html'))
+
     def test_walk(self):
         self.storage.copy_directory(files_dir, 'files')
 
@@ -59,3 +97,66 @@ class TestBuildMediaStorage(TestCase):
         self.assertEqual(top, 'files/api')
         self.assertCountEqual(dirs, [])
         self.assertCountEqual(files, ['index.html'])
+
+    def test_get_md5(self):
+        self.storage.copy_directory(files_dir, 'files')
+
+        with open(os.path.join(files_dir, 'conf.py'), 'rb') as fd:
+            expected = hashlib.md5(fd.read()).hexdigest()
+        self.assertEqual(self.storage.get_md5('files/conf.py'), expected)
+
+    def test_get_md5_multiple_chunks(self):
+        content = os.urandom(MD5_CHUNK_SIZE * 2 + 10)
+        self.storage.save('files/big.bin', ContentFile(content))
+        self.assertEqual(
+            self.storage.get_md5('files/big.bin'),
+            hashlib.md5(content).hexdigest(),
+        )
+
+
+class BucketStorage(BuildMediaStorageMixin, FileSystemStorage):
+
+    """Storage with the bucket of the S3 compatible storages."""
+
+    def __init__(self, bucket, **kwargs):
+        super().__init__(**kwargs)
+        self.bucket = bucket
+
+    def _clean_name(self, name):
+        return name
+
+    def _normalize_name(self, name):
+        return name
+
+
+class TestBucketStorage(TestCase):
+    def setUp(self):
+        self.test_media_dir = tempfile.mkdtemp()
+        self.bucket = mock.MagicMock()
+        self.storage = BucketStorage(self.bucket, location=self.test_media_dir)
+        self.storage.copy_directory(files_dir, 'files')
+        with open(os.path.join(files_dir, 'conf.py'), 'rb') as fd:
+            self.md5 = hashlib.md5(fd.read()).hexdigest()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_media_dir, ignore_errors=True)
+
+    def _copy(self):
+        metrics = TransferMetrics()
+        with mock.patch.object(self.storage, 'open') as storage_open:
+            self.storage.copy_directory(files_dir, 'files', metrics=metrics)
+        storage_open.assert_not_called()
+        return metrics
+
+    def test_copy_directory_compares_etag(self):
+        self.bucket.Object.return_value.e_tag = '"{}"'.format(self.md5)
+        metrics = self._copy()
+        self.assertEqual(metrics.skipped, 1)
+        self.assertEqual(metrics.copied, 3)
+        self.bucket.Object.assert_any_call('files/conf.py')
+
+    def test_copy_directory_multipart_etag(self):
+        self.bucket.Object.return_value.e_tag = '"{}-2"'.format(self.md5)
+        metrics = self._copy()
+        self.assertEqual(metrics.skipped, 0)
+        self.assertEqual(metrics.copied, 4)
@@ -378,6 +378,38 @@ class BuildEnvironmentTests(TransactionTestCase):
         })
         self.assertEqual(task.get_env_vars(), env)
 
+    @mock.patch('readthedocs.projects.tasks.api_v2')
+    def test_build_unchanged(self, api_v2):
+        project = get(
+            Project,
+            slug='project',
+            documentation_type='sphinx',
+        )
+        version = get(Version, slug='1.8', project=project, built=True)
+        task = UpdateDocsTaskStep(
+            project=project, version=version, build={'id': 1, 'commit': 'a1b2c3'},
+        )
+        task.build_env = LocalBuildEnvironment(project=project, version=version, build={})
+        task.config = mock.Mock(**{'as_dict.return_value': {'version': '2'}})
+        fingerprint = task.get_build_fingerprint()
+        task.build['fingerprint'] = fingerprint
+
+        api_v2.build.get.return_value = {'results': [{'fingerprint': fingerprint}]}
+        self.assertTrue(task.is_build_unchanged())
+
+        task.rebuild = True
+        self.assertFalse(task.is_build_unchanged())
+        task.rebuild = False
+
+        # Changing the environment variables changes the fingerprint
+        get(EnvironmentVariable, name='TOKEN', value='a1b2c3', project=project)
+        self.assertNotEqual(task.get_build_fingerprint(), fingerprint)
+
+        api_v2.build.get.return_value = {'results': [{'fingerprint': 'other'}]}
+        self.assertFalse(task.is_build_unchanged())
+        api_v2.build.get.return_value = {'results': []}
+        self.assertFalse(task.is_build_unchanged())
+
 
 class BuildModelTests(TransactionTestCase):
     reset_sequences = True
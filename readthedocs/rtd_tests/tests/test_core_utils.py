@@ -10,7 +10,8 @@ from mock import call
 
 from readthedocs.builds.constants import LATEST
 from readthedocs.builds.models import Version
-from readthedocs.core.utils import slugify, trigger_build
+from readthedocs.builds.scheduling import get_build_queue, get_queue_stats, start_build
+from readthedocs.core.utils import chunked, slugify, trigger_build
 from readthedocs.core.utils.general import wipe_version_via_slugs
 from readthedocs.projects.models import Project
 from readthedocs.projects.tasks import remove_dirs
@@ -52,7 +53,8 @@ class CoreUtilTests(TestCase):
             'record': True,
             'force': False,
             'build_pk': mock.ANY,
-            'commit': None
+            'commit': None,
+            'rebuild': False,
         }
 
         update_docs_task.signature.assert_called_with(
@@ -75,7 +77,8 @@ class CoreUtilTests(TestCase):
             'record': True,
             'force': False,
             'build_pk': mock.ANY,
-            'commit': None
+            'commit': None,
+            'rebuild': False,
         }
 
         update_docs_task.signature.assert_called_with(
@@ -94,7 +97,8 @@ class CoreUtilTests(TestCase):
             'record': True,
             'force': False,
             'build_pk': mock.ANY,
-            'commit': None
+            'commit': None,
+            'rebuild': False,
         }
         options = {
             'queue': 'build03',
@@ -116,7 +120,8 @@ class CoreUtilTests(TestCase):
             'record': True,
             'force': False,
             'build_pk': mock.ANY,
-            'commit': None
+            'commit': None,
+            'rebuild': False,
         }
         options = {
             'queue': mock.ANY,
@@ -139,7 +144,8 @@ class CoreUtilTests(TestCase):
             'record': True,
             'force': False,
             'build_pk': mock.ANY,
-            'commit': None
+            'commit': None,
+            'rebuild': False,
         }
         options = {
             'queue': mock.ANY,
@@ -162,7 +168,8 @@ class CoreUtilTests(TestCase):
             'record': True,
             'force': False,
             'build_pk': mock.ANY,
-            'commit': None
+            'commit': None,
+            'rebuild': False,
         }
         options = {
             'queue': mock.ANY,
@@ -176,6 +183,41 @@ class CoreUtilTests(TestCase):
             immutable=True,
         )
 
+    @mock.patch('readthedocs.projects.tasks.update_docs_task')
+    def test_trigger_build_coalesced(self, update_docs):
+        """A build of a version with a queued build is merged into it."""
+        __, build = trigger_build(project=self.project, version=self.version, commit='a1b2')
+        result, coalesced_build = trigger_build(
+            project=self.project,
+            version=self.version,
+            commit='c3d4',
+        )
+        self.assertIsNone(result)
+        self.assertEqual(coalesced_build.pk, build.pk)
+        self.assertEqual(update_docs.signature().apply_async.call_count, 1)
+        build.refresh_from_db()
+        self.assertEqual(build.commit, 'c3d4')
+        self.assertEqual(get_queue_stats()[get_build_queue(self.project)]['depth'], 1)
+
+        # Rebuilds aren't coalesced
+        __, rebuild = trigger_build(project=self.project, version=self.version, rebuild=True)
+        self.assertNotEqual(rebuild.pk, build.pk)
+        self.assertEqual(update_docs.signature().apply_async.call_count, 2)
+
+    @mock.patch('readthedocs.projects.tasks.update_docs_task')
+    def test_trigger_build_not_coalesced_after_start(self, update_docs):
+        """A build started by its task doesn't get the new commits."""
+        __, build = trigger_build(project=self.project, version=self.version, commit='a1b2')
+        self.assertTrue(start_build(build))
+        self.assertFalse(start_build(build))
+
+        __, new_build = trigger_build(project=self.project, version=self.version, commit='c3d4')
+        self.assertNotEqual(new_build.pk, build.pk)
+        self.assertEqual(update_docs.signature().apply_async.call_count, 2)
+        build.refresh_from_db()
+        self.assertEqual(build.commit, 'a1b2')
+        self.assertEqual(new_build.commit, 'c3d4')
+
     def test_slugify(self):
         """Test additional slugify."""
         self.assertEqual(
@@ -199,6 +241,14 @@ class CoreUtilTests(TestCase):
             'a-title_-_with-separated-parts',
         )
 
+    def test_chunked(self):
+        self.assertEqual(
+            list(chunked(range(5), 2)),
+            [[0, 1], [2, 3], [4]],
+        )
+        self.assertEqual(list(chunked(range(4), 2)), [[0, 1], [2, 3]])
+        self.assertEqual(list(chunked([], 2)), [])
+
     @mock.patch('readthedocs.core.utils.general.broadcast')
     def test_wipe_version_via_slug(self, mock_broadcast):
         wipe_version_via_slugs(
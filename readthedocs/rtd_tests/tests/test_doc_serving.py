@@ -5,7 +5,9 @@ import mock
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.http import Http404, HttpResponse
+from django.db import connection
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.test.utils import override_settings
 from django.urls import reverse
 from mock import mock_open, patch
@@ -14,9 +16,9 @@ from readthedocs.builds.constants import LATEST, EXTERNAL, INTERNAL
 from readthedocs.builds.models import Version
 from readthedocs.core.middleware import SubdomainMiddleware
 from readthedocs.core.views import server_error_404_subdomain
-from readthedocs.core.views.serve import _serve_symlink_docs
+from readthedocs.core.views.serve import _serve_symlink_docs, serve_docs
 from readthedocs.projects import constants
-from readthedocs.projects.models import Project
+from readthedocs.projects.models import Domain, Project
 from readthedocs.rtd_tests.base import RequestFactoryTestMixin
 
 
@@ -380,3 +382,68 @@ class TestPublicDocs(BaseDocServing):
             f'/docs/{project.slug}/en/latest/'
         )
         self.assertEqual(request.status_code, 200)
+
+
+@override_settings(SERVE_DOCS=[constants.PUBLIC], PYTHON_MEDIA=False)
+class TestDocServingRoutes(BaseDocServing):
+
+    def setUp(self):
+        super().setUp()
+        self.version = self.public.versions.get(slug=LATEST)
+        self.version.active = True
+        self.version.privacy_level = constants.PUBLIC
+        self.version.save()
+
+    def serve(self):
+        request = self.request(self.public_url)
+        return serve_docs(
+            request,
+            project_slug='public',
+            lang_slug='en',
+            version_slug='latest',
+            filename='usage.html',
+        )
+
+    @mock.patch('readthedocs.core.views.serve.os.path.exists', return_value=True)
+    def test_cached_route_is_served_without_queries(self, exists):
+        response = self.serve()
+        self.assertEqual(
+            response._headers['x-accel-redirect'][1],
+            '/public_web_root/public/en/latest/usage.html',
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.serve()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(
+            response._headers['x-accel-redirect'][1],
+            '/public_web_root/public/en/latest/usage.html',
+        )
+
+    @mock.patch('readthedocs.core.views.serve.os.path.exists', return_value=True)
+    def test_route_is_invalidated_on_version_save(self, exists):
+        self.assertEqual(self.serve().status_code, 200)
+
+        self.version.privacy_level = constants.PRIVATE
+        self.version.save()
+        self.assertEqual(self.serve().status_code, 401)
+
+    @override_settings(USE_SUBDOMAIN=True, PUBLIC_DOMAIN='readthedocs.io')
+    def test_domain_is_cached(self):
+        fixture.get(Domain, domain='docs.example.com', project=self.public)
+        middleware = SubdomainMiddleware()
+
+        request = RequestFactory().get('/', HTTP_HOST='docs.example.com')
+        middleware.process_request(request)
+        self.assertEqual(request.slug, 'public')
+
+        request = RequestFactory().get('/', HTTP_HOST='docs.example.com')
+        with CaptureQueriesContext(connection) as queries:
+            middleware.process_request(request)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(request.slug, 'public')
+
+        Domain.objects.get(domain='docs.example.com').delete()
+        request = RequestFactory().get('/', HTTP_HOST='docs.example.com')
+        response = middleware.process_request(request)
+        self.assertEqual(response.status_code, 404)
@@ -20,11 +20,13 @@ from rest_framework.response import Response
 
 from readthedocs.builds.constants import LATEST, STABLE
 from readthedocs.builds.models import Version
+from readthedocs.core.resolver import ResolverBase
 from readthedocs.core.signals import webhook_github
 from readthedocs.core.views.serve import serve_docs
+from readthedocs.docsitalia import resolver
 from readthedocs.docsitalia.resolver import ItaliaResolver
 from readthedocs.oauth.models import RemoteOrganization, RemoteRepository
-from readthedocs.projects.models import Project
+from readthedocs.projects.models import Domain, Project
 
 from readthedocs.docsitalia.forms import PublisherAdminForm
 from readthedocs.docsitalia.oauth.services.github import DocsItaliaGithubService
@@ -1050,6 +1052,7 @@ class DocsItaliaTest(TestCase):
               "container_image": None,
               "container_mem_limit": None,
               "container_time_limit": None,
+              "build_queue": None,
               "install_project": False,
               "use_system_packages": False,
               # "suffix": ".rst", TODO merge
@@ -1496,3 +1499,114 @@ class DocsItaliaInternationalSlugTest(RequestFactoryTestMixin, TestCase):
                 privacy_level='public',
                 project=project
             )
+
+
+class ItaliaResolverCacheTest(TestCase):
+
+    def setUp(self):
+        self.resolver = ItaliaResolver()
+        self.publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={},
+            projects_metadata={},
+            active=True
+        )
+        self.pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            metadata={},
+            publisher=self.publisher,
+            active=True
+        )
+        self.projects = [
+            Project.objects.create(
+                name='my project %s' % i,
+                slug='myprojectslug%s' % i,
+                repo='https://github.com/testorg/myrepourl%s.git' % i,
+                language='it'
+            )
+            for i in range(3)
+        ]
+        for project in self.projects:
+            self.pub_project.projects.add(project)
+
+    def _base_resolve_path(self, project):
+        return self.resolver.base_resolve_path(
+            project.slug, 'index.html', version_slug='bozza', language='it',
+        )
+
+    def test_base_resolve_path_is_cached(self):
+        project = self.projects[0]
+        url = '/testorg/testproject/myprojectslug0/it/bozza/index.html'
+        self.assertEqual(self._base_resolve_path(project), url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._base_resolve_path(project), url)
+
+    def test_cache_is_invalidated_on_change(self):
+        project = self.projects[0]
+        self._base_resolve_path(project)
+
+        self.publisher.slug = 'otherorg'
+        self.publisher.save()
+        self.assertEqual(
+            self._base_resolve_path(project),
+            '/otherorg/testproject/myprojectslug0/it/bozza/index.html',
+        )
+
+        self.pub_project.projects.remove(project)
+        self.assertEqual(
+            self._base_resolve_path(project),
+            ResolverBase().base_resolve_path(
+                project.slug, 'index.html', version_slug='bozza', language='it',
+            ),
+        )
+
+    def test_resolve_many(self):
+        resolver.invalidate_projects_info()
+        # publisher projects, versions, parents and canonical domains,
+        # whatever the number of projects
+        with self.assertNumQueries(5):
+            urls = self.resolver.resolve_many(self.projects)
+        for project, url in zip(self.projects, urls):
+            self.assertTrue(url.endswith(
+                '/testorg/testproject/{}/it/{}/'.format(project.slug, LATEST),
+            ))
+        with self.assertNumQueries(0):
+            self.assertEqual(urls, [self.resolver.resolve(project) for project in self.projects])
+
+        # the data of all the projects is fetched at once
+        with self.assertNumQueries(0):
+            for project in self.projects:
+                self._base_resolve_path(project)
+                self.resolver.resolve_domain(project)
+
+    def test_get_projects_info_queries(self):
+        self.projects[0].add_subproject(self.projects[1])
+        Domain.objects.create(project=self.projects[0], domain='docs.example.com', canonical=True)
+        resolver.invalidate_projects_info()
+
+        # publisher projects, versions, two levels of parents and canonical domains
+        with self.assertNumQueries(7):
+            infos = resolver.get_projects_info(self.projects[1:])
+        info = infos[self.projects[1].slug]
+        self.assertEqual(info['canonical_domain'], 'docs.example.com')
+        self.assertEqual(info['path_project_slug'], self.projects[0].slug)
+        self.assertEqual(info['subproject_slug'], self.projects[1].slug)
+        self.assertTrue(info['path_cname'])
+        self.assertIsNone(infos[self.projects[2].slug]['canonical_domain'])
+
+    def test_local_cache_is_invalidated_by_other_processes(self):
+        project = self.projects[0]
+        self._base_resolve_path(project)
+        self.assertIn(project.slug, resolver._local_cache)
+
+        # Another process invalidates the cache, it doesn't clear this local cache
+        with patch.object(resolver, '_local_cache', dict(resolver._local_cache)):
+            PublisherProject.objects.filter(pk=self.pub_project.pk).update(slug='other')
+            generation = resolver.cache.get(resolver.GENERATION_KEY, 0)
+            resolver.cache.set(resolver.GENERATION_KEY, generation + 1, None)
+            self.assertEqual(
+                self._base_resolve_path(project),
+                '/testorg/other/myprojectslug0/it/bozza/index.html',
+            )
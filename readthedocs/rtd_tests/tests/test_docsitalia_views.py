@@ -8,11 +8,19 @@ from requests.exceptions import ConnectionError
 import pytest
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.core.urlresolvers import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import generics
+from rest_framework.response import Response
 from readthedocs.builds.models import Build, Version
 from readthedocs.docsitalia.github import InvalidMetadata
-from readthedocs.docsitalia.models import Publisher, PublisherProject, AllowedTag, ProjectOrder
+from readthedocs.docsitalia.models import (
+    Publisher, PublisherProject, AllowedTag, ProjectOrder, PublishedDocument,
+    refresh_published_documents)
+from readthedocs.docsitalia.search.cache import get_cache_stats
 from readthedocs.docsitalia.views.core_views import (
     DocsItaliaHomePage, PublisherIndex, PublisherProjectIndex, PublisherList)
 from readthedocs.oauth.models import RemoteRepository
@@ -715,3 +723,161 @@ class TestAdminPrivateViews(TestCase):
         for url in urls:
             response = self.client.get(url)
             self.assertEqual(response.status_code, 404)
+
+
+class QuickSearchCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('api_quicksearch')
+        self.results = [{'model': 'documento', 'link': 'https://docs.italia.it/', 'text': 'doc'}]
+
+    def test_quicksearch_results_are_cached(self):
+        with mock.patch.object(
+                generics.ListAPIView, 'list', return_value=Response(self.results)) as search:
+            response = self.client.get(self.url, {'q': 'Doc'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), self.results)
+            # the query is normalized
+            response = self.client.get(self.url, {'q': ' doc  '})
+            self.assertEqual(response.json(), self.results)
+            self.assertEqual(search.call_count, 1)
+
+            self.client.get(self.url, {'q': 'doc', 'model': 'progetto'})
+            self.assertEqual(search.call_count, 2)
+
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 2})
+
+    def test_quicksearch_cache_is_invalidated_on_publisher_save(self):
+        with mock.patch.object(
+                generics.ListAPIView, 'list', return_value=Response(self.results)) as search:
+            self.client.get(self.url, {'q': 'doc'})
+            Publisher.objects.create(
+                name='Test Org',
+                slug='testorg',
+                metadata={},
+                projects_metadata={},
+                active=True
+            )
+            self.client.get(self.url, {'q': 'doc'})
+            self.assertEqual(search.call_count, 2)
+
+
+class PublishedDocumentsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.publisher = Publisher.objects.create(
+            name='Test Org',
+            slug='testorg',
+            metadata={},
+            projects_metadata={},
+            active=True
+        )
+        self.pub_project = PublisherProject.objects.create(
+            name='Test Project',
+            slug='testproject',
+            publisher=self.publisher,
+            active=True
+        )
+        self.project = Project.objects.create(
+            name='my project',
+            slug='projectslug',
+            repo='https://github.com/testorg/myrepourl.git'
+        )
+        self.pub_project.projects.add(self.project)
+
+    def test_published_documents_are_refreshed(self):
+        self.assertFalse(PublishedDocument.objects.exists())
+
+        build = Build.objects.create(
+            project=self.project,
+            version=self.project.versions.first(),
+            type='html',
+            state='finished',
+            success=True
+        )
+        published = PublishedDocument.objects.get()
+        self.assertEqual(published.project, self.project)
+        self.assertEqual(published.publisher_project, self.pub_project)
+        self.assertEqual(published.priority, 0)
+
+        self.pub_project.active = False
+        self.pub_project.save()
+        self.assertFalse(PublishedDocument.objects.exists())
+
+        self.pub_project.active = True
+        self.pub_project.save()
+        build.version.privacy_level = PRIVATE
+        build.version.save()
+        self.assertFalse(PublishedDocument.objects.exists())
+
+    def test_published_documents_are_refreshed_per_project(self):
+        other_project = Project.objects.create(
+            name='other project',
+            slug='otherprojectslug',
+            repo='https://github.com/testorg/otherrepourl.git'
+        )
+        self.pub_project.projects.add(other_project)
+        for project in (self.project, other_project):
+            Build.objects.create(
+                project=project,
+                version=project.versions.first(),
+                type='html',
+                state='finished',
+                success=True
+            )
+        self.assertEqual(PublishedDocument.objects.count(), 2)
+
+        # only the documents of the project of the build are refreshed
+        Build.objects.filter(project=other_project).delete()
+        Build.objects.create(
+            project=self.project,
+            version=self.project.versions.first(),
+            type='html',
+            state='finished',
+            success=True
+        )
+        self.assertEqual(PublishedDocument.objects.count(), 2)
+
+        refresh_published_documents()
+        self.assertEqual(PublishedDocument.objects.get().project, self.project)
+
+        # only the documents of the project of the order are updated
+        order = ProjectOrder.objects.get(project=self.project)
+        order.priority = 10
+        with self.assertNumQueries(2):
+            order.save()
+        self.assertEqual(PublishedDocument.objects.get().priority, 10)
+
+        order = ProjectOrder.objects.get(project=other_project)
+        order.priority = 20
+        with self.assertNumQueries(2):
+            order.save()
+        self.assertEqual(PublishedDocument.objects.get().priority, 10)
+
+        ProjectOrder.objects.filter(project=self.project).delete()
+        self.assertEqual(PublishedDocument.objects.get().priority, 0)
+
+    def test_homepage_fragment_is_invalidated(self):
+        Build.objects.create(
+            project=self.project,
+            version=self.project.versions.first(),
+            type='html',
+            state='finished',
+            success=True
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('homepage'))
+        self.assertContains(response, 'my project')
+
+        # the documents are not queried again
+        with CaptureQueriesContext(connection) as cached_queries:
+            response = self.client.get(reverse('homepage'))
+        self.assertContains(response, 'my project')
+        self.assertLess(len(cached_queries), len(queries))
+
+        self.project.name = 'renamed project'
+        self.project.save()
+        response = self.client.get(reverse('homepage'))
+        self.assertContains(response, 'renamed project')
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 
 import os
-import mock
+import zlib
 
 from django.conf import settings
+from django.core.files.base import ContentFile
 from django.core.files.storage import get_storage_class
 from django.test import TestCase
 
@@ -91,10 +92,63 @@ class ImportedFileTests(TestCase):
         self.assertNotEqual(ImportedFile.objects.get(name='test.html').md5, 'c7532f22a052d716f7b2310fb52ad981')
         self.assertEqual(ImportedFile.objects.count(), 2)
 
-    @mock.patch('readthedocs.projects.tasks.os.path.exists')
-    def test_create_intersphinx_data(self, mock_exists):
-        mock_exists.return_Value = True
+    def test_unchanged_files_are_kept(self):
+        test_dir = os.path.join(base_dir, 'files')
+
+        with open(os.path.join(test_dir, 'test.html'), 'w+') as f:
+            f.write('Woo')
+
+        self._copy_storage_dir()
+
+        self._manage_imported_files(self.version, 'commit01', 1)
+        test_file = ImportedFile.objects.get(name='test.html')
+        api_file = ImportedFile.objects.get(path='api/index.html')
+
+        with open(os.path.join(test_dir, 'test.html'), 'w+') as f:
+            f.write('Something Else')
+
+        self._copy_storage_dir()
+
+        changed_files, unchanged_pks = _create_imported_files(self.version, 'commit02', 2)
+        self.assertEqual(len(changed_files), 1)
+        self.assertEqual(unchanged_pks, [api_file.pk])
+        _sync_imported_files(self.version, 2, changed_files, unchanged_pks)
 
+        self.assertEqual(ImportedFile.objects.count(), 2)
+        # The unchanged file is moved to the new build
+        api_file_new = ImportedFile.objects.get(path='api/index.html')
+        self.assertEqual(api_file_new.pk, api_file.pk)
+        self.assertEqual(api_file_new.build, 2)
+        self.assertEqual(api_file_new.commit, 'commit02')
+        # The changed file is re-created
+        test_file_new = ImportedFile.objects.get(name='test.html')
+        self.assertNotEqual(test_file_new.pk, test_file.pk)
+        self.assertEqual(test_file_new.build, 2)
+
+    def _create_objects_inv(self, inventory):
+        """Write an ``objects.inv`` file with the ``inventory`` entries to storage."""
+        lines = [
+            '{} {} 1 {} {}'.format(name, key, location, display_name)
+            for key, entries in sorted(inventory.items())
+            for name, (_, _, location, display_name) in sorted(entries.items())
+        ]
+        content = (
+            b'# Sphinx inventory version 2\n'
+            b'# Project: dummy-proj\n'
+            b'# Version: dummy-version\n'
+            b'# The remainder of this file is compressed using zlib.\n'
+        ) + zlib.compress('\n'.join(lines).encode() + b'\n')
+        html_path = self.project.get_storage_path(
+            type_='html',
+            version_slug=self.version.slug,
+            include_file=False,
+        )
+        self.storage.save(
+            self.storage.join(html_path, 'objects.inv'),
+            ContentFile(content),
+        )
+
+    def test_create_intersphinx_data(self):
         # Test data for objects.inv file
         test_objects_inv = {
             'cpp:function': {
@@ -123,36 +177,37 @@ class ImportedFileTests(TestCase):
             }
         }
 
-        with mock.patch(
-            'sphinx.ext.intersphinx.fetch_inventory',
-            return_value=test_objects_inv
-        ) as mock_fetch_inventory:
-
-            _create_imported_files(self.version, 'commit01', 1)
-            _create_intersphinx_data(self.version, 'commit01', 1)
-
-            # there will be two html files,
-            # `api/index.html` and `test.html`
-            self.assertEqual(
-                HTMLFile.objects.all().count(),
-                2
-            )
-            self.assertEqual(
-                HTMLFile.objects.filter(path='test.html').count(),
-                1
-            )
-            self.assertEqual(
-                HTMLFile.objects.filter(path='api/index.html').count(),
-                1
-            )
-
-            html_file_api = HTMLFile.objects.filter(path='api/index.html').first()
-
-            self.assertEqual(
-                SphinxDomain.objects.all().count(),
-                3
-            )
-            self.assertEqual(
-                SphinxDomain.objects.filter(html_file=html_file_api).count(),
-                1
-            )
+        self._create_objects_inv(test_objects_inv)
+
+        _create_imported_files(self.version, 'commit01', 1)
+        _create_intersphinx_data(self.version, 'commit01', 1)
+
+        # there will be two html files,
+        # `api/index.html` and `test.html`
+        self.assertEqual(
+            HTMLFile.objects.all().count(),
+            2
+        )
+        self.assertEqual(
+            HTMLFile.objects.filter(path='test.html').count(),
+            1
+        )
+        self.assertEqual(
+            HTMLFile.objects.filter(path='api/index.html').count(),
+            1
+        )
+
+        html_file_api = HTMLFile.objects.filter(path='api/index.html').first()
+
+        self.assertEqual(
+            SphinxDomain.objects.all().count(),
+            3
+        )
+        self.assertEqual(
+            SphinxDomain.objects.filter(html_file=html_file_api).count(),
+            1
+        )
+        domain = SphinxDomain.objects.get(html_file=html_file_api)
+        self.assertEqual(domain.name, 'testFunction')
+        self.assertEqual(domain.anchor, 'test-func')
+        self.assertEqual(domain.display_name, 'dummy-func-name-3')
@@ -11,7 +11,7 @@ from django.urls import reverse
 from django_dynamic_fixture import get
 
 from readthedocs.builds.models import Version
-from readthedocs.core.symlink import PrivateSymlink, PublicSymlink
+from readthedocs.core.symlink import PrivateSymlink, PublicSymlink, symlink_projects
 from readthedocs.projects.models import Domain, Project
 from readthedocs.projects.tasks import (
     broadcast_remove_orphan_symlinks,
@@ -999,6 +999,65 @@ class TestPrivateSymlinkVersions(BaseSymlinkVersions, TempSiteRootTestCase):
     symlink_class = PrivateSymlink
 
 
+class TestSymlinkProjectRoot(TempSiteRootTestCase):
+
+    def test_project_root_does_not_touch_filesystem(self):
+        project = get(Project, slug='pip', main_language_project=None)
+        root = os.path.join(settings.SITE_ROOT, 'public_web_root', 'pip')
+
+        self.assertEqual(PublicSymlink.get_project_root(project.slug), root)
+        self.assertEqual(PublicSymlink(project).project_root, root)
+        self.assertFalse(os.path.lexists(root))
+
+        PublicSymlink(project).sanity_check()
+        self.assertTrue(os.path.isdir(root))
+
+
+class TestSymlinkSync(TempSiteRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.project = get(Project, slug='kong', main_language_project=None)
+        self.project.save()
+        self.stable = get(
+            Version, slug='stable', verbose_name='stable',
+            active=True, project=self.project,
+        )
+
+    def test_only_changed_links_are_written(self):
+        symlink = PublicSymlink(self.project)
+        symlink.run()
+        link = os.path.join(settings.SITE_ROOT, 'public_web_root', 'kong', 'en', 'stable')
+        self.assertEqual(
+            os.readlink(link),
+            os.path.join(settings.DOCROOT, 'kong', 'rtd-builds', 'stable'),
+        )
+
+        symlink = PublicSymlink(self.project)
+        symlink.run()
+        self.assertEqual(symlink.changed, 0)
+
+        os.unlink(link)
+        os.symlink('/nonexistent', link)
+        symlink = PublicSymlink(self.project)
+        symlink.run()
+        self.assertEqual(symlink.changed, 1)
+        self.assertEqual(
+            os.readlink(link),
+            os.path.join(settings.DOCROOT, 'kong', 'rtd-builds', 'stable'),
+        )
+
+    def test_symlink_projects(self):
+        # Delete the version without running the symlink task
+        Version.objects.filter(pk=self.stable.pk).delete()
+        link = os.path.join(settings.SITE_ROOT, 'public_web_root', 'kong', 'en', 'stable')
+        self.assertTrue(os.path.lexists(link))
+
+        self.assertEqual(symlink_projects([self.project]), 1)
+        self.assertFalse(os.path.lexists(link))
+        self.assertEqual(symlink_projects([self.project]), 0)
+
+
 class TestPublicSymlinkUnicode(TempSiteRootTestCase):
 
     def setUp(self):
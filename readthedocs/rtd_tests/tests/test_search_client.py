@@ -0,0 +1,50 @@
+import mock
+
+from django.test import TestCase, override_settings
+
+from readthedocs.search.client import ClientRegistry, TimedConnection
+
+
+@override_settings(
+    ES_CONNECTION_POOL_SIZE=5,
+    ES_HEALTH_CHECK_INTERVAL=60,
+    ES_HEALTH_CHECK_TIMEOUT=1,
+)
+class TestClientRegistry(TestCase):
+
+    def setUp(self):
+        self.clients = ClientRegistry()
+
+    def test_client_is_reused(self):
+        client = self.clients.get()
+        self.assertIs(self.clients.get(), client)
+
+        connection = client.transport.get_connection()
+        self.assertIsInstance(connection, TimedConnection)
+        self.assertEqual(connection.pool.pool.maxsize, 5)
+
+    def test_forked_process_creates_new_client(self):
+        client = self.clients.get()
+        with mock.patch('readthedocs.search.client.os.getpid', return_value=-1):
+            self.assertIsNot(self.clients.get(), client)
+
+    @mock.patch('readthedocs.search.client.time.time')
+    def test_client_is_replaced_when_ping_fails(self, time):
+        time.return_value = 0
+        client = self.clients.get()
+
+        time.return_value = 30
+        with mock.patch.object(client, 'ping') as ping:
+            self.assertIs(self.clients.get(), client)
+            ping.assert_not_called()
+
+        time.return_value = 60
+        with mock.patch.object(client, 'ping', return_value=True) as ping:
+            self.assertIs(self.clients.get(), client)
+            ping.assert_called_once_with(request_timeout=1)
+
+        time.return_value = 120
+        with mock.patch.object(client, 'ping', return_value=False):
+            new_client = self.clients.get()
+        self.assertIsNot(new_client, client)
+        self.assertIs(self.clients.get(), new_client)
@@ -1,8 +1,13 @@
 import os
 
+import mock
+from django.db import IntegrityError
 from django.test import TestCase
 from django.test.utils import override_settings
+from django_dynamic_fixture import get
 
+from readthedocs.projects.models import HTMLFile, Project
+from readthedocs.search.models import ParsedContent
 from readthedocs.search.parse_json import process_file
 
 
@@ -30,3 +35,55 @@ class TestHacks(TestCase):
         # There should be no new line character present
         for section in data['sections']:
             self.assertFalse('\n' in section['content'])
+
+    @override_settings(MEDIA_ROOT=base_dir)
+    @override_settings(PRODUCTION_MEDIA_ARTIFACTS=base_dir)
+    def test_lxml_parser_same_output(self):
+        with override_settings(RTD_SEARCH_HTML_PARSER='pyquery'):
+            pyquery_data = process_file('files/api.fjson')
+        with override_settings(RTD_SEARCH_HTML_PARSER='lxml'):
+            lxml_data = process_file('files/api.fjson')
+
+        self.assertTrue(len(lxml_data['sections']) > 0)
+        self.assertEqual(lxml_data, pyquery_data)
+
+    @override_settings(MEDIA_ROOT=base_dir)
+    @override_settings(PRODUCTION_MEDIA_ARTIFACTS=base_dir)
+    def test_parsed_content_is_cached(self):
+        project = get(Project)
+        html_file = get(
+            HTMLFile,
+            project=project,
+            version=project.versions.first(),
+            name='api.html',
+        )
+        data = process_file('files/api.fjson', html_file=html_file)
+        self.assertEqual(ParsedContent.objects.count(), 1)
+        parsed_content = ParsedContent.objects.get(html_file=html_file)
+        self.assertEqual(parsed_content.get_data(), data)
+
+        with mock.patch('readthedocs.search.parse_json.parse_fjson') as parse_fjson:
+            cached_data = process_file('files/api.fjson', html_file=html_file)
+            parse_fjson.assert_not_called()
+        self.assertEqual(cached_data, data)
+
+        # The cache is removed with the file
+        html_file.delete()
+        self.assertEqual(ParsedContent.objects.count(), 0)
+
+    @override_settings(MEDIA_ROOT=base_dir)
+    @override_settings(PRODUCTION_MEDIA_ARTIFACTS=base_dir)
+    def test_parsed_content_cache_error(self):
+        project = get(Project)
+        html_file = get(
+            HTMLFile,
+            project=project,
+            version=project.versions.first(),
+            name='api.html',
+        )
+        with mock.patch.object(ParsedContent.objects, 'update_or_create') as update_or_create:
+            # Another process cached the file at the same time
+            update_or_create.side_effect = IntegrityError
+            data = process_file('files/api.fjson', html_file=html_file)
+        self.assertEqual(data, process_file('files/api.fjson'))
+        self.assertTrue(data['sections'])
@@ -186,6 +186,54 @@ class TestSyncVersions(TestCase):
             Version.objects.filter(slug='0.8.3').exists(),
         )
 
+    def test_update_and_create_versions_in_bulk(self):
+        Version.objects.create(
+            project=self.pip,
+            identifier='1234',
+            verbose_name='1.0',
+            type=TAG,
+        )
+        version_post_data = {
+            'branches': [
+                {
+                    'identifier': 'origin/master',
+                    'verbose_name': 'master',
+                },
+            ],
+            'tags': [
+                {
+                    'identifier': '5678',
+                    'verbose_name': '1.0',
+                },
+                {
+                    'identifier': '1111',
+                    'verbose_name': '2!0',
+                },
+                {
+                    'identifier': '2222',
+                    'verbose_name': '2?0',
+                },
+            ],
+        }
+
+        resp = self.client.post(
+            reverse('project-sync-versions', args=[self.pip.pk]),
+            data=json.dumps(version_post_data),
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            self.pip.versions.get(verbose_name='1.0').identifier,
+            '5678',
+        )
+        self.assertEqual(
+            dict(
+                self.pip.versions.filter(type=TAG, verbose_name__startswith='2')
+                .values_list('slug', 'identifier'),
+            ),
+            {'2-0': '1111', '2-0_a': '2222'},
+        )
+
     def test_machine_attr_when_user_define_stable_tag_and_delete_it(self):
         """
         The user creates a tag named ``stable`` on an existing repo,
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+
+import mock
+from django.test import TestCase, override_settings
+
+from readthedocs.builds.syncers import DeltaSyncer, RemoteDeltaSyncer, remove_directory
+
+
+files_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
+
+
+class TestDeltaSyncer(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, 'source')
+        self.target = os.path.join(self.root, 'rtd-builds', 'latest')
+        shutil.copytree(files_dir, self.source)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_copy_directory(self):
+        os.makedirs(self.target)
+        with open(os.path.join(self.target, 'old.html'), 'w') as fd:
+            fd.write('old')
+
+        DeltaSyncer.copy(self.source, self.target)
+        self.assertTrue(os.path.islink(self.target))
+        self.assertCountEqual(
+            os.listdir(self.target),
+            ['api', 'api.fjson', 'conf.py', 'test.html'],
+        )
+
+        first_snapshot = os.path.realpath(self.target)
+        inode = os.stat(os.path.join(self.target, 'test.html')).st_ino
+        with open(os.path.join(self.source, 'conf.py'), 'w') as fd:
+            fd.write('changed')
+        DeltaSyncer.copy(self.source, self.target)
+
+        snapshot = os.path.realpath(self.target)
+        self.assertNotEqual(snapshot, first_snapshot)
+        self.assertFalse(os.path.exists(first_snapshot))
+        with open(os.path.join(self.target, 'conf.py')) as fd:
+            self.assertEqual(fd.read(), 'changed')
+        # Unchanged files are linked from the previous snapshot
+        self.assertEqual(os.stat(os.path.join(self.target, 'test.html')).st_ino, inode)
+        self.assertCountEqual(
+            os.listdir(os.path.dirname(self.target)),
+            ['latest', os.path.basename(snapshot), os.path.basename(snapshot) + '.json'],
+        )
+
+        remove_directory(self.target)
+        self.assertEqual(os.listdir(os.path.dirname(self.target)), [])
+
+    def test_copy_directory_failure_removes_snapshot(self):
+        DeltaSyncer.copy(self.source, self.target)
+        snapshot = os.path.realpath(self.target)
+        with open(os.path.join(self.source, 'conf.py'), 'w') as fd:
+            fd.write('changed')
+
+        with mock.patch('readthedocs.builds.syncers.shutil.copy2', side_effect=OSError):
+            with self.assertRaises(OSError):
+                DeltaSyncer.copy(self.source, self.target)
+
+        # The previous copy is kept and the partial snapshot is removed
+        self.assertEqual(os.path.realpath(self.target), snapshot)
+        self.assertCountEqual(
+            os.listdir(os.path.dirname(self.target)),
+            ['latest', os.path.basename(snapshot), os.path.basename(snapshot) + '.json'],
+        )
+
+    def test_copy_file(self):
+        target = os.path.join(self.root, 'media', 'pdf', 'latest.pdf')
+        DeltaSyncer.copy(os.path.join(self.source, 'test.html'), target, is_file=True)
+        with open(target) as fd, open(os.path.join(self.source, 'test.html')) as source:
+            self.assertEqual(fd.read(), source.read())
+
+
+@override_settings(MULTIPLE_APP_SERVERS=['web01', 'web02'], SYNC_USER='docs')
+class TestRemoteDeltaSyncer(TestCase):
+
+    @mock.patch('readthedocs.builds.syncers.subprocess.run')
+    def test_sync_to_all_servers(self, run):
+        run.return_value = mock.Mock(returncode=0, stderr=b'')
+        RemoteDeltaSyncer.copy('/build/html', '/docs/rtd-builds/latest')
+
+        commands = [call[0][0] for call in run.call_args_list]
+        for server in ['web01', 'web02']:
+            rsync = [
+                cmd for cmd in commands
+                if cmd[0] == 'rsync' and cmd[-1].startswith('docs@{}:'.format(server))
+            ]
+            self.assertEqual(len(rsync), 1)
+            self.assertIn('--checksum', rsync[0])
+            self.assertIn('--link-dest=/docs/rtd-builds/latest/', rsync[0])
+
+    @mock.patch('readthedocs.builds.syncers.log')
+    @mock.patch('readthedocs.builds.syncers.subprocess.run')
+    def test_errors_are_reported_by_server(self, run, log):
+        def run_command(cmd, **kwargs):
+            failed = any('web02' in arg for arg in cmd)
+            return mock.Mock(returncode=1 if failed else 0, stderr=b'unreachable')
+        run.side_effect = run_command
+
+        RemoteDeltaSyncer.copy('/build/html', '/docs/rtd-builds/latest')
+        self.assertEqual(log.error.call_count, 1)
+        self.assertEqual(log.error.call_args[0][2], 'web02')
+
+    @mock.patch('readthedocs.builds.syncers.subprocess.run')
+    def test_failed_sync_removes_snapshot(self, run):
+        def run_command(cmd, **kwargs):
+            return mock.Mock(returncode=1 if cmd[0] == 'rsync' else 0, stderr=b'')
+        run.side_effect = run_command
+
+        RemoteDeltaSyncer.copy('/build/html', '/docs/rtd-builds/latest')
+
+        commands = [call[0][0] for call in run.call_args_list]
+        for server in ['web01', 'web02']:
+            rsync = [
+                cmd for cmd in commands
+                if cmd[0] == 'rsync' and cmd[-1].startswith('docs@{}:'.format(server))
+            ][0]
+            snapshot = rsync[-1].split(':', 1)[1].rstrip('/')
+            cleanup = [
+                cmd for cmd in commands
+                if cmd[0] == 'ssh' and cmd[1] == 'docs@{}'.format(server) and 'rm -rf' in cmd[2]
+            ]
+            self.assertEqual(len(cleanup), 1)
+            self.assertIn(snapshot, cleanup[0][2])
@@ -99,6 +99,14 @@ class VersionSlugFieldTests(TestCase):
         )
         self.assertEqual(version.slug, '1-0_b')
 
+    def test_create_unique_slug(self):
+        field = Version._meta.get_field('slug')
+        used_slugs = {'1-0'}
+        self.assertEqual(field.create_unique_slug('1%0', used_slugs), '1-0_a')
+        self.assertEqual(field.create_unique_slug('1?0', used_slugs), '1-0_b')
+        self.assertEqual(field.create_unique_slug('2.0', used_slugs), '2.0')
+        self.assertEqual(used_slugs, {'1-0', '1-0_a', '1-0_b', '2.0'})
+
     def test_uniquifying_suffix(self):
         field = VersionSlugField(populate_from='foo')
         self.assertEqual(field.uniquifying_suffix(0), '_a')
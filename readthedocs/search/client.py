@@ -0,0 +1,105 @@
+"""
+Process wide Elasticsearch clients used by the search views.
+
+Creating a client for each request opens new connections every time,
+the clients here are created once per process and reused,
+so the connections are kept in their pools between requests.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from elasticsearch import Elasticsearch
+from elasticsearch.connection import Urllib3HttpConnection
+
+
+log = logging.getLogger(__name__)
+
+
+class TimedConnection(Urllib3HttpConnection):
+
+    """Connection logging the time taken by each request."""
+
+    def perform_request(self, method, url, *args, **kwargs):
+        start = time.time()
+        try:
+            return super().perform_request(method, url, *args, **kwargs)
+        finally:
+            log.debug(
+                'Elasticsearch request: %s %s, took %.2fms',
+                method,
+                url,
+                (time.time() - start) * 1000,
+            )
+
+
+class ClientRegistry:
+
+    """
+    Elasticsearch clients of the current process, by alias.
+
+    The clients are created with the ``ELASTICSEARCH_DSL`` settings of the alias,
+    a process forked after creating them (e.g. a worker) creates its own ones.
+    Every ``ES_HEALTH_CHECK_INTERVAL`` seconds a client is pinged,
+    and replaced if Elasticsearch doesn't answer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._clients = {}
+
+    def _create_client(self, alias):
+        kwargs = {
+            'connection_class': TimedConnection,
+            'maxsize': settings.ES_CONNECTION_POOL_SIZE,
+            'max_retries': settings.ES_MAX_RETRIES,
+            'retry_on_timeout': True,
+        }
+        kwargs.update(settings.ELASTICSEARCH_DSL[alias])
+        return Elasticsearch(**kwargs)
+
+    def get(self, alias='default'):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections can't be shared with the parent process
+                self._clients = {}
+                self._pid = os.getpid()
+
+            now = time.time()
+            if alias not in self._clients:
+                self._clients[alias] = (self._create_client(alias), now)
+
+            client, checked = self._clients[alias]
+            check = now - checked >= settings.ES_HEALTH_CHECK_INTERVAL
+            if check:
+                # Only this thread checks the client,
+                # the others keep using it in the meantime
+                self._clients[alias] = (client, now)
+
+        # Pinged without the lock, other threads don't wait for the answer
+        if check and not client.ping(request_timeout=settings.ES_HEALTH_CHECK_TIMEOUT):
+            log.warning('Elasticsearch is not answering, creating a new client')
+            with self._lock:
+                current = self._clients.get(alias)
+                # Unless another thread replaced it in the meantime
+                if current is None or current[0] is client:
+                    client.transport.close()
+                    self._clients[alias] = (self._create_client(alias), time.time())
+                client = self._clients[alias][0]
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+
+
+clients = ClientRegistry()
+
+
+def get_client(alias='default'):
+    """Return the Elasticsearch client of this process for ``alias``."""
+    return clients.get(alias)
@@ -1,12 +1,15 @@
 import logging
 
 from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
 from django_elasticsearch_dsl import DocType, Index, fields
 
 from elasticsearch import Elasticsearch
 
+from readthedocs.core.utils import chunked
 from readthedocs.docsitalia.models import Publisher, PublisherProject, ProjectOrder
 from readthedocs.projects.models import HTMLFile, Project
+from readthedocs.sphinx_domains.models import SphinxDomain
 
 
 project_conf = settings.ES_INDEXES['project']
@@ -22,13 +25,55 @@ log = logging.getLogger(__name__)
 
 class RTDDocTypeMixin:
 
+    # Related objects fetched for each chunk of instances before preparing them,
+    # prefetching on the queryset doesn't work with ``iterator()``
+    prefetch_related_lookups = ()
+    # Fields not depending on the content of the instance, sent by the
+    # ``update`` action (see ``index_changed_files``)
+    partial_update_fields = ()
+
+    def prepare_fields(self, instance, names):
+        """Prepare only the fields ``names`` of ``instance``, the way ``prepare`` does."""
+        data = {}
+        for name in names:
+            prep_func = getattr(self, 'prepare_{}'.format(name), None)
+            if prep_func:
+                data[name] = prep_func(instance)
+                continue
+            data[name] = self._doc_type.mapping[name].get_value_from_instance(
+                instance,
+                self._related_instance_to_ignore,
+            )
+        return data
+
+    def _prepare_action(self, object_instance, action):
+        if action != 'update':
+            return super()._prepare_action(object_instance, action)
+        return {
+            '_op_type': action,
+            '_index': str(self._doc_type.index),
+            '_type': self._doc_type.mapping.doc_type,
+            '_id': object_instance.pk,
+            'doc': self.prepare_fields(object_instance, self.partial_update_fields),
+        }
+
+    def _get_actions(self, object_list, action):
+        if not self.prefetch_related_lookups or action == 'delete':
+            yield from super()._get_actions(object_list, action)
+            return
+
+        for chunk in chunked(object_list, settings.ES_PREPARE_CHUNK_SIZE):
+            prefetch_related_objects(chunk, *self.prefetch_related_lookups)
+            for instance in chunk:
+                yield self._prepare_action(instance, action)
+
     def update(self, *args, **kwargs):
         # Hack a fix to our broken connection pooling
         # This creates a new connection on every request,
         # but actually works :)
         log.info('Hacking Elastic indexing to fix connection pooling')
         self.using = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
-        super().update(*args, **kwargs)
+        return super().update(*args, **kwargs)
 
 
 @project_index.doc_type
@@ -170,6 +215,35 @@ class PageDocument(RTDDocTypeMixin, DocType):
 
     modified_model_field = 'modified_date'
 
+    partial_update_fields = (
+        'commit',
+        'build',
+        'is_default',
+        'publisher_project',
+        'publisher',
+        'privacy_level',
+        'priority',
+        'tags',
+    )
+
+    prefetch_related_lookups = (
+        'version',
+        'project__tags',
+        Prefetch(
+            'project__publisherproject_set',
+            queryset=PublisherProject.objects.select_related('publisher').order_by('pk'),
+        ),
+        'project__projectorder',
+        Prefetch(
+            'sphinx_domains',
+            queryset=SphinxDomain.objects.exclude(
+                domain='std',
+                type__in=['doc', 'label']
+            ),
+            to_attr='indexed_domains',
+        ),
+    )
+
     # DocsItalia
     publisher_project = fields.KeywordField()
     # publisher is currently used for faceting only, not for queries
@@ -213,10 +287,13 @@ class PageDocument(RTDDocTypeMixin, DocType):
         all_domains = []
 
         try:
-            domains_qs = html_file.sphinx_domains.exclude(
-                domain='std',
-                type__in=['doc', 'label']
-            ).iterator()
+            if hasattr(html_file, 'indexed_domains'):
+                domains_qs = html_file.indexed_domains
+            else:
+                domains_qs = html_file.sphinx_domains.exclude(
+                    domain='std',
+                    type__in=['doc', 'label']
+                ).iterator()
 
             all_domains = [
                 {
@@ -251,16 +328,16 @@ class PageDocument(RTDDocTypeMixin, DocType):
         """Prepare docsitalia publisher project field."""
         # not using more sophisticated Django methods in order to exploit prefetching
         try:
-            return instance.project.publisherproject_set.first().slug
-        except AttributeError:
+            return instance.project.publisherproject_set.all()[0].slug
+        except IndexError:
             return
 
     def prepare_publisher(self, instance):
         """Prepare docsitalia publisher field."""
         # not using more sophisticated Django methods in order to exploit prefetching
         try:
-            return instance.project.publisherproject_set.first().publisher.name
-        except AttributeError:
+            return instance.project.publisherproject_set.all()[0].publisher.name
+        except IndexError:
             return
 
     def prepare_is_default(self, instance):
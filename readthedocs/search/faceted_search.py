@@ -1,6 +1,5 @@
 import logging
 
-from elasticsearch import Elasticsearch
 from elasticsearch_dsl import FacetedSearch, TermsFacet
 from elasticsearch_dsl.faceted_search import FacetedResponse, NestedFacet
 from elasticsearch_dsl.query import Bool, SimpleQueryString, Nested, Match
@@ -10,6 +9,7 @@ from django.conf import settings
 
 from readthedocs.core.utils.extend import SettingsOverrideObject
 from readthedocs.projects.constants import PRIVATE
+from readthedocs.search.client import get_client
 from readthedocs.search.documents import (
     PageDocument,
     ProjectDocument,
@@ -48,11 +48,7 @@ class RTDFacetedSearch(FacetedSearch):
             if f in kwargs:
                 del kwargs[f]
 
-        # Hack a fix to our broken connection pooling
-        # This creates a new connection on every request,
-        # but actually works :)
-        log.info('Hacking Elastic to fix search connection pooling')
-        self.using = Elasticsearch(**settings.ELASTICSEARCH_DSL['default'])
+        self.using = get_client()
 
         super().__init__(**kwargs)
 
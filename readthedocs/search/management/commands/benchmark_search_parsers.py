@@ -0,0 +1,87 @@
+"""Compare throughput and peak memory of the parsers used to index pages."""
+
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from readthedocs.search.parse_json import parse_fjson
+
+
+PARSERS = ('pyquery', 'lxml')
+
+
+class Command(BaseCommand):
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            type=str,
+            help='fjson files or directories containing fjson files',
+        )
+        parser.add_argument(
+            '--iterations',
+            dest='iterations',
+            type=int,
+            default=10,
+            help='Number of times each file is parsed',
+        )
+
+    @staticmethod
+    def _get_files(paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, __, filenames in os.walk(path):
+                    files.extend(
+                        os.path.join(root, filename)
+                        for filename in sorted(filenames)
+                        if filename.endswith('.fjson')
+                    )
+            else:
+                files.append(path)
+        return files
+
+    def handle(self, *args, **options):
+        files = self._get_files(options['paths'])
+        if not files:
+            raise CommandError('No fjson files found')
+
+        contents = []
+        for path in files:
+            with open(path) as f:
+                contents.append((path, f.read()))
+
+        results = {}
+        for parser in PARSERS:
+            with override_settings(RTD_SEARCH_HTML_PARSER=parser):
+                tracemalloc.start()
+                start = time.time()
+                for __ in range(options['iterations']):
+                    results[parser] = [
+                        parse_fjson(file_contents, path)
+                        for path, file_contents in contents
+                    ]
+                elapsed = time.time() - start
+                __, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            parsed = len(contents) * options['iterations']
+            self.stdout.write(
+                '{}: {} files in {:.2f}s ({:.1f} files/s), peak memory {:.1f} KiB'.format(
+                    parser,
+                    parsed,
+                    elapsed,
+                    parsed / elapsed if elapsed else parsed,
+                    peak / 1024,
+                ),
+            )
+
+        for (path, __), *outputs in zip(contents, *results.values()):
+            if any(output != outputs[0] for output in outputs):
+                self.stderr.write('Parsers output differs for {}'.format(path))
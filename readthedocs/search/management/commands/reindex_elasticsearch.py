@@ -4,10 +4,11 @@ import logging
 from celery import chord, chain
 from django.apps import apps
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 from django.utils import timezone
 from django_elasticsearch_dsl.registries import registry
 
+from ...reindex import ReindexCheckpoint, ReindexError, get_pk_ranges, reindex
 from ...tasks import (index_objects_to_es, switch_es_index, create_new_es_index,
                       index_missing_objects)
 
@@ -18,10 +19,6 @@ class Command(BaseCommand):
 
     @staticmethod
     def _get_indexing_tasks(app_label, model_name, index_name, queryset, document_class):
-        chunk_size = settings.ES_TASK_CHUNK_SIZE
-        qs_iterator = queryset.only('pk').iterator()
-        is_iterator_empty = False
-
         data = {
             'app_label': app_label,
             'model_name': model_name,
@@ -29,22 +26,8 @@ class Command(BaseCommand):
             'index_name': index_name,
         }
 
-        while not is_iterator_empty:
-            objects_id = []
-
-            try:
-                for _ in range(chunk_size):
-                    pk = next(qs_iterator).pk
-                    objects_id.append(pk)
-
-                    if pk % 5000 == 0:
-                        log.info('Total: %s', pk)
-
-            except StopIteration:
-                is_iterator_empty = True
-
-            data['objects_id'] = objects_id
-            yield index_objects_to_es.si(**data)
+        for pk_range in get_pk_ranges(queryset, settings.ES_TASK_CHUNK_SIZE):
+            yield index_objects_to_es.si(pk_range=pk_range, **data)
 
     def _run_reindex_tasks(self, models, queue):
         apply_async_kwargs = {'priority': 0}
@@ -105,6 +88,32 @@ class Command(BaseCommand):
                        .format(app_label, model_name, queryset.count()))
             log.info(message)
 
+    def _run_local_reindex(self, models, processes, checkpoint_path, **kwargs):
+        checkpoint = ReindexCheckpoint(checkpoint_path)
+
+        # Documents sharing an index are reindexed together,
+        # the index can be replaced only once all of them are indexed
+        index_names = {str(index) for index in registry.get_indices(models)}
+        documents_by_index = {}
+        for doc in registry.get_documents():
+            index_name = str(doc._doc_type.index)
+            if index_name in index_names:
+                documents_by_index.setdefault(index_name, []).append(doc)
+
+        for index_name, documents in sorted(documents_by_index.items()):
+            try:
+                rates = reindex(
+                    index_name,
+                    sorted(documents, key=str),
+                    checkpoint,
+                    processes=processes,
+                    **kwargs
+                )
+            except ReindexError as e:
+                raise CommandError(str(e))
+            for document_class, rate in sorted(rates.items()):
+                self.stdout.write('{}: {:.1f} docs/s'.format(document_class, rate))
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--queue',
@@ -120,6 +129,45 @@ class Command(BaseCommand):
             help=("Specify the model to be updated in elasticsearch."
                   "The format is <app_label>.<model_name>")
         )
+        parser.add_argument(
+            '--local',
+            dest='local',
+            action='store_true',
+            help='Index in this process instead of issuing celery tasks.'
+        )
+        parser.add_argument(
+            '--processes',
+            dest='processes',
+            type=int,
+            default=1,
+            help='Number of local processes used to index, with --local.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            dest='checkpoint',
+            type=str,
+            help=("File where the indexed ranges are saved, with --local. "
+                  "If the file exists, the interrupted reindex is resumed.")
+        )
+        parser.add_argument(
+            '--range-size',
+            dest='range_size',
+            type=int,
+            help=('Number of objects in each range of primary keys, with --local. '
+                  'The default is --chunk-size times --thread-count.')
+        )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            help='Number of documents in each bulk request, with --local.'
+        )
+        parser.add_argument(
+            '--thread-count',
+            dest='thread_count',
+            type=int,
+            help='Number of concurrent bulk requests, with --local.'
+        )
 
     def handle(self, *args, **options):
         """
@@ -127,12 +175,26 @@ class Command(BaseCommand):
 
         You can specify model to get indexed by passing
         `--model <app_label>.<model_name>` parameter.
-        Otherwise, it will reindex all the models
+        Otherwise, it will reindex all the models.
+
+        With `--local` the models are indexed without celery,
+        using `--processes` processes.
         """
         models = None
         if options['models']:
             models = [apps.get_model(model_name) for model_name in options['models']]
 
+        if options['local']:
+            self._run_local_reindex(
+                models=models,
+                processes=options['processes'],
+                checkpoint_path=options['checkpoint'],
+                range_size=options['range_size'],
+                chunk_size=options['chunk_size'],
+                thread_count=options['thread_count'],
+            )
+            return
+
         queue = None
         if options.get('queue'):
             queue = options['queue']
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0044_auto_20190703_1300'),
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedContent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('md5', models.CharField(max_length=32, verbose_name='MD5 checksum')),
+                ('data', models.BinaryField(verbose_name='Data')),
+                ('html_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='parsed_content', to='projects.ImportedFile')),
+            ],
+        ),
+    ]
@@ -1,5 +1,8 @@
 """Search Queries."""
 
+import json
+import zlib
+
 from django.db import models
 from django.db.models import Count
 from django.db.models.functions import TruncDate
@@ -9,7 +12,7 @@ from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 
 from readthedocs.builds.models import Version
-from readthedocs.projects.models import Project
+from readthedocs.projects.models import ImportedFile, Project
 from readthedocs.projects.querysets import RelatedProjectQuerySet
 
 
@@ -92,3 +95,34 @@ class SearchQuery(TimeStampedModel):
         }
 
         return final_data
+
+
+class ParsedContent(models.Model):
+
+    """
+    Cache of the parsed content of an HTMLFile used for search indexing.
+
+    The content is stored for each file, with the md5 of the fjson file
+    it was parsed from, and it's deleted with the ImportedFile when its
+    build is removed.
+    """
+
+    html_file = models.OneToOneField(
+        ImportedFile,
+        related_name='parsed_content',
+        on_delete=models.CASCADE,
+    )
+    md5 = models.CharField(_('MD5 checksum'), max_length=32)
+    # zlib compressed JSON
+    data = models.BinaryField(_('Data'))
+
+    def __str__(self):
+        return f'{self.html_file}: {self.md5}'
+
+    def get_data(self):
+        """Return the parsed content as a dict."""
+        return json.loads(zlib.decompress(bytes(self.data)).decode('utf-8'))
+
+    def set_data(self, data):
+        """Compress and store the parsed content ``data``."""
+        self.data = zlib.compress(json.dumps(data).encode('utf-8'))
@@ -1,12 +1,17 @@
 """Functions related to converting content into dict/JSON structures."""
 
+import hashlib
 import json
 import logging
+from copy import deepcopy
 
+import lxml.html
 from django.conf import settings
 from django.core.files.storage import get_storage_class
-
+from django.db import DatabaseError, transaction
+from lxml import etree
 from pyquery import PyQuery
+from pyquery.text import extract_text
 
 
 log = logging.getLogger(__name__)
@@ -74,8 +79,15 @@ def generate_sections_from_pyquery(body, fjson_storage_path):
         }
 
 
-def process_file(fjson_storage_path):
-    """Read the fjson file from disk and parse it into a structured dict."""
+def process_file(fjson_storage_path, html_file=None):
+    """
+    Read the fjson file from disk and parse it into a structured dict.
+
+    If ``html_file`` is given, the parsed content is cached in the database
+    for ``html_file``, together with the md5 of the fjson file, so the file
+    is parsed only once for all the search documents and reindexes of
+    ``html_file``, and again only when its content changes.
+    """
     storage = get_storage_class(settings.RTD_BUILD_MEDIA_STORAGE)()
 
     log.debug('Processing JSON file for indexing: %s', fjson_storage_path)
@@ -86,6 +98,45 @@ def process_file(fjson_storage_path):
     except IOError:
         log.info('Unable to read file: %s', fjson_storage_path)
         raise
+
+    if html_file is None:
+        return parse_fjson(file_contents, fjson_storage_path)
+
+    # Avoid circular import
+    from readthedocs.search.models import ParsedContent
+
+    md5 = hashlib.md5(file_contents.encode('utf-8')).hexdigest()
+    parsed_content = (
+        ParsedContent.objects
+        .filter(html_file_id=html_file.pk, md5=md5)
+        .first()
+    )
+    if parsed_content:
+        return parsed_content.get_data()
+
+    data = parse_fjson(file_contents, fjson_storage_path)
+    parsed_content = ParsedContent(md5=md5)
+    parsed_content.set_data(data)
+    try:
+        # In a savepoint, so a failure doesn't break the current transaction
+        with transaction.atomic():
+            ParsedContent.objects.update_or_create(
+                html_file_id=html_file.pk,
+                defaults={'md5': md5, 'data': parsed_content.data},
+            )
+    except DatabaseError:
+        # Another process cached the same file at the same time,
+        # or the file was deleted: the cache is best-effort
+        log.warning(
+            'Unable to cache the parsed content of file: %s',
+            fjson_storage_path,
+            exc_info=True,
+        )
+    return data
+
+
+def parse_fjson(file_contents, fjson_storage_path):
+    """Parse the contents of a fjson file into a structured dict."""
     data = json.loads(file_contents)
     sections = []
     path = ''
@@ -97,7 +148,13 @@ def process_file(fjson_storage_path):
     else:
         log.info('Unable to index file due to no name %s', fjson_storage_path)
 
-    if data.get('body'):
+    if data.get('body') and settings.RTD_SEARCH_HTML_PARSER == 'lxml':
+        body = parse_html(data['body'])
+        # Domains are generated first, because generating the sections
+        # removes elements from ``body``
+        domain_data = generate_domains_data_from_lxml(body, fjson_storage_path)
+        sections.extend(generate_sections_from_lxml(body, fjson_storage_path))
+    elif data.get('body'):
         body = PyQuery(data['body'])
         sections.extend(generate_sections_from_pyquery(body.clone(), fjson_storage_path))
         domain_data = generate_domains_data_from_pyquery(body.clone(), fjson_storage_path)
@@ -181,3 +238,176 @@ def generate_domains_data_from_pyquery(body, fjson_storage_path):
                 log.exception('Error parsing docstrings for domains in file %s', fjson_storage_path)
 
     return domain_data
+
+
+def parse_html(content):
+    """
+    Parse ``content`` into an lxml element.
+
+    Mirrors how PyQuery parses a string: as XML, falling back to HTML.
+    """
+    try:
+        return etree.fromstring(content)
+    except etree.XMLSyntaxError:
+        return lxml.html.fromstring(content)
+
+
+def _has_class(element, class_name):
+    return class_name in (element.get('class') or '').split()
+
+
+def _get_text(elements):
+    """Return the text of ``elements`` as ``PyQuery(elements).text()`` does."""
+    return ' '.join(extract_text(element) for element in elements)
+
+
+def _remove(elements):
+    """Remove ``elements`` from their tree keeping their tail, as PyQuery's ``remove()`` does."""
+    for element in elements:
+        parent = element.getparent()
+        if parent is None:
+            continue
+        if element.tail:
+            previous = element.getprevious()
+            if previous is None:
+                parent.text = (parent.text or '') + ' ' + element.tail
+            else:
+                previous.tail = (previous.tail or '') + ' ' + element.tail
+        parent.remove(element)
+
+
+def _copy_without(element, tags):
+    """
+    Copy ``element`` skipping its descendants with a tag in ``tags``.
+
+    The tail of the skipped elements is kept, as PyQuery's ``remove()`` does.
+    Unlike cloning the whole element and removing the tags afterwards,
+    the skipped subtrees are never copied.
+    """
+    copy = etree.Element(element.tag)
+    copy.text = element.text
+    for child in element:
+        if child.tag in tags:
+            if child.tail:
+                if len(copy):
+                    copy[-1].tail = (copy[-1].tail or '') + ' ' + child.tail
+                else:
+                    copy.text = (copy.text or '') + ' ' + child.tail
+            continue
+
+        if isinstance(child.tag, str):
+            child_copy = _copy_without(child, tags)
+        else:
+            # Comments and processing instructions
+            child_copy = deepcopy(child)
+        child_copy.tail = child.tail
+        copy.append(child_copy)
+    return copy
+
+
+def generate_sections_from_lxml(body, fjson_storage_path):
+    """
+    Given an lxml element, generate section dicts for each section.
+
+    Generates the same output as :py:func:`generate_sections_from_pyquery`
+    walking the tree once, instead of building PyQuery objects for each node.
+    Elements are removed from ``body``.
+    """
+
+    # Removing all <dl> tags to prevent duplicate indexing with Sphinx Domains.
+    try:
+        # remove all <dl> tags which contains <dt> tags having 'id' attribute
+        dl_tags = {}
+        for dt_tag in body.iter('dt'):
+            if dt_tag.get('id') is not None:
+                dl_tags.update(dict.fromkeys(dt_tag.iterancestors('dl')))
+        _remove(dl_tags)
+    except Exception:
+        log.exception('Error removing <dl> tags from file: %s', fjson_storage_path)
+
+    # remove toctree elements
+    try:
+        _remove([
+            element for element in body.iter(etree.Element)
+            if _has_class(element, 'toctree-wrapper')
+        ])
+    except Exception:
+        log.exception('Error removing toctree elements from file: %s', fjson_storage_path)
+
+    # Capture text inside h1 before the first h2
+    h1_tags = list(body.iter('h1'))
+    h1_section = [
+        h1 for h1 in h1_tags
+        if h1.getparent() is not None and _has_class(h1.getparent(), 'section')
+    ]
+    if h1_section:
+        h1_title = _get_text(h1_section).replace('¶', '').strip()
+        h1_id = h1_section[0].getparent().get('id')
+        h1_content = ''
+        next_p = [h1.getnext() for h1 in h1_tags if h1.getnext() is not None]
+        while next_p:
+            if next_p[0].tag == 'div' and 'class' in next_p[0].attrib:
+                if 'section' in next_p[0].attrib['class']:
+                    break
+
+            text = parse_content(_get_text(next_p), remove_first_line=True)
+            if h1_content:
+                h1_content = f'{h1_content.rstrip(".")}. {text}'
+            else:
+                h1_content = text
+
+            next_p = [p.getnext() for p in next_p if p.getnext() is not None]
+        if h1_content:
+            yield {
+                'id': h1_id,
+                'title': h1_title,
+                'content': h1_content.replace('\n', '. '),
+            }
+
+    # Capture text inside h2's
+    for header in body.iter('h2'):
+        div = header.getparent()
+        if div is None or not _has_class(div, 'section'):
+            continue
+
+        title = extract_text(header).replace('¶', '').strip()
+        section_id = div.get('id')
+
+        content = extract_text(div)
+        content = parse_content(content, remove_first_line=True)
+
+        yield {
+            'id': section_id,
+            'title': title,
+            'content': content,
+        }
+
+
+def generate_domains_data_from_lxml(body, fjson_storage_path):
+    """
+    Given an lxml element, generate sphinx domain objects' docstrings.
+
+    Generates the same output as :py:func:`generate_domains_data_from_pyquery`
+    without modifying ``body``.
+    """
+
+    domain_data = {}
+
+    for dl_tag in body.iter('dl'):
+
+        dt = dl_tag.findall('dt')
+        dd = dl_tag.findall('dd')
+
+        # len(dt) should be equal to len(dd)
+        # because these tags go together.
+        for title, desc in zip(dt, dd):
+            try:
+                id_ = title.attrib.get('id')
+                if id_:
+                    # The 'dl', 'dd' and 'dt' tags inside are already captured
+                    desc_contents = _copy_without(desc, {'dl', 'dt', 'dd'})
+                    domain_data[id_] = parse_content(extract_text(desc_contents))
+            except Exception:
+                log.exception('Error parsing docstrings for domains in file %s', fjson_storage_path)
+
+    return domain_data
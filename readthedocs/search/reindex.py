@@ -0,0 +1,291 @@
+"""
+Rebuild the search indexes splitting the objects in ranges of primary keys.
+
+Each range is indexed with the ``parallel_bulk`` helper of Elasticsearch,
+ranges can be processed by celery tasks or by a local pool of processes.
+The bulk requests of a range run concurrently only if the range has more
+documents than a bulk request: by default the local ranges have
+``ES_BULK_CHUNK_SIZE * ES_BULK_THREAD_COUNT`` objects, and smaller ranges
+(e.g. the ``ES_TASK_CHUNK_SIZE`` ranges of the celery tasks) are split
+evenly between the threads.
+"""
+
+import datetime
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections as db_connections
+from django.utils import timezone
+from elasticsearch.helpers import parallel_bulk
+from elasticsearch_dsl.connections import connections as es_connections
+
+from readthedocs.core.utils import chunked
+
+from .tasks import create_new_es_index, index_missing_objects, switch_es_index
+from .utils import _get_document
+
+
+log = logging.getLogger(__name__)
+
+
+def get_pk_ranges(queryset, size):
+    """
+    Split the objects of ``queryset`` in ranges of primary keys.
+
+    Each range is a ``(start, end)`` tuple, both included,
+    covering at most ``size`` objects.
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    return [(chunk[0], chunk[-1]) for chunk in chunked(pks.iterator(), size)]
+
+
+class ReindexError(Exception):
+    pass
+
+
+def index_pk_range(document, pk_range, index_name=None, chunk_size=None, thread_count=None):
+    """
+    Index the objects of ``document`` with a primary key in ``pk_range``.
+
+    :param index_name: index to write to, instead of the one of the document
+    :param chunk_size: documents in each bulk request, by default
+        ``ES_BULK_CHUNK_SIZE`` or less, so all the threads get a request
+    :returns: a tuple with the number of indexed objects and of the failed ones
+    """
+    doc_obj = document()
+    start, end = pk_range
+    queryset = doc_obj.get_queryset().filter(pk__gte=start, pk__lte=end)
+
+    # The actions are prepared here and not lazily by ``parallel_bulk``,
+    # the database must not be accessed from its threads.
+    actions = []
+    get_actions = doc_obj._get_actions  # pylint: disable=protected-access
+    for action in get_actions(queryset.iterator(), 'index'):
+        if index_name:
+            action['_index'] = index_name
+        actions.append(action)
+
+    thread_count = thread_count or settings.ES_BULK_THREAD_COUNT
+    if not chunk_size:
+        chunk_size = min(
+            settings.ES_BULK_CHUNK_SIZE,
+            max(math.ceil(len(actions) / thread_count), 1),
+        )
+
+    indexed = failed = 0
+    results = parallel_bulk(
+        doc_obj.connection,
+        actions,
+        chunk_size=chunk_size,
+        thread_count=thread_count,
+        raise_on_error=False,
+    )
+    for ok, info in results:
+        if ok:
+            indexed += 1
+        else:
+            failed += 1
+            log.warning('Unable to index object: %s', info)
+    return indexed, failed
+
+
+# Process that created the Elasticsearch connection
+_connection_pid = os.getpid()
+
+
+def _index_pk_range(app_label, model_name, document_class, **kwargs):
+    global _connection_pid  # pylint: disable=global-statement
+    if _connection_pid != os.getpid():
+        # Don't reuse the connection inherited from the parent process
+        try:
+            es_connections.remove_connection('default')
+        except KeyError:
+            pass
+        es_connections.create_connection('default', **settings.ELASTICSEARCH_DSL['default'])
+        _connection_pid = os.getpid()
+
+    model = apps.get_model(app_label, model_name)
+    document = _get_document(model=model, document_class=document_class)
+    return index_pk_range(document, **kwargs)
+
+
+class ReindexCheckpoint:
+
+    """
+    Progress of a reindex, saved to a JSON file after each finished range.
+
+    For each index it keeps the name of the new index, the ranges of
+    each document and the ranges already indexed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.data = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+
+    def get(self, index_name):
+        return self.data.get(index_name)
+
+    def set(self, index_name, state):
+        self.data[index_name] = state
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+
+def reindex(index_name, documents, checkpoint, processes=1, range_size=None,
+            chunk_size=None, thread_count=None):
+    """
+    Rebuild ``index_name`` with the objects of ``documents``.
+
+    The objects are indexed into a new index, which replaces the old one
+    once all the ranges are indexed.
+    Ranges already indexed in ``checkpoint`` are skipped,
+    ranges with objects that failed to index are left pending.
+
+    :param range_size: objects in each range, by default enough for
+        ``thread_count`` concurrent bulk requests of ``chunk_size`` documents
+    :returns: a dictionary with the indexing rate for each document
+    :raises ReindexError: if some ranges failed, the old index is kept
+    """
+    bulk_size = (
+        (chunk_size or settings.ES_BULK_CHUNK_SIZE) *
+        (thread_count or settings.ES_BULK_THREAD_COUNT)
+    )
+    range_size = range_size or bulk_size
+    if range_size < bulk_size:
+        log.warning(
+            'Ranges of %s objects are smaller than the concurrent bulk requests (%s documents)',
+            range_size,
+            bulk_size,
+        )
+    models = {str(doc): doc().get_queryset().model for doc in documents}
+    # All the documents share the index, any of their models can be used
+    model = next(iter(models.values()))
+    index_kwargs = {
+        'app_label': model._meta.app_label,
+        'model_name': model.__name__,
+        'index_name': index_name,
+    }
+
+    state = checkpoint.get(index_name)
+    if state and state['switched']:
+        log.info('Index %s already rebuilt, skipping', index_name)
+        return {}
+
+    if not state:
+        timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        state = {
+            'new_index_name': '{}_{}'.format(index_name, timestamp),
+            'index_time': timezone.now().isoformat(),
+            'switched': False,
+            'documents': {
+                str(doc): {
+                    'ranges': get_pk_ranges(doc().get_queryset(), range_size),
+                    'done': [],
+                }
+                for doc in documents
+            },
+        }
+        create_new_es_index(new_index_name=state['new_index_name'], **index_kwargs)
+        checkpoint.set(index_name, state)
+    else:
+        log.info('Resuming the indexing into %s', state['new_index_name'])
+
+    executor = None
+    if processes > 1:
+        # Connections can't be shared with the processes of the pool
+        db_connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=processes)
+
+    rates = {}
+    failed_ranges = 0
+    for document_class, doc_state in state['documents'].items():
+        done = {tuple(pk_range) for pk_range in doc_state['done']}
+        pending = [
+            tuple(pk_range) for pk_range in doc_state['ranges']
+            if tuple(pk_range) not in done
+        ]
+        task_kwargs = {
+            'app_label': models[document_class]._meta.app_label,
+            'model_name': models[document_class].__name__,
+            'document_class': document_class,
+            'index_name': state['new_index_name'],
+            'chunk_size': chunk_size,
+            'thread_count': thread_count,
+        }
+
+        indexed = failed = 0
+        start = time.time()
+        if executor:
+            futures = {
+                executor.submit(_index_pk_range, pk_range=pk_range, **task_kwargs): pk_range
+                for pk_range in pending
+            }
+            finished = ((futures[future], future.result()) for future in as_completed(futures))
+        else:
+            finished = (
+                (pk_range, _index_pk_range(pk_range=pk_range, **task_kwargs))
+                for pk_range in pending
+            )
+        for pk_range, (count, failed_count) in finished:
+            indexed += count
+            failed += failed_count
+            if failed_count:
+                # Indexed again when the reindex is resumed
+                failed_ranges += 1
+                continue
+            doc_state['done'].append(pk_range)
+            checkpoint.save()
+
+        elapsed = time.time() - start
+        rates[document_class] = indexed / elapsed if elapsed else indexed
+        log.info(
+            'Indexed %s objects of %s in %.2fs (%.1f docs/s), %s failed',
+            indexed,
+            document_class,
+            elapsed,
+            rates[document_class],
+            failed,
+        )
+
+    if executor:
+        executor.shutdown()
+
+    if failed_ranges:
+        raise ReindexError(
+            '{} ranges of {} failed, the index was not switched: '
+            'run again with the same checkpoint to retry them'.format(
+                failed_ranges,
+                index_name,
+            ),
+        )
+
+    switch_es_index(new_index_name=state['new_index_name'], **index_kwargs)
+    state['switched'] = True
+    checkpoint.save()
+
+    # Index the objects created or modified while the ranges were indexed
+    for doc in documents:
+        if hasattr(doc, 'modified_model_field'):
+            index_missing_objects(
+                app_label=models[str(doc)]._meta.app_label,
+                model_name=models[str(doc)].__name__,
+                document_class=str(doc),
+                index_generation_time=state['index_time'],
+            )
+    return rates
@@ -16,17 +16,35 @@ log = logging.getLogger(__name__)
 
 @app.task(queue='web')
 def index_objects_to_es(
-    app_label, model_name, document_class, index_name=None, chunk=None, objects_id=None
+    app_label, model_name, document_class, index_name=None, chunk=None, objects_id=None,
+    pk_range=None,
 ):
 
     if chunk and objects_id:
         raise ValueError('You can not pass both chunk and objects_id.')
 
-    if not (chunk or objects_id):
-        raise ValueError('You must pass a chunk or objects_id.')
+    if pk_range and (chunk or objects_id):
+        raise ValueError('You can not pass pk_range with chunk or objects_id.')
+
+    if not (chunk or objects_id or pk_range):
+        raise ValueError('You must pass a chunk, objects_id or pk_range.')
 
     model = apps.get_model(app_label, model_name)
     document = _get_document(model=model, document_class=document_class)
+
+    if pk_range:
+        # Avoid circular import
+        from .reindex import index_pk_range
+        indexed, failed = index_pk_range(document, pk_range=pk_range, index_name=index_name)
+        log.info(
+            "Indexed model: %s, '%s' objects in range %s, '%s' failed",
+            model.__name__,
+            indexed,
+            pk_range,
+            failed,
+        )
+        return
+
     doc_obj = document()
 
     # WARNING: This must use the exact same queryset as from where we get the ID's
@@ -1,4 +1,6 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from readthedocs.builds.constants import EXTERNAL
 from readthedocs.projects.models import HTMLFile
@@ -22,3 +24,28 @@ class TestPageDocument:
 
         assert qs.model == HTMLFile
         assert not set(html_file).issubset(set(qs))
+
+    def _get_actions(self, queryset):
+        with CaptureQueriesContext(connection) as queries:
+            actions = list(PageDocument()._get_actions(queryset.iterator(), 'index'))
+        return actions, len(queries.captured_queries)
+
+    def test_prepare_queries_dont_grow_with_files(self, all_projects):
+        queryset = PageDocument().get_queryset().order_by('pk')
+        assert queryset.count() > 1
+
+        __, single_file_queries = self._get_actions(queryset[:1])
+        actions, queries = self._get_actions(queryset)
+
+        assert len(actions) == queryset.count()
+        assert queries == single_file_queries
+
+    def test_prepare_with_prefetched_objects(self, all_projects):
+        queryset = PageDocument().get_queryset().order_by('pk')
+        actions, __ = self._get_actions(queryset)
+
+        for html_file, action in zip(queryset, actions):
+            assert action['_id'] == html_file.pk
+            assert action['_source'] == PageDocument().prepare(
+                HTMLFile.objects.get(pk=html_file.pk)
+            )
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from readthedocs.projects.models import HTMLFile
+from readthedocs.search.documents import PageDocument
+from readthedocs.search.reindex import get_pk_ranges, index_pk_range
+
+
+@pytest.mark.django_db
+@pytest.mark.search
+class TestLocalReindex:
+
+    def test_get_pk_ranges(self, all_projects):
+        queryset = HTMLFile.objects.all()
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+
+        ranges = get_pk_ranges(queryset, 2)
+
+        assert len(ranges) == (len(pks) + 1) // 2
+        assert ranges[0] == (pks[0], pks[1])
+        assert ranges[-1][1] == pks[-1]
+        covered = [
+            pk for pk in pks
+            if any(start <= pk <= end for start, end in ranges)
+        ]
+        assert covered == pks
+
+    def test_reindex_local(self, all_projects, tmpdir):
+        checkpoint = str(tmpdir.join('checkpoint.json'))
+        PageDocument().update(HTMLFile.objects.all(), action='delete')
+        PageDocument._doc_type.refresh()
+        assert PageDocument.search().count() == 0
+
+        call_command(
+            'reindex_elasticsearch',
+            '--local',
+            '--models', 'projects.HTMLFile',
+            '--range-size', '2',
+            '--checkpoint', checkpoint,
+        )
+
+        PageDocument._doc_type.refresh()
+        assert PageDocument.search().count() == HTMLFile.objects.count()
+        with open(checkpoint) as f:
+            state = json.load(f)['page_index']
+        assert state['switched']
+        documents = state['documents'][str(PageDocument)]
+        assert documents['done'] == documents['ranges']
+
+    def test_reindex_resumes_from_checkpoint(self, all_projects, tmpdir, mocker):
+        checkpoint = str(tmpdir.join('checkpoint.json'))
+        with open(checkpoint, 'w') as f:
+            json.dump({'page_index': {'switched': True}}, f)
+        index_pk_range_mock = mocker.patch('readthedocs.search.reindex.index_pk_range')
+
+        call_command(
+            'reindex_elasticsearch',
+            '--local',
+            '--models', 'projects.HTMLFile',
+            '--checkpoint', checkpoint,
+        )
+
+        index_pk_range_mock.assert_not_called()
+
+    def test_reindex_resumes_pending_ranges(self, all_projects, tmpdir, mocker):
+        checkpoint = str(tmpdir.join('checkpoint.json'))
+        ranges = get_pk_ranges(HTMLFile.objects.all(), 2)
+        assert len(ranges) > 2
+        calls = []
+
+        def interrupt(document, pk_range, **kwargs):
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            calls.append(pk_range)
+            return 2, 0
+
+        mocker.patch('readthedocs.search.reindex.index_pk_range', side_effect=interrupt)
+        with pytest.raises(KeyboardInterrupt):
+            call_command(
+                'reindex_elasticsearch',
+                '--local',
+                '--models', 'projects.HTMLFile',
+                '--range-size', '2',
+                '--checkpoint', checkpoint,
+            )
+
+        with open(checkpoint) as f:
+            state = json.load(f)['page_index']
+        assert not state['switched']
+        documents = state['documents'][str(PageDocument)]
+        assert [tuple(pk_range) for pk_range in documents['done']] == calls
+
+        index_pk_range_mock = mocker.patch(
+            'readthedocs.search.reindex.index_pk_range',
+            wraps=index_pk_range,
+        )
+        call_command(
+            'reindex_elasticsearch',
+            '--local',
+            '--models', 'projects.HTMLFile',
+            '--range-size', '2',
+            '--checkpoint', checkpoint,
+        )
+
+        indexed_ranges = [call[1]['pk_range'] for call in index_pk_range_mock.call_args_list]
+        assert indexed_ranges == [pk_range for pk_range in ranges if pk_range not in calls]
+        with open(checkpoint) as f:
+            state = json.load(f)['page_index']
+        assert state['switched']
+        documents = state['documents'][str(PageDocument)]
+        assert sorted(map(tuple, documents['done'])) == sorted(ranges)
+
+    def test_reindex_failed_range_is_not_switched(self, all_projects, tmpdir, mocker):
+        checkpoint = str(tmpdir.join('checkpoint.json'))
+        ranges = get_pk_ranges(HTMLFile.objects.all(), 2)
+        failed_range = ranges[0]
+
+        def fail_first_range(document, pk_range, **kwargs):
+            return (1, 1) if pk_range == failed_range else (2, 0)
+
+        mocker.patch('readthedocs.search.reindex.index_pk_range', side_effect=fail_first_range)
+        switch_es_index = mocker.patch('readthedocs.search.reindex.switch_es_index')
+
+        with pytest.raises(CommandError):
+            call_command(
+                'reindex_elasticsearch',
+                '--local',
+                '--models', 'projects.HTMLFile',
+                '--range-size', '2',
+                '--checkpoint', checkpoint,
+            )
+
+        switch_es_index.assert_not_called()
+        with open(checkpoint) as f:
+            state = json.load(f)['page_index']
+        assert not state['switched']
+        documents = state['documents'][str(PageDocument)]
+        done = [tuple(pk_range) for pk_range in documents['done']]
+        assert failed_range not in done
+        assert done == ranges[1:]
@@ -0,0 +1,83 @@
+import mock
+import pytest
+from django_dynamic_fixture import G
+
+from readthedocs.builds.models import Version
+from readthedocs.projects.models import HTMLFile
+from readthedocs.search.documents import PageDocument
+from readthedocs.search.utils import index_changed_files
+
+
+@pytest.mark.django_db
+@pytest.mark.search
+class TestIndexChangedFiles:
+
+    def _get_indexed_docs(self, project, version):
+        return {
+            int(hit.meta.id): hit
+            for hit in (
+                PageDocument.search()
+                .filter('term', project=project.slug)
+                .filter('term', version=version.slug)
+                .scan()
+            )
+        }
+
+    def test_index_changed_files(self, project):
+        version = project.versions.all()[0]
+        unchanged, removed = HTMLFile.objects.filter(
+            project=project, version=version,
+        ).order_by('pk')
+        assert set(self._get_indexed_docs(project, version)) == {
+            unchanged.pk, removed.pk,
+        }
+
+        # The unchanged file is moved to the new build,
+        # the removed file is left in the old one.
+        HTMLFile.objects.filter(pk=unchanged.pk).update(build=999, commit='new')
+        new = G(
+            HTMLFile,
+            project=project,
+            version=version,
+            name=removed.name,
+            build=999,
+            commit='new',
+        )
+
+        with mock.patch.object(
+                PageDocument, 'prepare', autospec=True,
+                side_effect=PageDocument.prepare) as prepare:
+            index_changed_files(
+                model=HTMLFile,
+                version=version,
+                build=999,
+                unchanged_ids=[unchanged.pk],
+            )
+        # Only the new file is indexed fully
+        assert [call[0][1].pk for call in prepare.call_args_list] == [new.pk]
+
+        docs = self._get_indexed_docs(project, version)
+        assert set(docs) == {unchanged.pk, new.pk}
+        assert docs[unchanged.pk].title == unchanged.processed_json['title']
+        assert docs[unchanged.pk].build == 999
+        assert docs[unchanged.pk].commit == 'new'
+        assert docs[new.pk].build == 999
+
+    def test_index_changed_files_version_fields(self, project):
+        version = project.versions.all()[0]
+        Version.objects.filter(pk=version.pk).update(privacy_level='private')
+        HTMLFile.objects.filter(project=project, version=version).update(build=999)
+        unchanged_ids = HTMLFile.objects.filter(
+            project=project, version=version,
+        ).values_list('pk', flat=True)
+
+        index_changed_files(
+            model=HTMLFile,
+            version=version,
+            build=999,
+            unchanged_ids=unchanged_ids,
+        )
+
+        docs = self._get_indexed_docs(project, version)
+        assert docs
+        assert {doc.privacy_level for doc in docs.values()} == {'private'}
@@ -3,11 +3,13 @@
 import logging
 from operator import attrgetter
 
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django_elasticsearch_dsl.apps import DEDConfig
 from django_elasticsearch_dsl.registries import registry
 
 from readthedocs.builds.models import Version
+from readthedocs.core.utils import chunked
 from readthedocs.projects.models import HTMLFile, Project
 from readthedocs.search.documents import PageDocument
 
@@ -76,6 +78,100 @@ def remove_indexed_files(model, version, build):
         log.exception('Unable to delete a subset of files. Continuing.')
 
 
+def index_changed_files(model, version, build, unchanged_ids=()):
+    """
+    Sync the files from the version with the search indexes, deleting by id.
+
+    Only the new and changed files of the build are indexed by each document
+    of ``model``. The documents of the unchanged files get a partial update
+    of the fields copied from the version and the project
+    (``partial_update_fields``), their content isn't sent again;
+    the ones not in the index (e.g. the files of a version made public,
+    for the quick search) are indexed fully.
+    The documents of the files that aren't part of the build anymore,
+    or that the document doesn't index anymore (e.g. the files of
+    private versions for the quick search) are deleted by id,
+    instead of querying the index.
+
+    :param unchanged_ids: pks of the files moved unchanged from the
+        previous build of the version
+    """
+
+    if not DEDConfig.autosync_enabled():
+        log.info(
+            'Autosync disabled, skipping indexing into the search index for: %s:%s',
+            version.project.slug,
+            version.slug,
+        )
+        return
+
+    version_ids = set(
+        model.objects
+        .filter(project=version.project, version=version)
+        .values_list('pk', flat=True)
+    )
+    for document in registry.get_documents(models=[model]):
+        try:
+            doc_obj = document()
+            queryset = (
+                doc_obj.get_queryset()
+                .filter(project=version.project, version=version, build=build)
+            )
+            ids = set(queryset.values_list('pk', flat=True))
+            updated_ids = ids.intersection(unchanged_ids)
+            if not doc_obj.partial_update_fields:
+                updated_ids = set()
+            changed_ids = ids - updated_ids
+            removed_ids = version_ids - ids
+            log.info(
+                'Indexing files into search index for: %s:%s. '
+                'document=%s indexed=%s updated=%s removed=%s',
+                version.project.slug,
+                version.slug,
+                document.__name__,
+                len(changed_ids),
+                len(updated_ids),
+                len(removed_ids),
+            )
+
+            for chunk in chunked(updated_ids, settings.RTD_FILEIFY_BATCH_SIZE):
+                __, errors = doc_obj.update(
+                    queryset.filter(pk__in=chunk).iterator(),
+                    action='update',
+                    raise_on_error=False,
+                )
+                for error in errors:
+                    if error['update'].get('status') == 404:
+                        # Never indexed by the document
+                        changed_ids.add(int(error['update']['_id']))
+                    else:
+                        log.warning('Unable to update a search document: %s', error)
+
+            for chunk in chunked(changed_ids, settings.RTD_FILEIFY_BATCH_SIZE):
+                doc_obj.update(queryset.filter(pk__in=chunk).iterator())
+
+            index = str(doc_obj._doc_type.index)
+            doc_type = doc_obj._doc_type.mapping.doc_type
+            actions = [
+                {
+                    '_op_type': 'delete',
+                    '_index': index,
+                    '_type': doc_type,
+                    '_id': pk,
+                }
+                for pk in removed_ids
+            ]
+            if actions:
+                # Files never indexed by the document aren't found, it's fine
+                doc_obj.bulk(
+                    actions,
+                    raise_on_error=False,
+                    refresh=doc_obj._doc_type.auto_refresh,
+                )
+        except Exception:
+            log.exception('Unable to index a subset of files. Continuing.')
+
+
 # TODO: Rewrite all the views using this in Class Based View,
 # and move this function to a mixin
 def get_project_list_or_404(project_slug, user, version_slug=None):
@@ -238,6 +238,31 @@ class CommunityBaseSettings(Settings):
     # Django Storage subclass used to write build artifacts to cloud or local storage
     # https://docs.readthedocs.io/page/development/settings.html#rtd-build-media-storage
     RTD_BUILD_MEDIA_STORAGE = 'readthedocs.builds.storage.BuildMediaFileSystemStorage'
+    # Number of threads used to copy and delete the build artifacts in media storage
+    RTD_BUILD_MEDIA_STORAGE_WORKERS = 8
+    # Store the files of the build artifacts once, hardlinking them from ARTIFACT_STORE_ROOT,
+    # which must be on the same filesystem of DOCROOT and MEDIA_ROOT
+    USE_ARTIFACT_STORE = False
+    ARTIFACT_STORE_ROOT = os.path.join(SITE_ROOT, 'artifact_store')
+    # Seconds the unreferenced files of the artifact store are kept after being changed
+    ARTIFACT_STORE_GC_GRACE_PERIOD = 60 * 60
+    # Number of rows written/deleted per query when syncing ImportedFiles
+    RTD_FILEIFY_BATCH_SIZE = 500
+    # Number of threads used to hash the build artifacts during fileify
+    RTD_FILEIFY_HASH_WORKERS = 4
+    # Finish the builds with nothing changed since the last successful build
+    # of the version without building the docs
+    RTD_SKIP_UNCHANGED_BUILDS = True
+    # Fetch a bare mirror of the repository of each project,
+    # and share its objects with the checkouts of the versions
+    RTD_GIT_MIRROR = False
+    RTD_GIT_MIRROR_LOCK_TIMEOUT = 600
+    # Number of versions created/updated per query when syncing the versions
+    SYNC_VERSIONS_BATCH_SIZE = 500
+    # Backend storing the locks of the versions, and seconds between the
+    # renewals of the lease of a held lock
+    RTD_LOCK_BACKEND = 'readthedocs.vcs_support.utils.FileLockBackend'
+    RTD_LOCK_RENEW_INTERVAL = 60
 
     TEMPLATES = [
         {
@@ -271,6 +296,14 @@ class CommunityBaseSettings(Settings):
         }
     }
     CACHE_MIDDLEWARE_SECONDS = 60
+    # Seconds the data used to resolve the URLs of the documents is cached,
+    # in the Django cache and in the memory of each process
+    RESOLVER_CACHE_TIMEOUT = 60 * 60
+    RESOLVER_LOCAL_CACHE_TIMEOUT = 10
+    # Seconds the routes of the documentation requests are cached
+    ROUTING_CACHE_TIMEOUT = 60 * 60
+    # Seconds the fragments of the portal pages showing the published documents are cached
+    PUBLISHED_DOCUMENTS_CACHE_TIMEOUT = 60 * 60
     GLOBAL_PIP_CACHE = False
 
     # I18n
@@ -333,7 +366,12 @@ class CommunityBaseSettings(Settings):
             'task': 'readthedocs.search.tasks.delete_old_search_queries_from_db',
             'schedule': crontab(minute=0, hour=0),
             'options': {'queue': 'web'},
-        }
+        },
+        'every-day-remove-unreferenced-artifacts': {
+            'task': 'readthedocs.projects.tasks.broadcast_remove_unreferenced_artifacts',
+            'schedule': crontab(minute=0, hour=3),
+            'options': {'queue': 'web'},
+        },
     }
     MULTIPLE_APP_SERVERS = [CELERY_DEFAULT_QUEUE]
     MULTIPLE_BUILD_SERVERS = [CELERY_DEFAULT_QUEUE]
@@ -431,8 +469,34 @@ class CommunityBaseSettings(Settings):
             'hosts': '127.0.0.1:9200'
         },
     }
+    # Clients used by the search views, see ``readthedocs.search.client``:
+    # connections kept open for each host, retries of failed requests
+    # seconds between the checks that Elasticsearch is answering
+    # and seconds each check waits for the answer
+    ES_CONNECTION_POOL_SIZE = 10
+    ES_MAX_RETRIES = 3
+    ES_HEALTH_CHECK_INTERVAL = 60
+    ES_HEALTH_CHECK_TIMEOUT = 1
+    # Seconds the results of the quick search are cached
+    QUICKSEARCH_CACHE_TIMEOUT = 60
+    # Objects prepared together for indexing, fetching their related objects at once
+    ES_PREPARE_CHUNK_SIZE = 100
     # Chunk size for elasticsearch reindex celery tasks
     ES_TASK_CHUNK_SIZE = 100
+    # Documents sent in each bulk request and concurrent bulk requests
+    # used by the reindex, see ``elasticsearch.helpers.parallel_bulk``.
+    # The local reindex uses ranges of ES_BULK_CHUNK_SIZE * ES_BULK_THREAD_COUNT
+    # objects, smaller ranges are split evenly between the threads
+    ES_BULK_CHUNK_SIZE = 500
+    ES_BULK_THREAD_COUNT = 4
+    # After a build, index only the new and changed files, update the version
+    # and project fields of the unchanged ones and delete the documents of the
+    # removed files by id, instead of indexing all the files of the version
+    # and deleting its old documents by query
+    ES_INCREMENTAL_INDEXING = True
+    # Parser used to extract the sections and domains of pages for search:
+    # ``pyquery`` or ``lxml`` (faster, it generates the same output)
+    RTD_SEARCH_HTML_PARSER = 'pyquery'
 
     # Info from Honza about this:
     # The key to determine shard number is actually usually not the node count,
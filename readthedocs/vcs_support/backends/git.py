@@ -2,13 +2,21 @@
 
 """Git-related utilities."""
 
+import errno
+import fcntl
 import logging
 import os
 import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
 
 import git
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from git.exc import BadName, InvalidGitRepositoryError
+from git.exc import BadName, GitCommandError, InvalidGitRepositoryError
 
 from readthedocs.builds.constants import EXTERNAL
 from readthedocs.config import ALL
@@ -25,6 +33,26 @@ from readthedocs.vcs_support.base import BaseVCS, VCSVersion
 
 log = logging.getLogger(__name__)
 
+MIRROR_FETCHED_KEY = 'git-mirror:fetched-bytes'
+MIRROR_SAVED_KEY = 'git-mirror:saved-bytes'
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The key is missing
+        cache.set(key, delta, None)
+        return delta
+
+
+def get_mirror_stats():
+    """Return the bytes fetched by the mirrors and the bytes they saved to the clones."""
+    return {
+        'fetched': cache.get(MIRROR_FETCHED_KEY, 0),
+        'saved': cache.get(MIRROR_SAVED_KEY, 0),
+    }
+
 
 class Backend(BaseVCS):
 
@@ -33,6 +61,7 @@ class Backend(BaseVCS):
     supports_tags = True
     supports_branches = True
     supports_submodules = True
+    supports_remote_refs = True
     fallback_branch = 'master'  # default branch
     repo_depth = 50
 
@@ -40,6 +69,10 @@ class Backend(BaseVCS):
         super().__init__(*args, **kwargs)
         self.token = kwargs.get('token', None)
         self.repo_url = self._get_clone_url()
+        # Bare repository with the branches and tags of the project,
+        # its objects are shared by the checkouts of all the versions
+        self.mirror_path = os.path.join(self.project.doc_path, 'mirror.git')
+        self.reference = None
 
     def _get_clone_url(self):
         if '://' in self.repo_url:
@@ -60,8 +93,12 @@ class Backend(BaseVCS):
     def update(self):
         """Clone or update the repository."""
         super().update()
+        if self.use_mirror() and self.update_mirror():
+            self.reference = self.mirror_path
         if self.repo_exists():
             self.set_remote_url(self.repo_url)
+            if self.reference:
+                self.add_alternate()
             return self.fetch()
         self.make_clean_working_dir()
         # A fetch is always required to get external versions properly
@@ -70,6 +107,113 @@ class Backend(BaseVCS):
             return self.fetch()
         return self.clone()
 
+    def use_mirror(self):
+        """
+        Whether the checkout uses the objects of the mirror of the project.
+
+        External versions don't, their refs aren't fetched in the mirror.
+        """
+        return settings.RTD_GIT_MIRROR and self.version_type != EXTERNAL
+
+    @contextmanager
+    def mirror_lock(self):
+        """
+        Lock the mirror, for the builds of other versions on this host.
+
+        :raises: ``LockTimeout`` if it isn't acquired
+            in ``RTD_GIT_MIRROR_LOCK_TIMEOUT`` seconds
+        """
+        from readthedocs.vcs_support.utils import LockTimeout
+
+        os.makedirs(self.project.doc_path, exist_ok=True)
+        with open('{}.lock'.format(self.mirror_path), 'w') as fd:
+            start = time.time()
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError as e:
+                    if e.errno not in (errno.EACCES, errno.EAGAIN):
+                        raise
+                if time.time() - start > settings.RTD_GIT_MIRROR_LOCK_TIMEOUT:
+                    raise LockTimeout(
+                        'Lock ({}): Mirror still locked'.format(self.project.slug),
+                    )
+                time.sleep(1)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def get_mirror_size(self):
+        """Return the size in bytes of the objects of the mirror."""
+        code, stdout, _ = self.run(
+            'git', '--git-dir', self.mirror_path, 'count-objects', '-v',
+            record=False,
+        )
+        if code != 0:
+            return 0
+        sizes = dict(
+            line.split(': ', 1) for line in stdout.splitlines() if ': ' in line
+        )
+        return (int(sizes.get('size', 0)) + int(sizes.get('size-pack', 0))) * 1024
+
+    def update_mirror(self):
+        """
+        Create or fetch the mirror of the project.
+
+        Objects are never removed from the mirror,
+        so it's safe for the checkouts to use them while it's fetched.
+
+        :returns: whether the mirror is up to date
+        """
+        from readthedocs.vcs_support.utils import LockTimeout
+
+        try:
+            with self.mirror_lock():
+                if not os.path.exists(self.mirror_path):
+                    self.run('git', '--git-dir', self.mirror_path, 'init', '--bare')
+                    # The objects used by the checkouts can't be pruned
+                    self.run('git', '--git-dir', self.mirror_path, 'config', 'gc.auto', '0')
+                size = self.get_mirror_size()
+                # The URL is passed in the command, not to store the token
+                code, _, _ = self.run(
+                    'git', '--git-dir', self.mirror_path, 'fetch', '--force', '--prune',
+                    self.repo_url,
+                    '+refs/heads/*:refs/heads/*',
+                    '+refs/tags/*:refs/tags/*',
+                )
+                if code != 0:
+                    return False
+                fetched = self.get_mirror_size() - size
+        except LockTimeout:
+            log.warning('Unable to lock the git mirror: project=%s', self.project.slug)
+            return False
+
+        if fetched > 0:
+            _incr(MIRROR_FETCHED_KEY, fetched)
+        log.info(
+            'Git mirror fetched: project=%s bytes=%s',
+            self.project.slug,
+            fetched,
+        )
+        return True
+
+    def add_alternate(self):
+        """Make the existing checkout use the objects of the mirror."""
+        alternates_path = os.path.join(
+            self.working_dir, '.git', 'objects', 'info', 'alternates',
+        )
+        objects_path = os.path.join(self.mirror_path, 'objects')
+        alternates = []
+        if os.path.exists(alternates_path):
+            with open(alternates_path) as fd:
+                alternates = fd.read().splitlines()
+        if objects_path not in alternates:
+            os.makedirs(os.path.dirname(alternates_path), exist_ok=True)
+            with open(alternates_path, 'a') as fd:
+                fd.write(objects_path + '\n')
+
     def repo_exists(self):
         try:
             git.Repo(self.working_dir)
@@ -153,7 +297,8 @@ class Backend(BaseVCS):
         cmd = ['git', 'fetch', 'origin',
                '--force', '--tags', '--prune', '--prune-tags']
 
-        if self.use_shallow_clone():
+        # With the mirror, the history is already on disk
+        if self.use_shallow_clone() and not self.reference:
             cmd.extend(['--depth', str(self.repo_depth)])
 
         if self.verbose_name and self.version_type == EXTERNAL:
@@ -189,7 +334,10 @@ class Backend(BaseVCS):
         """Clones the repository."""
         cmd = ['git', 'clone', '--no-single-branch']
 
-        if self.use_shallow_clone():
+        if self.reference:
+            # Only the objects missing from the mirror are downloaded
+            cmd.extend(['--reference', self.reference])
+        elif self.use_shallow_clone():
             cmd.extend(['--depth', str(self.repo_depth)])
 
         cmd.extend([self.repo_url, '.'])
@@ -197,43 +345,106 @@ class Backend(BaseVCS):
         code, stdout, stderr = self.run(*cmd)
         if code != 0:
             raise RepositoryError
+        if self.reference:
+            saved = self.get_mirror_size()
+            _incr(MIRROR_SAVED_KEY, saved)
+            log.info(
+                'Git checkout cloned from the mirror: project=%s saved_bytes=%s',
+                self.project.slug,
+                saved,
+            )
         return code, stdout, stderr
 
-    @property
-    def tags(self):
+    @staticmethod
+    def _get_refs(repo, *patterns):
+        """
+        Return the refs of ``repo`` matching ``patterns``.
+
+        All the refs are listed by a single ``git for-each-ref``, as tuples of
+        ``(refname, objectname, objecttype)``. Annotated tags are peeled,
+        so their object is the one the tag points to.
+
+        The output is read with GitPython, and not with ``run``,
+        because the output of the commands is truncated to be saved.
+        """
+        try:
+            output = repo.git.for_each_ref(
+                '--format',
+                '%(objectname) %(objecttype) %(*objectname) %(*objecttype) %(refname)',
+                *patterns,
+            )
+        except GitCommandError:
+            raise RepositoryError
+        refs = []
+        for line in output.splitlines():
+            objectname, objecttype, peeled_name, peeled_type, refname = line.split(' ', 4)
+            if peeled_name:
+                objectname, objecttype = peeled_name, peeled_type
+            refs.append((refname, objectname, objecttype))
+        return refs
+
+    def _get_tags(self, repo):
         versions = []
-        repo = git.Repo(self.working_dir)
-        for tag in repo.tags:
-            try:
-                versions.append(VCSVersion(self, str(tag.commit), str(tag)))
-            except ValueError:
-                # ValueError: Cannot resolve commit as tag TAGNAME points to a
-                # blob object - use the `.object` property instead to access it
-                # This is not a real tag for us, so we skip it
+        for refname, objectname, objecttype in self._get_refs(repo, 'refs/tags'):
+            name = refname[len('refs/tags/'):]
+            if objecttype != 'commit':
+                # The tag points to a blob or a tree object,
+                # this is not a real tag for us, so we skip it
                 # https://github.com/rtfd/readthedocs.org/issues/4440
-                log.warning('Git tag skipped: %s', tag, exc_info=True)
+                log.warning('Git tag skipped: %s', name)
                 continue
+            versions.append(VCSVersion(self, objectname, name))
         return versions
 
-    @property
-    def branches(self):
-        repo = git.Repo(self.working_dir)
+    def _get_branches(self, repo, prefix):
         versions = []
-        branches = []
-
-        # ``repo.remotes.origin.refs`` returns remote branches
-        if repo.remotes:
-            branches += repo.remotes.origin.refs
-
-        for branch in branches:
-            verbose_name = branch.name
-            if verbose_name.startswith('origin/'):
-                verbose_name = verbose_name.replace('origin/', '')
+        for refname, __, __ in self._get_refs(repo, prefix):
+            verbose_name = refname[len(prefix) + 1:]
             if verbose_name == 'HEAD':
                 continue
-            versions.append(VCSVersion(self, str(branch), verbose_name))
+            versions.append(
+                VCSVersion(self, 'origin/{}'.format(verbose_name), verbose_name),
+            )
         return versions
 
+    @property
+    def tags(self):
+        return self._get_tags(git.Repo(self.working_dir))
+
+    @property
+    def branches(self):
+        return self._get_branches(git.Repo(self.working_dir), 'refs/remotes/origin')
+
+    def get_remote_refs(self):
+        """
+        List the branches and tags of the remote repository, without a checkout.
+
+        ``git ls-remote`` doesn't tell the type of the objects the tags point
+        to, so the branches and tags are fetched into a temporary bare
+        repository, with only their last commit and without the files.
+
+        :returns: a tuple with the lists of branches and tags
+        """
+        path = tempfile.mkdtemp()
+        try:
+            repo = git.Repo.init(path, bare=True)
+            args = ['--depth', '1', '--no-tags']
+            if repo.git.version_info >= (2, 19):
+                args.extend(['--filter', 'blob:none'])
+            try:
+                repo.git.fetch(
+                    *args,
+                    self.repo_url,
+                    '+refs/heads/*:refs/heads/*',
+                    '+refs/tags/*:refs/tags/*',
+                    env={'GIT_TERMINAL_PROMPT': '0'},
+                )
+            except GitCommandError:
+                raise RepositoryError
+            return self._get_branches(repo, 'refs/heads'), self._get_tags(repo)
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
     @property
     def commit(self):
         if self.repo_exists():
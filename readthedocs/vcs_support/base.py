@@ -44,6 +44,7 @@ class BaseVCS:
     supports_tags = False  # Whether this VCS supports tags or not.
     supports_branches = False  # Whether this VCS supports branches or not.
     supports_submodules = False
+    supports_remote_refs = False  # Whether the refs can be listed without a checkout.
 
     # =========================================================================
     # General methods
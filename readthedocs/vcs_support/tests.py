@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 import os
 import shutil
+import time
 import unittest
 
 import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
 
 from readthedocs.vcs_support import utils
 
@@ -35,7 +38,7 @@ class TestNonBlockingLock(unittest.TestCase):
             project=self.project_mock,
             version=self.version_mock,
         ) as f_lock:
-            self.assertTrue(os.path.exists(f_lock.fpath))
+            self.assertTrue(os.path.exists(f_lock.backend.fpath))
 
     def test_simplelock_cleanup(self):
         lock_path = None
@@ -43,7 +46,7 @@ class TestNonBlockingLock(unittest.TestCase):
             project=self.project_mock,
             version=self.version_mock,
         ) as f_lock:
-            lock_path = f_lock.fpath
+            lock_path = f_lock.backend.fpath
         self.assertTrue(lock_path is not None and not os.path.exists(lock_path))
 
     def test_nonreentrant(self):
@@ -75,3 +78,75 @@ class TestNonBlockingLock(unittest.TestCase):
                     pass
             except utils.LockTimeout:
                 raise AssertionError('Should have thrown LockTimeout')
+
+
+@override_settings(RTD_LOCK_BACKEND='readthedocs.vcs_support.utils.CacheLockBackend')
+class TestCacheLock(SimpleTestCase):
+
+    def setUp(self):
+        self.project_mock = mock.Mock()
+        self.project_mock.slug = 'test-project-slug'
+        self.version_mock = mock.Mock()
+        self.version_mock.slug = 'test-version-slug'
+        cache.clear()
+
+    def test_nonreentrant(self):
+        with utils.NonBlockingLock(
+            project=self.project_mock,
+            version=self.version_mock,
+            max_lock_age=60,
+        ):
+            with self.assertRaises(utils.LockTimeout):
+                with utils.NonBlockingLock(
+                    project=self.project_mock,
+                    version=self.version_mock,
+                    max_lock_age=60,
+                ):
+                    pass
+        with utils.NonBlockingLock(
+            project=self.project_mock,
+            version=self.version_mock,
+        ):
+            pass
+        stats = utils.get_lock_stats()
+        self.assertEqual(stats['acquired'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+
+    def test_lock_stats_subsecond_hold(self):
+        with utils.NonBlockingLock(
+            project=self.project_mock,
+            version=self.version_mock,
+        ):
+            time.sleep(0.05)
+        stats = utils.get_lock_stats()
+        self.assertEqual(stats['acquired'], 1)
+        self.assertGreaterEqual(stats['average_hold'], 0.05)
+        self.assertLess(stats['average_hold'], 1)
+
+    def test_release_after_expiration(self):
+        lock = utils.NonBlockingLock(
+            project=self.project_mock,
+            version=self.version_mock,
+        )
+        with lock:
+            # Another holder acquired the lock after it expired
+            cache.set(lock.backend.key, ('other', time.time()))
+        self.assertEqual(cache.get(lock.backend.key)[0], 'other')
+
+    @override_settings(RTD_LOCK_RENEW_INTERVAL=0.1)
+    def test_lease_renewal(self):
+        lock = utils.NonBlockingLock(
+            project=self.project_mock,
+            version=self.version_mock,
+            max_lock_age=1,
+        )
+        with lock:
+            time.sleep(1.5)
+            with self.assertRaises(utils.LockTimeout):
+                with utils.NonBlockingLock(
+                    project=self.project_mock,
+                    version=self.version_mock,
+                    max_lock_age=1,
+                ):
+                    pass
+        self.assertIsNone(cache.get(lock.backend.key))
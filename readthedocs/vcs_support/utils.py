@@ -1,24 +1,265 @@
 # -*- coding: utf-8 -*-
 
-"""Locking utilities."""
+"""
+Locking utilities.
+
+The locks are stored by the backend of the ``RTD_LOCK_BACKEND`` setting:
+
+* ``FileLockBackend`` creates a file under the ``doc_path`` of the project,
+  it only locks the builders sharing the filesystem.
+* ``CacheLockBackend`` adds a key to the Django cache,
+  it locks all the builders sharing the cache.
+
+While a lock with a maximum age is held, its lease is renewed every
+``RTD_LOCK_RENEW_INTERVAL`` seconds (or half the maximum age, if shorter),
+so it isn't taken over during long builds.
+"""
 import errno
 import logging
 import os
-import stat
+import threading
 import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
 
 
 log = logging.getLogger(__name__)
 
+LOCK_ACQUIRED_KEY = 'lock:acquired'
+LOCK_TIMEOUT_KEY = 'lock:timeouts'
+# Milliseconds, so the short waits and holds aren't truncated to 0
+LOCK_WAIT_KEY = 'lock:wait_ms'
+LOCK_HOLD_KEY = 'lock:hold_ms'
+
 
 class LockTimeout(Exception):
     pass
 
 
-class Lock:
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The key is missing
+        cache.set(key, delta, None)
+        return delta
+
+
+def get_lock_stats():
+    """
+    Return the stats of the locks.
+
+    The number of locks acquired and of the attempts that timed out,
+    and the average seconds waited to acquire the locks and they were held.
+    """
+    acquired = cache.get(LOCK_ACQUIRED_KEY, 0)
+    wait = cache.get(LOCK_WAIT_KEY, 0)
+    hold = cache.get(LOCK_HOLD_KEY, 0)
+    return {
+        'acquired': acquired,
+        'timeouts': cache.get(LOCK_TIMEOUT_KEY, 0),
+        'average_wait': wait / 1000 / acquired if acquired else 0,
+        'average_hold': hold / 1000 / acquired if acquired else 0,
+    }
+
+
+def get_lock_backend(project, version):
+    """Return the backend of the ``RTD_LOCK_BACKEND`` setting for ``version``."""
+    return import_string(settings.RTD_LOCK_BACKEND)(project, version)
+
+
+class FileLockBackend:
+
+    """
+    Lock file under the ``doc_path`` of the project.
+
+    The age of the lock is the age of the file, renewing the lease touches it.
+    """
+
+    def __init__(self, project, version):
+        self.base_path = project.doc_path
+        self.fpath = os.path.join(
+            self.base_path,
+            f'{version.slug}__rtdlock',
+        )
+        self.name = project.slug
+
+    def acquire(self, max_age=None):
+        """
+        Try to acquire the lock, without waiting.
+
+        :param max_age: if the lock is older than this, forcibly acquire.
+            None means never force
+        :returns: whether the lock was acquired
+        """
+        # Create dirs if they don't exists
+        os.makedirs(self.base_path, exist_ok=True)
+        try:
+            os.close(os.open(self.fpath, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            if max_age is None:
+                return False
+        try:
+            lock_age = time.time() - os.path.getmtime(self.fpath)
+        except FileNotFoundError:
+            # Released in the meantime
+            return False
+        if lock_age <= max_age:
+            return False
+        log.debug(
+            'Lock (%s): Force unlock, old lockfile',
+            self.name,
+        )
+        self.force()
+        return True
+
+    def force(self):
+        """Acquire the lock, even if it's held."""
+        os.makedirs(self.base_path, exist_ok=True)
+        open(self.fpath, 'w').close()
+
+    def renew(self, max_age):
+        try:
+            os.utime(self.fpath)
+        except FileNotFoundError:
+            log.warning('Lock (%s): Lost before renewing', self.name)
+
+    def release(self):
+        try:
+            os.remove(self.fpath)
+        except (IOError, OSError) as e:
+            # We want to ignore "No such file or directory" and log any other
+            # type of error.
+            if e.errno != errno.ENOENT:
+                log.error(
+                    'Lock (%s): Failed to release, ignoring...',
+                    self.name,
+                    exc_info=True,
+                )
+
+
+class CacheLockBackend:
+
+    """
+    Lock stored in a key of the Django cache.
+
+    The key is added atomically, with a random token identifying the holder
+    and the time of the last renewal of the lease.
+    It expires after the maximum age of the lock,
+    unless the holder renews its lease before.
+    """
+
+    key = 'lock:{project}:{version}'
+
+    def __init__(self, project, version):
+        self.key = self.key.format(project=project.slug, version=version.slug)
+        self.token = uuid.uuid4().hex
+        self.name = project.slug
+
+    def acquire(self, max_age=None):
+        """
+        Try to acquire the lock, without waiting.
+
+        :param max_age: if the lock is older than this, forcibly acquire.
+            The lock expires after it, unless it's renewed.
+            None means never force
+        :returns: whether the lock was acquired
+        """
+        if cache.add(self.key, (self.token, time.time()), max_age):
+            return True
+        if max_age is None:
+            return False
+        holder = cache.get(self.key)
+        if holder is not None and time.time() - holder[1] <= max_age:
+            return False
+        log.debug(
+            'Lock (%s): Force unlock, old lock',
+            self.name,
+        )
+        self.force()
+        return True
+
+    def force(self):
+        """Acquire the lock, even if it's held."""
+        cache.set(self.key, (self.token, time.time()), None)
+
+    def renew(self, max_age):
+        holder = cache.get(self.key)
+        if holder is None or holder[0] != self.token:
+            log.warning('Lock (%s): Lost before renewing', self.name)
+            return
+        cache.set(self.key, (self.token, time.time()), max_age)
+
+    def release(self):
+        # Don't delete the lock acquired by another holder after this one expired
+        holder = cache.get(self.key)
+        if holder is not None and holder[0] == self.token:
+            cache.delete(self.key)
+
+
+class BaseLock:
 
     """
-    A simple file based lock with timeout.
+    Lock of a version, held by the context manager.
+
+    :param project: Project being built
+    :param version: Version to build
+    :param max_lock_age: If the lock is older than this, forcibly acquire.
+        None means never force
+    """
+
+    def __init__(self, project, version, max_lock_age=None):
+        self.backend = get_lock_backend(project, version)
+        self.max_lock_age = max_lock_age
+        self.name = project.slug
+        self.acquired_at = None
+        self._renewal = None
+
+    def _acquired(self, start):
+        self.acquired_at = time.time()
+        _incr(LOCK_ACQUIRED_KEY)
+        _incr(LOCK_WAIT_KEY, int((self.acquired_at - start) * 1000))
+        log.debug('Lock (%s): Lock acquired', self.name)
+
+        if self.max_lock_age is None:
+            # The lock doesn't expire
+            return
+        interval = min(settings.RTD_LOCK_RENEW_INTERVAL, self.max_lock_age / 2)
+        if interval <= 0:
+            return
+
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(interval):
+                self.backend.renew(self.max_lock_age)
+
+        thread = threading.Thread(target=renew, daemon=True)
+        thread.start()
+        self._renewal = (thread, stop)
+
+    def _release(self):
+        if self.acquired_at is None:
+            return
+        if self._renewal is not None:
+            thread, stop = self._renewal
+            stop.set()
+            thread.join()
+            self._renewal = None
+        log.debug('Lock (%s): Releasing', self.name)
+        self.backend.release()
+        _incr(LOCK_HOLD_KEY, int((time.time() - self.acquired_at) * 1000))
+        self.acquired_at = None
+
+
+class Lock(BaseLock):
+
+    """
+    A simple lock with timeout.
 
     On entering the context, it will try to acquire the lock. If timeout passes,
     it just gets the lock anyway.
@@ -27,25 +268,13 @@ class Lock:
     """
 
     def __init__(self, project, version, timeout=5, polling_interval=0.1):
-        self.name = project.slug
-        self.fpath = os.path.join(
-            project.doc_path,
-            '%s__rtdlock' % version.slug,
-        )
+        super().__init__(project, version, max_lock_age=timeout)
         self.timeout = timeout
         self.polling_interval = polling_interval
 
     def __enter__(self):
         start = time.time()
-        while os.path.exists(self.fpath):
-            lock_age = time.time() - os.stat(self.fpath)[stat.ST_MTIME]
-            if lock_age > self.timeout:
-                log.debug(
-                    'Lock (%s): Force unlock, old lockfile',
-                    self.name,
-                )
-                os.remove(self.fpath)
-                break
+        while not self.backend.acquire(self.timeout):
             log.debug('Lock (%s): Locked, waiting..', self.name)
             time.sleep(self.polling_interval)
             timesince = time.time() - start
@@ -54,7 +283,8 @@ class Lock:
                     'Lock (%s): Force unlock, timeout reached',
                     self.name,
                 )
-                os.remove(self.fpath)
+                _incr(LOCK_TIMEOUT_KEY)
+                self.backend.force()
                 break
             log.debug(
                 '%s still locked after %.2f seconds; retry for %.2f'
@@ -63,77 +293,33 @@ class Lock:
                 timesince,
                 self.timeout,
             )
-        open(self.fpath, 'w').close()
-        log.debug('Lock (%s): Lock acquired', self.name)
+        self._acquired(start)
 
     def __exit__(self, exc, value, tb):
-        try:
-            log.debug('Lock (%s): Releasing', self.name)
-            os.remove(self.fpath)
-        except OSError as e:
-            # We want to ignore "No such file or directory" and log any other
-            # type of error.
-            if e.errno != errno.ENOENT:
-                log.exception(
-                    'Lock (%s): Failed to release, ignoring...',
-                    self.name,
-                )
+        self._release()
 
 
-class NonBlockingLock:
+class NonBlockingLock(BaseLock):
 
     """
     Acquire a lock in a non-blocking manner.
 
-    Instead of waiting for a lock, depending on the lock file age, either
+    Instead of waiting for a lock, depending on the lock age, either
     acquire it immediately or throw LockTimeout
 
     :param project: Project being built
     :param version: Version to build
-    :param max_lock_age: If file lock is older than this, forcibly acquire.
+    :param max_lock_age: If the lock is older than this, forcibly acquire.
         None means never force
     """
 
-    def __init__(self, project, version, max_lock_age=None):
-        self.base_path = project.doc_path
-        self.fpath = os.path.join(
-            self.base_path,
-            f'{version.slug}__rtdlock',
-        )
-        self.max_lock_age = max_lock_age
-        self.name = project.slug
-
     def __enter__(self):
-        path_exists = os.path.exists(self.fpath)
-        if path_exists and self.max_lock_age is not None:
-            lock_age = time.time() - os.stat(self.fpath)[stat.ST_MTIME]
-            if lock_age > self.max_lock_age:
-                log.debug(
-                    'Lock (%s): Force unlock, old lockfile',
-                    self.name,
-                )
-                os.remove(self.fpath)
-            else:
-                raise LockTimeout(
-                    'Lock ({}): Lock still active'.format(self.name),
-                )
-        elif path_exists:
-            raise LockTimeout('Lock ({}): Lock still active'.format(self.name),)
-        # Create dirs if they don't exists
-        os.makedirs(self.base_path, exist_ok=True)
-        open(self.fpath, 'w').close()
+        start = time.time()
+        if not self.backend.acquire(self.max_lock_age):
+            _incr(LOCK_TIMEOUT_KEY)
+            raise LockTimeout('Lock ({}): Lock still active'.format(self.name))
+        self._acquired(start)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        try:
-            log.debug('Lock (%s): Releasing', self.name)
-            os.remove(self.fpath)
-        except (IOError, OSError) as e:
-            # We want to ignore "No such file or directory" and log any other
-            # type of error.
-            if e.errno != errno.ENOENT:
-                log.error(
-                    'Lock (%s): Failed to release, ignoring...',
-                    self.name,
-                    exc_info=True,
-                )
+        self._release()